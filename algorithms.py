@@ -1,10 +1,91 @@
+from time import perf_counter
+from policies import POLICIES
+from traces import iter_chunks
+
+# "fast" engines run the policies in policies.py (O(1) or O(log k) per
+# reference); "list" keeps the original list-scanning engines for FIFO, LRU
+# and Optimal as a reference to compare against.
+ENGINES = ("fast", "list")
+
+# Algorithm name -> list engine method
+LIST_ENGINES = {"FIFO": "_fifo_list", "LRU": "_lru_list", "Optimal": "_optimal_list"}
+
 class PageReplacement:
-    def __init__(self, frame_size, reference_string):
+    # reference_string may be a list or a trace object with a chunks() method
+    # (see traces.py); the fast engines consume it chunk by chunk and record
+    # cumulative faults at every chunk boundary in self.timeline (and, for
+    # adaptive policies, the adapted value in self.adaptation_timeline).
+    # progress, if given, is called with the number of references done after
+    # each chunk. profile, if given, is a profiling.Profile that the fast
+    # engines charge their phases and counters to.
+    def __init__(self, frame_size, reference_string, engine="fast", progress=None, profile=None):
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown engine: {engine}")
         self.frame_size = frame_size
         self.reference_string = reference_string
+        self.engine = engine
+        self.progress = progress
+        self.profile = profile
         self.page_faults = 0
+        self.timeline = []
+        self.adaptation_timeline = None
+        self.policy = None
+
+    def run(self, algo):
+        # Fault count of a registered policy over the whole reference string
+        if algo not in POLICIES:
+            raise ValueError(f"Unknown algorithm: {algo}")
+        if self.engine == "list":
+            if algo not in LIST_ENGINES:
+                raise ValueError(f"No list engine for {algo}")
+            return getattr(self, LIST_ENGINES[algo])()
+        self.policy = policy = POLICIES[algo](self.frame_size)
+        profile = self.profile
+        chunks = iter_chunks(self.reference_string)
+        if profile:
+            with profile.phase("prepare"):
+                policy.prepare(self._pages())
+            profile.begin_run(policy)
+            chunks = profile.timed("read", chunks)
+        else:
+            policy.prepare(self._pages())
+        page_faults = 0
+        position = 0
+        self.timeline = []
+        adaptive = policy.adaptation_label is not None
+        self.adaptation_timeline = [] if adaptive else None
+        for chunk in chunks:
+            if profile:
+                started = perf_counter()
+                page_faults += policy.count(chunk)
+                profile.add_time("simulate", perf_counter() - started)
+            else:
+                page_faults += policy.count(chunk)
+            position += len(chunk)
+            self.timeline.append((position, page_faults))
+            if adaptive:
+                self.adaptation_timeline.append((position, policy.adaptation()))
+            if self.progress:
+                self.progress(position)
+        self.page_faults = page_faults
+        if profile:
+            profile.end_run(policy, position, page_faults)
+        return page_faults
 
     def fifo(self):
+        return self.run("FIFO")
+
+    def lru(self):
+        return self.run("LRU")
+
+    def optimal(self):
+        return self.run("Optimal")
+
+    def _pages(self):
+        for chunk in iter_chunks(self.reference_string):
+            yield from chunk
+
+    def _fifo_list(self):
         frame = []
         page_faults = 0
         for page in self.reference_string:
@@ -17,7 +98,7 @@ class PageReplacement:
                 page_faults += 1
         return page_faults
 
-    def lru(self):
+    def _lru_list(self):
         frame = []
         page_faults = 0
         for page in self.reference_string:
@@ -33,7 +114,7 @@ class PageReplacement:
                 frame.append(page) # Move to the most recently used
         return page_faults
 
-    def optimal(self):
+    def _optimal_list(self):
         frame = []
         page_faults = 0
         for i, page in enumerate(self.reference_string):
@@ -46,4 +127,4 @@ class PageReplacement:
                     frame.remove(victim)
                     frame.append(page)
                 page_faults += 1
-        return page_faults
\ No newline at end of file
+        return page_faults
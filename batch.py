@@ -0,0 +1,258 @@
+import argparse
+import csv
+import glob
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from algorithms import PageReplacement
+from compare import _pool_context, _record_pid, _terminate
+from policies import POLICIES
+from profiling import Profile
+from results import ResultWriter, record_run
+from traces import open_trace
+
+# Runs every combination of trace file, frame size and algorithm without a
+# display and streams one result row per run as CSV or JSON Lines:
+#
+#   python batch.py 'traces/**/*.bin' --algorithms LRU ARC --frames 16..1024:16 -o sweep.csv
+#   python batch.py a.txt b.bin --frames 3 4 5 --format jsonl
+#
+# Rows are written as runs finish, in completion order, and only a bounded
+# number of runs is queued at a time, so memory does not grow with the
+# number of traces. A run that fails (an unreadable trace, say, or any
+# other error) produces a row with the error instead of stopping the sweep;
+# an interrupt stops the workers too. With --save-results
+# every run is also recorded step by step and streamed into a result file
+# (see results.py) that the GUI can open without simulating again. With
+# --profile each row also carries the run's profile (see profiling.py):
+# time per phase, evictions, victim-search comparisons (left empty for
+# policies that do not search for a victim, see policies.py), throughput and
+# the worker's peak memory.
+
+FIELDS = ["trace", "algo", "frames", "references", "faults", "fault_rate", "seconds", "error",
+          "result_file"]
+PROFILE_FIELDS = ["prepare_seconds", "read_seconds", "simulate_seconds", "write_seconds",
+                  "evictions", "victim_comparisons", "refs_per_sec", "peak_bytes"]
+
+# Runs queued per worker process
+QUEUE_PER_WORKER = 4
+
+def parse_frames(values):
+    # Frame sizes from values such as "4", "3..64" or "16..1024:16"
+    sizes = []
+    for value in values:
+        try:
+            if ".." in value:
+                bounds, _, step = value.partition(":")
+                first, last = (int(bound) for bound in bounds.split(".."))
+                step = int(step) if step else 1
+                if step <= 0:
+                    raise ValueError
+                sizes.extend(range(first, last + 1, step))
+            else:
+                sizes.append(int(value))
+        except ValueError:
+            raise ValueError(f"Invalid frame size or range: {value!r}") from None
+    for size in sizes:
+        if size <= 0:
+            raise ValueError(f"Frame sizes must be positive, got {size}")
+    return list(dict.fromkeys(sizes))
+
+def expand_traces(patterns, warn=None):
+    # Yields trace paths for file names and glob patterns (** recurses),
+    # each pattern's matches in sorted order
+    for pattern in patterns:
+        if not glob.has_magic(pattern):
+            yield pattern
+            continue
+        paths = sorted(glob.iglob(pattern, recursive=True))
+        if not paths and warn:
+            warn(f"No traces match {pattern}")
+        yield from (path for path in paths if os.path.isfile(path))
+
+def result_path(directory, path, algo, frame_size):
+    # The trace's whole path goes into the name, so that traces with the
+    # same file name in different directories do not collide
+    name = re.sub(r"[^\w.-]+", "_", path).strip("_.")
+    return os.path.join(directory, f"{name}_{algo}_{frame_size}.pgres")
+
+def run_one(path, algo, frame_size, save_dir=None, profile=False):
+    # One simulation as a result row: with the counting engine, or recorded
+    # into a result file in save_dir
+    started = time.perf_counter()
+    row = {"trace": path, "algo": algo, "frames": frame_size}
+    profile = Profile() if profile else None
+    try:
+        trace = open_trace(path)
+        try:
+            if profile:
+                profile.start()
+            if save_dir:
+                row["result_file"] = result_path(save_dir, path, algo, frame_size)
+                with ResultWriter(row["result_file"], {"trace": path}) as writer:
+                    faults = record_run(writer, trace, frame_size, algo, profile=profile)
+                references = writer.runs[-1]["length"]
+            else:
+                sim = PageReplacement(frame_size, trace, profile=profile)
+                faults = sim.run(algo)
+                references = sim.timeline[-1][0] if sim.timeline else 0
+        finally:
+            trace.close()
+            if profile:
+                profile.stop()
+    except Exception as e:
+        row["error"] = error_text(e)
+    else:
+        row.update(references=references, faults=faults,
+                   fault_rate=faults / references if references else 0.0)
+        if profile:
+            row.update(profile_fields(profile))
+    row["seconds"] = round(time.perf_counter() - started, 6)
+    return row
+
+def error_text(error):
+    # Expected failures (unreadable or invalid traces) by their message,
+    # anything else with its type too
+    if isinstance(error, (OSError, ValueError)):
+        return str(error)
+    return f"{type(error).__name__}: {error}"
+
+def profile_fields(profile):
+    fields = {f"{phase}_seconds": round(profile.phases.get(phase, 0.0), 6)
+              for phase in ("prepare", "read", "simulate", "write")}
+    rate = profile.refs_per_second()
+    fields.update(evictions=profile.counters.get("evictions", 0),
+                  victim_comparisons=(None if profile.comparisons_estimated
+                                      else profile.counters.get("victim comparisons", 0)),
+                  refs_per_sec=round(rate) if rate is not None else None,
+                  peak_bytes=profile.peak_bytes)
+    return fields
+
+def iter_jobs(patterns, algorithms, frame_sizes, warn=None, save_dir=None, profile=False):
+    for path in expand_traces(patterns, warn):
+        for frame_size in frame_sizes:
+            for algo in algorithms:
+                yield path, algo, frame_size, save_dir, profile
+
+def run_batch(jobs, workers=None):
+    # Yields the row of every (path, algo, frame_size, save_dir, profile) job
+    # as it finishes. jobs may be a generator; it is consumed only as fast as
+    # runs complete.
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        for job in jobs:
+            yield run_one(*job)
+        return
+    jobs = iter(jobs)
+    context = _pool_context()
+    pids = context.Array('q', workers)
+    pool = ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                               initializer=_record_pid, initargs=(pids,))
+    try:
+        pending = {}
+        while True:
+            for job in jobs:
+                pending[pool.submit(run_one, *job)] = job
+                if len(pending) >= workers * QUEUE_PER_WORKER:
+                    break
+            if not pending:
+                break
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                job = pending.pop(future)
+                try:
+                    row = future.result()
+                except Exception as e:
+                    # The job could not be sent, the worker died, or the row
+                    # could not be sent back
+                    path, algo, frame_size = job[:3]
+                    row = {"trace": path, "algo": algo, "frames": frame_size,
+                           "error": error_text(e)}
+                yield row
+    except BaseException:
+        # Interrupted: queued runs are cancelled and running ones stopped
+        _terminate(pool, pids)
+        raise
+    pool.shutdown()
+
+class CsvWriter:
+    def __init__(self, stream, fields=FIELDS):
+        self.writer = csv.DictWriter(stream, fields)
+        self.writer.writeheader()
+
+    def write(self, row):
+        self.writer.writerow(row)
+
+class JsonLinesWriter:
+    def __init__(self, stream, fields=FIELDS):
+        self.stream = stream
+
+    def write(self, row):
+        self.stream.write(json.dumps(row) + "\n")
+
+WRITERS = {"csv": CsvWriter, "jsonl": JsonLinesWriter}
+
+def output_format(args):
+    if args.format:
+        return args.format
+    if args.output and args.output.endswith((".jsonl", ".json")):
+        return "jsonl"
+    return "csv"
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run page-replacement simulations over many traces")
+    parser.add_argument("traces", nargs="+", help="trace files or glob patterns ('**' recurses)")
+    parser.add_argument("--algorithms", nargs="+", choices=list(POLICIES), default=list(POLICIES))
+    parser.add_argument("--frames", nargs="+", default=["3"],
+                        help="frame sizes or ranges, e.g. 4 8 16..1024:16")
+    parser.add_argument("--workers", type=int, help="worker processes (default: one per CPU)")
+    parser.add_argument("--format", choices=list(WRITERS),
+                        help="output format (default: from the output file name, else csv)")
+    parser.add_argument("-o", "--output", help="output file (default: standard output)")
+    parser.add_argument("--save-results", metavar="DIR",
+                        help="also record every run step by step into a result file in DIR")
+    parser.add_argument("--profile", action="store_true",
+                        help="add time per phase, evictions, comparisons and peak memory to every row")
+    args = parser.parse_args(argv)
+    try:
+        frame_sizes = parse_frames(args.frames)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.workers is not None and args.workers <= 0:
+        parser.error("workers must be a positive integer")
+    if args.save_results:
+        os.makedirs(args.save_results, exist_ok=True)
+
+    def warn(message):
+        print(message, file=sys.stderr)
+
+    started = time.perf_counter()
+    runs = failed = 0
+    stream = open(args.output, "w", newline="") if args.output else sys.stdout
+    try:
+        fields = FIELDS + PROFILE_FIELDS if args.profile else FIELDS
+        writer = WRITERS[output_format(args)](stream, fields)
+        jobs = iter_jobs(args.traces, args.algorithms, frame_sizes, warn, args.save_results,
+                         args.profile)
+        for row in run_batch(jobs, args.workers):
+            writer.write(row)
+            runs += 1
+            if row.get("error"):
+                failed += 1
+                warn(f"{row['trace']}: {row['error']}")
+    except KeyboardInterrupt:
+        warn("Interrupted")
+        return 130
+    finally:
+        if stream is not sys.stdout:
+            stream.close()
+        else:
+            stream.flush()
+    warn(f"{runs:,} runs, {failed:,} failed, in {time.perf_counter() - started:.1f} s")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,265 @@
+import argparse
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from algorithms import LIST_ENGINES, PageReplacement
+from policies import POLICIES
+from simulation import PageReplacement as StepPageReplacement
+from workloads import Workload
+
+# Benchmarks the page-replacement engines over a matrix of trace lengths,
+# frame counts and workload shapes.
+#
+#   python bench.py --output bench.json
+#   python bench.py --baseline bench.json --threshold 10
+#   python bench.py --full --output full.json
+#   python bench.py --startup-only
+#
+# By default traces run from 1e3 to 1e5 references, which takes minutes;
+# --full goes up to 1e7, which takes hours. The traces come from the
+# workload generator (see workloads.py), over --pages distinct pages.
+#
+# A run fails (exit status 1) when any case is more than --threshold percent
+# slower, in references/second, than the same case in the baseline. The
+# start-up time of the GUI entry points is tracked the same way; it is
+# measured first, before the long runs, unless --no-startup is given.
+
+# Workload patterns benchmarked, each over --pages distinct pages
+WORKLOADS = ["uniform", "loop", "zipf"]
+
+def make_trace(workload, length, pages, seed):
+    # Generated before timing, as a list, which every engine accepts
+    return Workload(workload, length, seed, pages=pages).to_numpy().tolist()
+
+# engine name -> function(frame_size, trace, algo) running one simulation
+ENGINES = {
+    "fast": lambda k, trace, algo: PageReplacement(k, trace).run(algo),
+    "list": lambda k, trace, algo: PageReplacement(k, trace, engine="list").run(algo),
+    "steps": lambda k, trace, algo: StepPageReplacement(k, trace).run(algo),
+}
+
+def time_case(run, frame_size, trace, algo, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        run(frame_size, trace, algo)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+def peak_memory(run, frame_size, trace, algo):
+    tracemalloc.start()
+    try:
+        run(frame_size, trace, algo)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def scaling_exponent(points):
+    # Least-squares slope of log(seconds) against log(length)
+    points = [(math.log(n), math.log(t)) for n, t in points if t > 0]
+    if len(points) < 2:
+        return None
+    mean_x = sum(x for x, _ in points) / len(points)
+    mean_y = sum(y for _, y in points) / len(points)
+    spread = sum((x - mean_x) ** 2 for x, _ in points)
+    if spread == 0:
+        return None
+    return sum((x - mean_x) * (y - mean_y) for x, y in points) / spread
+
+# GUI entry points whose start-up time is measured, run from the directory
+# holding them whatever the current directory is
+ENTRY_POINTS = ["os2", "os1"]
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+IMPORT_SCRIPT = ("import time; started = time.perf_counter(); import {}; "
+                 "print(time.perf_counter() - started)")
+
+def failure(done):
+    # Last line of a failed subprocess's error output, to say why it failed
+    lines = (done.stderr or done.stdout).strip().splitlines()
+    return lines[-1] if lines else f"exit status {done.returncode}"
+
+def startup_times(entry, repeat):
+    # Best of repeat fresh interpreters: seconds to import the entry module,
+    # and to its first window (None if every attempt failed, e.g. without a
+    # display). errors holds why the failed attempts failed.
+    imports, windows, errors = [], [], []
+    for _ in range(repeat):
+        done = subprocess.run([sys.executable, "-c", IMPORT_SCRIPT.format(entry)],
+                              capture_output=True, text=True, cwd=HERE)
+        if done.returncode == 0:
+            imports.append(float(done.stdout))
+        else:
+            errors.append(f"import: {failure(done)}")
+        done = subprocess.run([sys.executable, os.path.join(HERE, f"{entry}.py"),
+                               "--startup-time", "--exit"],
+                              capture_output=True, text=True, cwd=HERE)
+        if done.returncode == 0 and done.stdout.startswith("First window after"):
+            windows.append(float(done.stdout.split()[3]) / 1000)
+        else:
+            errors.append(f"first window: {failure(done)}")
+    return {"entry": entry, "import_seconds": min(imports, default=None),
+            "window_seconds": min(windows, default=None),
+            "errors": sorted(set(errors))}
+
+def format_ms(seconds):
+    return f"{seconds * 1000:8.1f} ms" if seconds is not None else f"{'n/a':>11}"
+
+def run_startup(args, log=print):
+    results = []
+    for entry in ENTRY_POINTS:
+        case = startup_times(entry, args.repeat)
+        results.append(case)
+        log(f"startup {entry:6} import {format_ms(case['import_seconds'])}  "
+            f"first window {format_ms(case['window_seconds'])}")
+        for error in case["errors"]:
+            log(f"startup {entry:6} failed: {error}")
+    return results
+
+def startup_regressions(results, baseline, threshold):
+    # Start-up times more than threshold percent longer than the baseline
+    previous = {case["entry"]: case for case in baseline.get("startup", [])}
+    slower = []
+    for case in results:
+        before = previous.get(case["entry"], {})
+        for key in ("import_seconds", "window_seconds"):
+            if not before.get(key) or not case[key]:
+                continue
+            change = (case[key] / before[key] - 1) * 100
+            if change > threshold:
+                slower.append((case, key, change))
+    return slower
+
+def case_key(case):
+    return (case["engine"], case["algo"], case["workload"], case["length"], case["frames"])
+
+def run_benchmarks(args, log=print):
+    results = []
+    for workload in args.workloads:
+        for length in args.lengths:
+            trace = make_trace(workload, length, args.pages, args.seed)
+            for engine in args.engines:
+                if engine == "list" and length > args.list_max:
+                    continue
+                for algo in args.algorithms:
+                    if engine == "list" and algo not in LIST_ENGINES:
+                        continue
+                    for frames in args.frames:
+                        run = ENGINES[engine]
+                        repeat = args.repeat if length <= 100_000 else 1
+                        seconds = time_case(run, frames, trace, algo, repeat)
+                        peak = None
+                        if length <= args.memory_max:
+                            peak = peak_memory(run, frames, trace, algo)
+                        case = {"engine": engine, "algo": algo, "workload": workload,
+                                "length": length, "frames": frames, "seconds": seconds,
+                                "refs_per_sec": length / seconds if seconds else None,
+                                "peak_bytes": peak}
+                        results.append(case)
+                        log(f"{engine:6} {algo:14} {workload:8} n={length:<9} k={frames:<6} "
+                            f"{case['refs_per_sec']:>14,.0f} refs/s"
+                            + (f"  {peak / 1e6:8.1f} MB" if peak is not None else ""))
+    return results
+
+def scaling(results):
+    series = {}
+    for case in results:
+        key = (case["engine"], case["algo"], case["workload"], case["frames"])
+        series.setdefault(key, []).append((case["length"], case["seconds"]))
+    return [{"engine": engine, "algo": algo, "workload": workload, "frames": frames,
+             "exponent": scaling_exponent(points)}
+            for (engine, algo, workload, frames), points in series.items()]
+
+def regressions(results, baseline, threshold):
+    # Cases more than threshold percent slower than the baseline
+    previous = {case_key(case): case for case in baseline["results"]}
+    slower = []
+    for case in results:
+        before = previous.get(case_key(case))
+        if not before or not before["refs_per_sec"] or not case["refs_per_sec"]:
+            continue
+        change = (case["refs_per_sec"] / before["refs_per_sec"] - 1) * 100
+        if change < -threshold:
+            slower.append((case, change))
+    return slower
+
+def parse_lengths(values):
+    return [int(float(value)) for value in values]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the page-replacement engines")
+    parser.add_argument("--lengths", nargs="+", default=["1e3", "1e4", "1e5"])
+    parser.add_argument("--frames", nargs="+", type=int, default=[4, 64, 1024])
+    parser.add_argument("--workloads", nargs="+", choices=WORKLOADS, default=WORKLOADS)
+    parser.add_argument("--algorithms", nargs="+", choices=list(POLICIES), default=list(POLICIES))
+    parser.add_argument("--engines", nargs="+", choices=list(ENGINES), default=["fast", "steps"])
+    parser.add_argument("--pages", type=int, default=4096, help="distinct pages per workload")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3, help="runs per case up to 1e5 references")
+    parser.add_argument("--list-max", type=float, default=1e3,
+                        help="longest trace given to the list engine")
+    parser.add_argument("--memory-max", type=float, default=1e6,
+                        help="longest trace measured for peak memory")
+    parser.add_argument("--quick", action="store_true",
+                        help="lengths 1e3-1e5, overriding --lengths")
+    parser.add_argument("--full", action="store_true", help="lengths 1e3-1e7 (takes hours)")
+    parser.add_argument("--startup-only", action="store_true",
+                        help="only measure the start-up time of the GUI entry points")
+    parser.add_argument("--no-startup", action="store_true",
+                        help="skip measuring the start-up time of the GUI entry points")
+    parser.add_argument("--output", help="write results as JSON")
+    parser.add_argument("--baseline", help="JSON results to compare against")
+    parser.add_argument("--threshold", type=float, default=10.0,
+                        help="allowed slowdown against the baseline, in percent")
+    args = parser.parse_args(argv)
+    if args.startup_only and args.no_startup:
+        parser.error("--startup-only and --no-startup exclude each other")
+    if args.quick and args.full:
+        parser.error("--quick and --full exclude each other")
+    if args.quick:
+        args.lengths = ["1e3", "1e4", "1e5"]
+    elif args.full:
+        args.lengths = ["1e3", "1e4", "1e5", "1e6", "1e7"]
+    args.lengths = parse_lengths(args.lengths)
+
+    # Start-up first, so that it is not measured on a machine warmed up (or
+    # worn down) by the long runs
+    startup = [] if args.no_startup else run_startup(args)
+    results = [] if args.startup_only else run_benchmarks(args)
+    report = {
+        "meta": {"date": datetime.now().isoformat(timespec="seconds"),
+                 "python": platform.python_version(), "platform": platform.platform()},
+        "results": results,
+        "scaling": scaling(results),
+        "startup": startup,
+    }
+    for entry in report["scaling"]:
+        if entry["exponent"] is not None:
+            print(f"scaling {entry['engine']:6} {entry['algo']:14} {entry['workload']:8} "
+                  f"k={entry['frames']:<6} n^{entry['exponent']:.2f}")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        slower = regressions(results, baseline, args.threshold)
+        for case, change in slower:
+            print(f"REGRESSION {case['engine']} {case['algo']} {case['workload']} "
+                  f"n={case['length']} k={case['frames']}: {change:+.1f}%")
+        slower_startup = startup_regressions(report["startup"], baseline, args.threshold)
+        for case, key, change in slower_startup:
+            print(f"REGRESSION startup {case['entry']} {key}: {change:+.1f}%")
+        if slower or slower_startup:
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,199 @@
+import multiprocessing
+import os
+import signal
+import tempfile
+from contextlib import suppress
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from algorithms import PageReplacement
+from policies import POLICIES
+from simulation import RESULT_CACHE, simulate, trace_digest
+from traces import open_trace, write_binary_trace
+
+# Below this many references in total, a process pool costs more to start
+# than it saves, so jobs run in the calling process.
+PARALLEL_THRESHOLD = 200_000
+
+# Seconds between progress reports (and so cancellation checks) while
+# waiting on the pool
+POLL_SECONDS = 0.1
+
+# Trace paths a pool worker was started with; jobs name them by index
+_worker_paths = []
+# Shared array of the references each job has done, if progress is wanted
+_worker_positions = None
+
+def _init_worker(paths, positions, pids):
+    global _worker_paths, _worker_positions
+    _worker_paths = paths
+    _worker_positions = positions
+    _record_pid(pids)
+
+def _record_pid(pids):
+    # Pool initializer: puts the worker's PID in the first free slot of a
+    # shared array (one slot per worker), for _terminate()
+    with pids.get_lock():
+        for slot, pid in enumerate(pids):
+            if not pid:
+                pids[slot] = os.getpid()
+                break
+
+def _worker_job(job, index, algo, frame_size, detail):
+    report = None
+    if _worker_positions is not None:
+        def report(position):
+            _worker_positions[job] = position
+    # Opening is cheap (binary traces are memory-mapped), so each job opens
+    # its trace and closes it when done
+    with open_trace(_worker_paths[index]) as trace:
+        return run_job(trace, algo, frame_size, detail, report)
+
+def _terminate(pool, pids):
+    # Cancels the queued jobs and stops the workers mid-job rather than
+    # leaving them to finish work nobody will collect
+    pool.shutdown(wait=False, cancel_futures=True)
+    for pid in pids:
+        if pid:
+            with suppress(OSError):
+                os.kill(pid, signal.SIGTERM)
+
+def run_job(trace, algo, frame_size, detail=False, progress=None):
+    # detail=True returns a full SimulationResult, otherwise the fault count
+    # and the chunk timelines of the fast engines.
+    if detail:
+        return simulate(trace, frame_size, algo, cache=None, progress=progress)
+    sim = PageReplacement(frame_size, trace, progress=progress)
+    faults = sim.run(algo)
+    return faults, sim.timeline, sim.adaptation_timeline
+
+def _is_path(trace):
+    return isinstance(trace, (str, os.PathLike))
+
+def _share_traces(traces, directory):
+    # Workers receive file paths once at start-up and memory-map the traces,
+    # so no trace is pickled per task. In-memory traces are written once as
+    # binary trace files.
+    paths = []
+    for i, trace in enumerate(traces):
+        if _is_path(trace):
+            paths.append(os.fspath(trace))
+        elif hasattr(trace, "path"):
+            paths.append(trace.path)
+        else:
+            path = os.path.join(directory, f"trace{i}.bin")
+            write_binary_trace(path, trace)
+            paths.append(path)
+    return paths
+
+def _trace_length(trace):
+    if _is_path(trace) or not hasattr(trace, "__len__"):
+        return None
+    return len(trace)
+
+def _work_size(traces):
+    total = 0
+    for trace in traces:
+        length = _trace_length(trace)
+        if length is None:
+            return PARALLEL_THRESHOLD
+        total += length
+    return total
+
+def _pool_context():
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else None)
+
+def compare(traces, algorithms=tuple(POLICIES), frame_sizes=(3,), workers=None, detail=False,
+            progress=None):
+    # Runs every (trace, frame size, algorithm) combination, in parallel when
+    # the work is large enough, and returns one row per job. Traces may be
+    # lists, trace objects or file paths. progress, if given, is called with
+    # (references done, total references or None) across all jobs.
+    for algo in algorithms:
+        if algo not in POLICIES:
+            raise ValueError(f"Unknown algorithm: {algo}")
+    jobs = [(i, algo, frame_size) for i in range(len(traces))
+            for frame_size in frame_sizes for algo in algorithms]
+    lengths = [_trace_length(trace) for trace in traces]
+    total = None if None in lengths else sum(lengths[i] for i, _, _ in jobs)
+    workers = min(workers or os.cpu_count() or 1, len(jobs))
+    if workers <= 1 or _work_size(traces) < PARALLEL_THRESHOLD:
+        opened = []
+        try:
+            for trace in traces:
+                opened.append(open_trace(trace) if _is_path(trace) else trace)
+            outcomes = []
+            done = 0
+            for i, algo, frame_size in jobs:
+                report = None
+                if progress:
+                    report = lambda position, base=done: progress(base + position, total)
+                outcomes.append(run_job(opened[i], algo, frame_size, detail, report))
+                done += lengths[i] or 0
+        finally:
+            # Only the traces opened here from paths are closed
+            for trace, given in zip(opened, traces):
+                if trace is not given:
+                    trace.close()
+    else:
+        with tempfile.TemporaryDirectory() as directory:
+            paths = _share_traces(traces, directory)
+            # Workers report every chunk into a shared array, which is summed
+            # for progress on every poll, so long jobs show progress and can
+            # be cancelled before they finish
+            context = _pool_context()
+            positions = context.Array('q', len(jobs), lock=False) if progress else None
+            pids = context.Array('q', workers)
+            pool = ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                                       initializer=_init_worker,
+                                       initargs=(paths, positions, pids))
+            try:
+                futures = [pool.submit(_worker_job, job, i, algo, frame_size, detail)
+                           for job, (i, algo, frame_size) in enumerate(jobs)]
+                pending = set(futures)
+                while pending:
+                    finished, pending = wait(pending, timeout=POLL_SECONDS,
+                                             return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        future.result()
+                    if progress:
+                        progress(sum(positions), total)
+                outcomes = [future.result() for future in futures]
+            except BaseException:
+                # Cancelled or failed
+                _terminate(pool, pids)
+                raise
+            pool.shutdown()
+
+    rows = []
+    for (i, algo, frame_size), outcome in zip(jobs, outcomes):
+        row = {"trace": i, "algo": algo, "frame_size": frame_size}
+        if detail:
+            row["faults"] = outcome.faults
+            row["result"] = outcome
+        else:
+            row["faults"], row["timeline"], row["adaptation"] = outcome
+        rows.append(row)
+    return rows
+
+def simulate_all(ref_string, frame_size, algorithms=tuple(POLICIES), cache=RESULT_CACHE, workers=None,
+                 progress=None):
+    # simulate() for several algorithms at once: cached results are reused
+    # and the rest are fanned out to the process pool.
+    key = trace_digest(ref_string)
+    results = {algo: cache.get((key, frame_size, algo)) for algo in algorithms}
+    missing = [algo for algo, result in results.items() if result is None]
+    if missing:
+        for row in compare([ref_string], missing, [frame_size], workers, detail=True,
+                           progress=progress):
+            results[row["algo"]] = row["result"]
+            cache.put((key, frame_size, row["algo"]), row["result"])
+    return results
+
+def format_table(rows, names=None):
+    # Plain-text table of compare() rows; names maps trace index -> label
+    header = ("Trace", "Frames", "Algorithm", "Faults")
+    lines = [(str(names[row["trace"]]) if names else str(row["trace"]),
+              str(row["frame_size"]), row["algo"], str(row["faults"])) for row in rows]
+    widths = [max(len(cell) for cell in column) for column in zip(header, *lines)]
+    return "\n".join("  ".join(cell.ljust(width) for cell, width in zip(line, widths))
+                     for line in [header, *lines])
@@ -0,0 +1,2 @@
+# Lets pytest put the repository root on sys.path, so tests import the flat
+# top-level modules directly
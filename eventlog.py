@@ -0,0 +1,165 @@
+from array import array
+
+# Kinds of step recorded in an EventLog
+HIT, FILL, EVICT = 0, 1, 2
+
+def default_interval(frame_size):
+    # Steps between frame checkpoints
+    return max(1024, 8 * frame_size)
+
+class EventLog:
+    # Array-backed record of a simulation: per step the page, whether it hit,
+    # filled a free frame or evicted a page, the evicted page and the frame
+    # slot involved. Step text and frame contents are rebuilt on demand from
+    # periodic checkpoints, so memory is a few bytes per step instead of a
+    # string and a frame list per step.
+    def __init__(self, frame_size, checkpoint_interval=None):
+        self.frame_size = frame_size
+        self.pages = array('q')
+        self.kinds = array('b')
+        self.evicted = array('q')
+        self.slots = array('l')
+        self.interval = checkpoint_interval or default_interval(frame_size)
+        self._checkpoints = []
+        self._frames = [None] * frame_size
+
+    @classmethod
+    def from_columns(cls, frame_size, interval, pages, kinds, evicted, slots, checkpoints):
+        # Rebuilds a log from its columns and checkpoints, e.g. as read back
+        # from a result file (see results.py). Any sequences will do; the
+        # log only ever indexes and slices them.
+        log = cls(frame_size, interval)
+        log.pages, log.kinds, log.evicted, log.slots = pages, kinds, evicted, slots
+        log._checkpoints = checkpoints
+        if len(log):
+            log._frames = list(log.frames_at(len(log) - 1))
+        return log
+
+    def __len__(self):
+        return len(self.pages)
+
+    def checkpoints(self):
+        # Frame slots before every interval-th step
+        return self._checkpoints
+
+    def append(self, page, kind, slot, evicted=0):
+        if len(self.pages) % self.interval == 0:
+            self._checkpoints.append(tuple(self._frames))
+        try:
+            self.pages.append(page)
+        except OverflowError:
+            self._widen()
+            self.pages.append(page)
+        self.kinds.append(kind)
+        self.evicted.append(evicted)
+        self.slots.append(slot)
+        if kind != HIT:
+            self._frames[slot] = page
+
+    def _widen(self):
+        # Page IDs from 2**63 up (uint64 traces) switch the page columns to
+        # unsigned
+        try:
+            if self.pages.typecode == 'Q':
+                raise OverflowError  # a negative page after wide ones
+            self.pages = array('Q', self.pages)
+            self.evicted = array('Q', self.evicted)
+        except OverflowError:
+            raise ValueError("Page numbers must all fit one 64-bit type, signed or "
+                             "unsigned") from None
+
+    def truncate(self, length):
+        # Drops every step from length on, e.g. to rewind to a snapshot
+        if length >= len(self):
+            return
+        frames = list(self.frames_at(length - 1)) if length else [None] * self.frame_size
+        for column in (self.pages, self.kinds, self.evicted, self.slots):
+            del column[length:]
+        del self._checkpoints[-(-length // self.interval):]
+        self._frames = frames
+
+    def share(self):
+        # Another log over the same columns, which stays as it is as long as
+        # neither log is appended to or truncated (see Stepper.result())
+        other = EventLog(self.frame_size, self.interval)
+        other.pages, other.kinds, other.evicted, other.slots = (
+            self.pages, self.kinds, self.evicted, self.slots)
+        other._checkpoints = list(self._checkpoints)
+        other._frames = list(self._frames)
+        return other
+
+    def copy(self):
+        other = EventLog(self.frame_size, self.interval)
+        other.pages = self.pages[:]
+        other.kinds = self.kinds[:]
+        other.evicted = self.evicted[:]
+        other.slots = self.slots[:]
+        other._checkpoints = list(self._checkpoints)
+        other._frames = list(self._frames)
+        return other
+
+    def iter_frames(self, start=0, stop=None):
+        # Yields the frame slots (None for empty) after each step in [start, stop)
+        stop = len(self) if stop is None else min(stop, len(self))
+        if start >= stop:
+            return
+        base = (start // self.interval) * self.interval
+        frames = list(self._checkpoints[base // self.interval])
+        # Sliced up front, so that stored columns are only read for the window
+        pages, kinds, slots = (column[base:stop] for column in (self.pages, self.kinds, self.slots))
+        for i in range(stop - base):
+            if kinds[i] != HIT:
+                frames[slots[i]] = pages[i]
+            if i >= start - base:
+                yield frames
+
+    def frames_at(self, step):
+        return next(self.iter_frames(step, step + 1))
+
+    def frame_states(self, start=0, stop=None):
+        for frames in self.iter_frames(start, stop):
+            yield [page for page in frames if page is not None]
+
+    def next_fault(self, page, start=0):
+        # Index of the first fault on page at or after start, or None
+        while True:
+            try:
+                step = self.pages.index(page, start)
+            except ValueError:
+                return None
+            if self.kinds[step] != HIT:
+                return step
+            start = step + 1
+
+    def step_text(self, step, frames):
+        result = "Hit" if self.kinds[step] == HIT else "Fault"
+        return f"Step {step+1}: Page {self.pages[step]} -> {result}, Frames: {frames}"
+
+    def steps(self, start=0, stop=None):
+        for step, frames in enumerate(self.frame_states(start, stop), start):
+            yield self.step_text(step, frames)
+
+class LogView:
+    # Read-only sequence over an EventLog, e.g. the step strings or the frame
+    # states, rendering only the items that are actually accessed.
+    def __init__(self, log, render):
+        self.log = log
+        self.render = render
+
+    def __len__(self):
+        return len(self.log)
+
+    def __iter__(self):
+        return self.render(0, None)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, stride = index.indices(len(self))
+            if stride == 1:
+                return list(self.render(start, stop))
+            return [self[i] for i in range(start, stop, stride)]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("step index out of range")
+        return next(self.render(index, index + 1))
@@ -0,0 +1,83 @@
+import argparse
+import sys
+import time
+from policies import POLICIES
+from simulation import Stepper
+
+# Follows a live stream of page references (whitespace-separated integers,
+# e.g. lines arriving on a pipe) through a Stepper and reports the fault
+# rate as it goes:
+#
+#   tail -f refs.log | python livefeed.py LRU 64
+#   python livefeed.py ARC 1024 --interval 0.5 < refs.fifo
+
+# Bytes taken from the stream per read
+READ_SIZE = 1 << 16
+
+def read_pages(stream, read_size=READ_SIZE):
+    # Yields lists of pages from a binary stream as soon as bytes arrive,
+    # without waiting for a full buffer. A number split across two reads is
+    # carried over to the next one.
+    read = getattr(stream, "read1", stream.read)
+    tail = b""
+    while True:
+        block = read(read_size)
+        if not block:
+            break
+        block = tail + block
+        tokens = block.split()
+        tail = b"" if block[-1:].isspace() or not tokens else tokens.pop()
+        if tokens:
+            yield list(map(int, tokens))
+    if tail:
+        yield [int(tail)]
+
+def follow(stepper, stream, on_report=None, interval=1.0, read_size=READ_SIZE):
+    # Feeds stream into stepper until it ends. on_report(stepper, refs,
+    # faults, seconds) gets the references and faults of the window since
+    # the previous report, at most every interval seconds and once at the end.
+    started = time.monotonic()
+    position, faults = stepper.position, stepper.faults
+    for pages in read_pages(stream, read_size):
+        stepper.feed(pages)
+        now = time.monotonic()
+        if on_report and now - started >= interval:
+            on_report(stepper, stepper.position - position, stepper.faults - faults, now - started)
+            started, position, faults = now, stepper.position, stepper.faults
+    if on_report and stepper.position > position:
+        on_report(stepper, stepper.position - position, stepper.faults - faults,
+                  time.monotonic() - started)
+    return stepper
+
+def print_report(stepper, refs, faults, seconds):
+    print(f"{stepper.position:>14,} refs  {stepper.faults:>12,} faults  "
+          f"window {faults / refs:7.2%}  overall {stepper.fault_rate():7.2%}  "
+          f"{refs / max(seconds, 1e-9):>12,.0f} refs/s", flush=True)
+
+def main(argv=None):
+    online = [name for name, policy in POLICIES.items() if not policy.lookahead]
+    parser = argparse.ArgumentParser(description="Simulate a live page-reference feed")
+    parser.add_argument("algorithm", choices=online)
+    parser.add_argument("frames", type=int)
+    parser.add_argument("input", nargs="?", help="file or named pipe (default: standard input)")
+    parser.add_argument("--interval", type=float, default=1.0, help="seconds between reports")
+    args = parser.parse_args(argv)
+    if args.frames <= 0:
+        parser.error("frames must be a positive integer")
+
+    stepper = Stepper(args.algorithm, args.frames)
+    try:
+        if args.input:
+            with open(args.input, "rb") as stream:
+                follow(stepper, stream, print_report, args.interval)
+        else:
+            follow(stepper, sys.stdin.buffer, print_report, args.interval)
+    except KeyboardInterrupt:
+        pass
+    except ValueError as e:
+        print(f"Invalid reference after position {stepper.position:,}: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
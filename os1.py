@@ -48,7 +48,7 @@
 #         plot_window = tk.Toplevel(root, bg=BG_COLOR)
 #         plot_window.title("Algorithm Comparison")
 
-#         figure = plt.Figure(figsize=(6, 4), dpi=100, facecolor=BG_COLOR)
+#         figure = Figure(figsize=(6, 4), dpi=100, facecolor=BG_COLOR)
 #         subplot = figure.add_subplot(111, facecolor=BG_COLOR)
 #         bars = subplot.bar(results.keys(), results.values(), color=[PRIMARY_COLOR, SECONDARY_COLOR, ACCENT_COLOR])
 #         subplot.set_xlabel("Algorithm", color=TEXT_COLOR)
@@ -127,13 +127,20 @@
 # if __name__ == "__main__":
 #     pass
 
+import time
+STARTED = time.perf_counter()  # Measured from here to the first window (see main)
+import argparse
 import tkinter as tk
 from tkinter import messagebox
 from tkinter import ttk
 from algorithms import PageReplacement  # Assuming this is a separate module
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 import tkinter.font as tkfont
+from policies import POLICIES
+from worker import prewarm, time_to_window
+
+# Loaded on first use, and in the background once the window is shown
+PREWARM_MODULES = ["numpy", "refstring", "matplotlib.figure",
+                   "matplotlib.backends.backend_tkagg"]
 
 # --- Professional Color Palette ---
 BG_COLOR = "#E0E8F0"  
@@ -194,6 +201,8 @@ class PageReplacementSimulator:
                            font=('Arial', 11), padding=8)
         self.style.configure('Success.TLabel', foreground=ACCENT_COLOR, 
                            font=('Arial', 11, 'bold'))
+        self.style.configure('Error.TLabel', foreground=ERROR_COLOR, 
+                           font=('Arial', 11, 'bold'))
         self.style.configure('Title.TLabel', font=('Arial', 14, 'bold'))
 
     def create_widgets(self):
@@ -225,8 +234,7 @@ class PageReplacementSimulator:
         ttk.Label(input_frame, text="Algorithm:").grid(row=2, column=0, 
                                                       sticky="w", pady=5)
         self.algo_var = tk.StringVar(value="FIFO")
-        algo_menu = ttk.OptionMenu(input_frame, self.algo_var, "FIFO", "FIFO", 
-                                 "LRU", "Optimal")
+        algo_menu = ttk.OptionMenu(input_frame, self.algo_var, "FIFO", *POLICIES)
         algo_menu.grid(row=2, column=1, pady=5, sticky="w")
 
         # Buttons Frame
@@ -252,15 +260,25 @@ class PageReplacementSimulator:
         self.result_label.pack(anchor="center")
 
     def validate_inputs(self):
+        # Accepts the compact grammar of refstring.py (1..500*20, (3 4 5)*1000)
+        from refstring import ParseError, parse_reference_string
+        try:
+            ref_string = parse_reference_string(self.entry_ref.get())
+            if not len(ref_string):
+                raise ParseError("Enter at least one page number", 0)
+        except ParseError as e:
+            self.result_label.config(text=f"Reference String: {e}", style='Error.TLabel')
+            self.entry_ref.focus_set()
+            self.entry_ref.icursor(e.position)
+            self.entry_ref.selection_range(e.position, e.position + 1)
+            return None, None
         try:
-            ref_string = [int(x) for x in self.entry_ref.get().split()]
             frame_size = int(self.entry_frames.get())
-            if not ref_string or frame_size <= 0:
+            if frame_size <= 0:
                 raise ValueError("Invalid input values")
             return ref_string, frame_size
         except ValueError as e:
-            messagebox.showerror("Error", 
-                               "Please enter valid space-separated integers for Reference String\nand a positive integer for Frame Size",
+            messagebox.showerror("Error", "Please enter a positive integer for Frame Size",
                                parent=self.root)
             return None, None
 
@@ -273,7 +291,7 @@ class PageReplacementSimulator:
         sim = PageReplacement(frame_size, ref_string)
         
         try:
-            result = {"FIFO": sim.fifo, "LRU": sim.lru, "Optimal": sim.optimal}[algo]()
+            result = sim.run(algo)
             self.result_label.config(text=f"Page Faults using {algo}: {result}", 
                                    style='Success.TLabel')
         except Exception as e:
@@ -281,25 +299,24 @@ class PageReplacementSimulator:
                                parent=self.root)
 
     def show_comparison(self):
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
         ref_string, frame_size = self.validate_inputs()
         if ref_string is None:
             return
 
         sim = PageReplacement(frame_size, ref_string)
-        results = {
-            "FIFO": sim.fifo(),
-            "LRU": sim.lru(),
-            "Optimal": sim.optimal()
-        }
+        results = {algo: sim.run(algo) for algo in POLICIES}
 
         plot_window = tk.Toplevel(self.root, bg=BG_COLOR)
         plot_window.title("Algorithm Comparison")
         plot_window.geometry("600x450")
 
-        figure = plt.Figure(figsize=(6, 4), dpi=100, facecolor=BG_COLOR)
+        figure = Figure(figsize=(6, 4), dpi=100, facecolor=BG_COLOR)
         subplot = figure.add_subplot(111, facecolor=BG_COLOR)
         bars = subplot.bar(results.keys(), results.values(), 
                          color=[PRIMARY_COLOR, SECONDARY_COLOR, ACCENT_COLOR])
+        subplot.tick_params(axis='x', labelrotation=30)
         
         # Add value labels on top of bars
         for bar in bars:
@@ -325,9 +342,23 @@ class PageReplacementSimulator:
         self.algo_var.set("FIFO")
         self.result_label.config(text="Page Faults: -", style='TLabel')
 
-def main():
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Page replacement simulator")
+    parser.add_argument("--startup-time", action="store_true",
+                        help="print the time from start-up to the first window")
+    parser.add_argument("--exit", action="store_true",
+                        help="close as soon as the window is shown")
+    args = parser.parse_args(argv)
+
     root = tk.Tk()
     app = PageReplacementSimulator(root)
+    seconds = time_to_window(root, STARTED)
+    if args.startup_time:
+        print(f"First window after {seconds * 1000:.0f} ms", flush=True)
+    if args.exit:
+        root.destroy()
+        return
+    prewarm(PREWARM_MODULES)
     root.mainloop()
 
 if __name__ == "__main__":
@@ -1,10 +1,26 @@
+import time
+STARTED = time.perf_counter()  # Measured from here to the first window (see main)
+import argparse
+import functools
+import operator
+import os
 import tkinter as tk
-from tkinter import messagebox, ttk, filedialog
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-import json
-from datetime import datetime
-import numpy as np
+from tkinter import messagebox, simpledialog, ttk, filedialog
+import tkinter.font as tkfont
+from contextlib import nullcontext, suppress
+import algorithms
+from policies import POLICIES
+from profiling import Profile
+from simulation import RESULT_CACHE, SimulationResult, Stepper, TraceDigest, feed_profiled
+from stack_distance import CURVE_PASSES, CURVES
+from traces import iter_chunks, open_trace
+from worker import BackgroundTask, prewarm, time_to_window
+
+# NumPy, matplotlib and the modules built on them take most of the start-up
+# time, so they are imported where they are first needed and warmed up in
+# the background once the window is shown
+PREWARM_MODULES = ["numpy", "refstring", "matplotlib.figure",
+                   "matplotlib.backends.backend_tkagg", "plotting", "workloads", "compare"]
 
 # --- Professional Color Palette (Dark Monochromatic) ---
 BG_COLOR = "#2C3E50"         # Dark blue-gray for background
@@ -17,7 +33,24 @@ DROPDOWN_BG = "#3A536B"      # Slightly lighter dark blue-gray
 DROPDOWN_TEXT = "#ECEFF1"
 DROPDOWN_HOVER = "#2ECC71"   # Emerald green for dropdown hover
 BORDER_COLOR = "#34495E"     # Darker blue-gray for borders
-CHART_COLORS = ["#3498DB", "#E67E22", "#1ABC9C"]  # Blue, Orange, Teal for charts
+CHART_COLORS = ["#3498DB", "#E67E22", "#1ABC9C", "#9B59B6", "#E74C3C",  # One per algorithm,
+                "#F1C40F", "#34495E", "#16A085", "#D35400", "#7F8C8D"]  # cycled if needed
+
+REF_PREVIEW = 200  # References spelled out in the details header
+INSERT_LIMIT = 200_000  # Longest generated trace put into the entry field
+JSON_EXPORT_LIMIT = 100_000  # Steps above which a JSON export asks first
+CURVE_FRAME_LIMIT = 1024  # Default largest frame size on a miss ratio curve
+
+def timed_view(name):
+    # Charges the time a view of the last run takes to build and draw to
+    # that run's profile, if it was profiled
+    def decorate(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            with self.timing(name):
+                return method(self, *args, **kwargs)
+        return wrapper
+    return decorate
 
 class ToolTip:
     def __init__(self, widget, text):
@@ -43,129 +76,151 @@ class ToolTip:
             self.tooltip.destroy()
             self.tooltip = None
 
-class PageReplacement:
-    def __init__(self, frame_size, ref_string):
-        self.frame_size = frame_size
-        self.ref_string = ref_string
-        self.steps = []
-        self.faults_over_time = []
-        self.hits = 0
-        self.misses = 0
-        self.frame_states = []
-
-    def fifo(self):
-        frames = []
-        faults = 0
-        self.steps = []
-        self.faults_over_time = []
-        self.hits = 0
-        self.misses = 0
-        self.frame_states = []
-
-        for i, page in enumerate(self.ref_string):
-            if page not in frames:
-                faults += 1
-                self.misses += 1
-                if len(frames) >= self.frame_size:
-                    frames.pop(0)
-                frames.append(page)
-                self.steps.append(f"Step {i+1}: Page {page} -> Fault, Frames: {frames}")
-            else:
-                self.hits += 1
-                self.steps.append(f"Step {i+1}: Page {page} -> Hit, Frames: {frames}")
-            self.faults_over_time.append(faults)
-            self.frame_states.append(frames.copy())
-        return faults
-
-    def lru(self):
-        frames = []
-        faults = 0
-        self.steps = []
-        self.faults_over_time = []
-        self.hits = 0
-        self.misses = 0
-        self.frame_states = []
-
-        for i, page in enumerate(self.ref_string):
-            if page not in frames:
-                faults += 1
-                self.misses += 1
-                if len(frames) >= self.frame_size:
-                    frames.pop(0)
-                frames.append(page)
-                self.steps.append(f"Step {i+1}: Page {page} -> Fault, Frames: {frames}")
-            else:
-                self.hits += 1
-                frames.remove(page)
-                frames.append(page)
-                self.steps.append(f"Step {i+1}: Page {page} -> Hit, Frames: {frames}")
-            self.faults_over_time.append(faults)
-            self.frame_states.append(frames.copy())
-        return faults
-
-    def optimal(self):
-        frames = []
-        faults = 0
-        self.steps = []
-        self.faults_over_time = []
-        self.hits = 0
-        self.misses = 0
-        self.frame_states = []
-
-        for i, page in enumerate(self.ref_string):
-            if page not in frames:
-                faults += 1
-                self.misses += 1
-                if len(frames) >= self.frame_size:
-                    future = self.ref_string[i+1:]
-                    farthest = -1
-                    page_to_remove = frames[0]
-                    for frame in frames:
-                        try:
-                            dist = future.index(frame)
-                            if dist > farthest:
-                                farthest = dist
-                                page_to_remove = frame
-                        except ValueError:
-                            page_to_remove = frame
-                            break
-                    frames.remove(page_to_remove)
-                frames.append(page)
-                self.steps.append(f"Step {i+1}: Page {page} -> Fault, Frames: {frames}")
-            else:
-                self.hits += 1
-                self.steps.append(f"Step {i+1}: Page {page} -> Hit, Frames: {frames}")
-            self.faults_over_time.append(faults)
-            self.frame_states.append(frames.copy())
-        return faults
-
-    def get_fifo_steps(self):
-        self.fifo()
-        return self.steps
-
-    def get_lru_steps(self):
-        self.lru()
-        return self.steps
-
-    def get_optimal_steps(self):
-        self.optimal()
-        return self.steps
-
-    def get_faults_over_time(self, algo):
-        if algo == "FIFO":
-            self.fifo()
-        elif algo == "LRU":
-            self.lru()
-        elif algo == "Optimal":
-            self.optimal()
-        return self.faults_over_time
-
-    def get_hit_miss_ratio(self):
-        total = self.hits + self.misses
-        return (self.hits / total * 100, self.misses / total * 100) if total > 0 else (0, 0)
-
-    def get_frame_states(self):
-        return self.frame_states
+class ProgressDialog:
+    def __init__(self, parent, title, total, on_cancel):
+        self.total = total
+        self.started = time.perf_counter()
+        self.window = tk.Toplevel(parent, bg=BG_COLOR)
+        self.window.title(title)
+        self.window.geometry("440x170")
+        self.window.transient(parent)
+        self.window.protocol("WM_DELETE_WINDOW", on_cancel)
+
+        ttk.Label(self.window, text=title).pack(pady=(15, 5))
+        self.bar = ttk.Progressbar(self.window, length=380, maximum=total or 100,
+                                   mode="determinate" if total else "indeterminate")
+        self.bar.pack(padx=20, pady=5)
+        if not total:
+            self.bar.start(15)
+        self.status = ttk.Label(self.window, text="Starting...")
+        self.status.pack(pady=5)
+        self.cancel_button = ttk.Button(self.window, text="Cancel", command=on_cancel)
+        self.cancel_button.pack(pady=5)
+
+    def update(self, done, total=None):
+        if total and not self.total:
+            self.total = total
+            self.bar.stop()
+            self.bar.config(mode="determinate", maximum=total)
+        rate = done / max(time.perf_counter() - self.started, 1e-9)
+        if self.total:
+            self.bar["value"] = done
+            self.status.config(text=f"{done:,} / {self.total:,} references ({rate:,.0f} refs/s)")
+        else:
+            self.status.config(text=f"{done:,} references ({rate:,.0f} refs/s)")
+
+    def cancelling(self):
+        self.status.config(text="Cancelling...")
+        self.cancel_button.config(state="disabled")
+
+    def close(self):
+        self.window.destroy()
+
+class StepListView:
+    # Virtual list of simulation steps: the Text widget only ever holds the
+    # rows that fit on screen, formatted from the event log on demand, so
+    # opening and scrolling cost the same for any trace length. Formatting
+    # time goes to profile, if given.
+    def __init__(self, parent, log, header, profile=None):
+        self.log = log
+        self.header = header
+        self.profile = profile
+        self.top = 0
+        self.marked = None
+
+        self.frame = ttk.Frame(parent)
+        self.text = tk.Text(self.frame, height=15, width=60, bg="#FFFFFF",
+                            fg=PRIMARY_COLOR, font=("Helvetica", 10), borderwidth=1,
+                            relief="flat", wrap="none")
+        self.text.tag_configure("marked", background="#FFF3B0")
+        self.text.pack(side="left", fill="both", expand=True)
+        self.scrollbar = ttk.Scrollbar(self.frame, command=self.on_scroll)
+        self.scrollbar.pack(side="right", fill="y")
+        self.line_height = tkfont.Font(font=self.text["font"]).metrics("linespace")
+
+        self.text.bind("<Configure>", lambda e: self.render())
+        self.text.bind("<MouseWheel>", lambda e: self.scroll_by(-3 if e.delta > 0 else 3))
+        self.text.bind("<Button-4>", lambda e: self.scroll_by(-3))
+        self.text.bind("<Button-5>", lambda e: self.scroll_by(3))
+        for key, rows in (("<Up>", -1), ("<Down>", 1)):
+            self.text.bind(key, lambda e, rows=rows: self.scroll_by(rows))
+        self.text.bind("<Prior>", lambda e: self.scroll_by(-self.page_rows()))
+        self.text.bind("<Next>", lambda e: self.scroll_by(self.page_rows()))
+
+    def total_rows(self):
+        return len(self.header) + len(self.log)
+
+    def page_rows(self):
+        return max(self.text.winfo_height() // self.line_height, 1)
+
+    def on_scroll(self, action, amount, unit=None):
+        if action == "moveto":
+            self.scroll_to(int(float(amount) * self.total_rows()))
+        elif unit == "pages":
+            self.scroll_by(int(amount) * self.page_rows())
+        else:
+            self.scroll_by(int(amount))
+        return "break"
+
+    def scroll_by(self, rows):
+        self.scroll_to(self.top + rows)
+        return "break"
+
+    def scroll_to(self, row):
+        self.top = max(0, min(row, self.total_rows() - self.page_rows()))
+        self.render()
+
+    def show_step(self, step):
+        # Scrolls so that step (0-based) is near the top and highlights it
+        self.marked = len(self.header) + step
+        self.scroll_to(self.marked - 2)
+
+    def render(self):
+        rows = self.page_rows()
+        stop = min(self.top + rows, self.total_rows())
+        lines = self.header[self.top:stop]
+        first_step = max(self.top - len(self.header), 0)
+        if self.profile:
+            with self.profile.phase("format steps"):
+                lines += list(self.log.steps(first_step, stop - len(self.header)))
+        else:
+            lines += list(self.log.steps(first_step, stop - len(self.header)))
+
+        self.text.config(state="normal")
+        self.text.delete("1.0", tk.END)
+        self.text.insert(tk.END, "\n".join(lines))
+        if self.marked is not None and self.top <= self.marked < stop:
+            line = self.marked - self.top + 1
+            self.text.tag_add("marked", f"{line}.0", f"{line}.end")
+        self.text.config(state="disabled")
+        total = max(self.total_rows(), 1)
+        self.scrollbar.set(self.top / total, stop / total)
+
+def same_prefix(a, b, length):
+    # True if reference strings a and b agree in their first length pages,
+    # compared a chunk at a time so neither is expanded in full
+    if len(a) < length or len(b) < length:
+        return False
+    text = getattr(a, "text", None)
+    if text and text == getattr(b, "text", None):
+        return True  # parsed from the same text
+    if hasattr(a, "arrays") and hasattr(b, "arrays"):
+        # Parsed strings are compared as NumPy arrays, without building lists
+        import numpy as np
+        chunks, equal = zip(a.arrays(), b.arrays()), np.array_equal
+    else:
+        chunks, equal = zip(iter_chunks(a), iter_chunks(b)), operator.eq
+    checked = 0
+    for chunk_a, chunk_b in chunks:
+        if checked >= length:
+            break
+        count = min(len(chunk_a), len(chunk_b), length - checked)
+        if len(chunk_a) != len(chunk_b) and checked + count < length:
+            return False  # chunked differently; give up rather than misalign
+        if not equal(chunk_a[:count], chunk_b[:count]):
+            return False
+        checked += count
+    return checked >= length
 
 class PageReplacementSimulator:
     def __init__(self, root):
@@ -178,6 +233,16 @@ class PageReplacementSimulator:
         self.setup_styles()
         self.create_widgets()
         self.simulation_details = None
+        self.task = None
+        # Stepper of the last run, the references it has consumed and their
+        # digest, which a longer run extends instead of hashing them again
+        self.stepper = None
+        self.stepper_refs = []
+        self.stepper_digest = None
+        # Profile of the last run, if "Profile runs" was ticked for it, and
+        # what it was
+        self.profile = None
+        self.profile_title = None
 
     def setup_styles(self):
         self.style = ttk.Style(self.root)
@@ -207,8 +272,14 @@ class PageReplacementSimulator:
                              borderwidth=1, activebackground=PRIMARY_COLOR,
                              activeforeground="white")
 
+        self.style.configure('TCheckbutton', background=BG_COLOR, foreground=TEXT_COLOR,
+                             font=('Helvetica', 11))
+        self.style.map('TCheckbutton', background=[('active', BG_COLOR)])
+
         self.style.configure('Success.TLabel', foreground=ACCENT_COLOR,
                              font=('Helvetica', 11, 'bold'))
+        self.style.configure('Error.TLabel', foreground=ERROR_COLOR,
+                             font=('Helvetica', 11, 'bold'))
         self.style.configure('Title.TLabel', font=('Helvetica', 14, 'bold'),
                              foreground=TEXT_COLOR)
 
@@ -225,7 +296,12 @@ class PageReplacementSimulator:
                                                                  sticky="w", pady=8)
         self.entry_ref = ttk.Entry(input_frame, width=30)
         self.entry_ref.grid(row=0, column=1, pady=8, sticky="ew")
-        ToolTip(self.entry_ref, "Enter space-separated page numbers (e.g., 1 2 3 4)")
+        ToolTip(self.entry_ref, "Enter space-separated page numbers (e.g., 1 2 3 4);\n"
+                                "1..500*20 repeats a range, (3 4 5)*1000 a group")
+        generate_button = ttk.Button(input_frame, text="Generate…",
+                                     command=self.show_generate_dialog)
+        generate_button.grid(row=0, column=2, padx=(8, 0), pady=8)
+        ToolTip(generate_button, "Generate a synthetic reference string")
 
         ttk.Label(input_frame, text="Frame Size:").grid(row=1, column=0,
                                                                sticky="w", pady=8)
@@ -236,10 +312,17 @@ class PageReplacementSimulator:
         ttk.Label(input_frame, text="Algorithm:").grid(row=2, column=0,
                                                                sticky="w", pady=8)
         self.algo_var = tk.StringVar(value="FIFO")
-        algo_menu = ttk.OptionMenu(input_frame, self.algo_var, "FIFO", "FIFO",
-                                   "LRU", "Optimal", style='TMenubutton')
+        algo_menu = ttk.OptionMenu(input_frame, self.algo_var, "FIFO", *POLICIES,
+                                   style='TMenubutton')
         algo_menu.grid(row=2, column=1, pady=8, sticky="w")
 
+        self.profile_var = tk.BooleanVar(value=False)
+        profile_check = ttk.Checkbutton(input_frame, text="Profile runs",
+                                        variable=self.profile_var)
+        profile_check.grid(row=3, column=1, pady=8, sticky="w")
+        ToolTip(profile_check, "Measure time per phase, evictions, victim-search comparisons\n"
+                               "and peak memory of each run and of its views")
+
         button_frame = ttk.Frame(self.root, padding=15, relief="flat", borderwidth=1)
         button_frame.pack(fill="x", padx=10)
 
@@ -247,10 +330,19 @@ class PageReplacementSimulator:
                                      command=self.run_simulation)
         self.run_button.pack(fill="x", pady=5)
 
+        self.load_button = ttk.Button(button_frame, text="Load Trace File…",
+                                      command=self.load_trace_file)
+        self.load_button.pack(fill="x", pady=5)
+        ToolTip(self.load_button, "Stream a large trace file through the selected algorithm")
+
         self.compare_button = ttk.Button(button_frame, text="Show Comparisons",
                                          command=self.show_comparisons)
         self.compare_button.pack(fill="x", pady=5)
 
+        self.curve_button = ttk.Button(button_frame, text="Miss Ratio Curve",
+                                       command=self.show_miss_ratio_curve)
+        self.curve_button.pack(fill="x", pady=5)
+
         self.details_button = ttk.Button(button_frame, text="Show Details",
                                          command=self.show_details, state="disabled")
         self.details_button.pack(fill="x", pady=5)
@@ -267,6 +359,15 @@ class PageReplacementSimulator:
                                       command=self.save_results, state="disabled")
         self.save_button.pack(fill="x", pady=5)
 
+        self.open_button = ttk.Button(button_frame, text="Open Results…",
+                                      command=self.open_results)
+        self.open_button.pack(fill="x", pady=5)
+        ToolTip(self.open_button, "View a saved run, or compare saved runs, without simulating")
+
+        self.performance_button = ttk.Button(button_frame, text="Performance",
+                                             command=self.show_performance, state="disabled")
+        self.performance_button.pack(fill="x", pady=5)
+
         self.reset_button = ttk.Button(button_frame, text="Reset",
                                        command=self.reset_fields)
         self.reset_button.pack(fill="x", pady=5)
@@ -277,70 +378,365 @@ class PageReplacementSimulator:
         self.result_label.pack(anchor="center")
 
     def validate_inputs(self):
+        # The reference string comes back as a lazily expanded RefString
+        from refstring import ParseError, parse_reference_string
+        try:
+            ref_string = parse_reference_string(self.entry_ref.get())
+            if not len(ref_string):
+                raise ParseError("Enter at least one page number", 0)
+        except ParseError as e:
+            self.show_parse_error(e)
+            return None, None
         try:
-            ref_string = [int(x) for x in self.entry_ref.get().split()]
             frame_size = int(self.entry_frames.get())
-            if not ref_string or frame_size <= 0:
-                raise ValueError("Invalid input values")
+            if frame_size <= 0:
+                raise ValueError("Invalid frame size")
             return ref_string, frame_size
         except ValueError:
-            messagebox.showerror("Error",
-                                 "Please enter valid space-separated integers for Reference String\nand a positive integer for Frame Size",
+            messagebox.showerror("Error", "Please enter a positive integer for Frame Size",
                                  parent=self.root)
             return None, None
 
+    def show_parse_error(self, error):
+        # Reported under the buttons, with the offending character selected
+        self.result_label.config(text=f"Reference String: {error}", style='Error.TLabel')
+        self.entry_ref.focus_set()
+        self.entry_ref.icursor(error.position)
+        self.entry_ref.selection_range(error.position, error.position + 1)
+
+    def run_in_background(self, title, work, on_done, total=None, on_error=None):
+        # Runs work(report) off the Tk thread behind a progress dialog; on_done
+        # receives its return value back on the Tk thread.
+        if self.task is not None:
+            messagebox.showinfo("Busy", "A simulation is already running",
+                                parent=self.root)
+            return
+
+        def cancel():
+            dialog.cancelling()
+            self.task.cancel()
+
+        def finish(callback):
+            def handler(*args):
+                self.task = None
+                dialog.close()
+                callback(*args)
+            return handler
+
+        dialog = ProgressDialog(self.root, title, total, cancel)
+        self.task = BackgroundTask(self.root, work,
+                                   on_done=finish(on_done),
+                                   on_error=finish(on_error or self.show_task_error),
+                                   on_progress=dialog.update,
+                                   on_cancelled=finish(self.show_task_cancelled)).start()
+
+    def show_task_error(self, error):
+        messagebox.showerror("Error", f"Simulation failed: {str(error)}",
+                             parent=self.root)
+
+    def show_task_cancelled(self):
+        self.result_label.config(text="Simulation cancelled", style='TLabel')
+
     def run_simulation(self):
         ref_string, frame_size = self.validate_inputs()
         if ref_string is None:
             return
 
         algo = self.algo_var.get()
-        sim = PageReplacement(frame_size, ref_string)
-
+        # When the reference string extends the last run's, only the new
+        # references are fed to that run's stepper
+        stepper = self.stepper
+        if not (stepper and stepper.algo == algo and stepper.frame_size == frame_size
+                and not stepper.policy.lookahead
+                and same_prefix(ref_string, self.stepper_refs, stepper.position)):
+            stepper = None
+        start = stepper.position if stepper else 0
+        digest = self.stepper_digest.copy() if stepper else TraceDigest()
+        # A profiled run is always simulated rather than taken from the cache
+        profile = Profile() if self.profile_var.get() else None
+
+        def work(report):
+            refs = ref_string[start:] if start else ref_string
+            for chunk in iter_chunks(refs):
+                digest.update(chunk)
+            key = (digest.hexdigest(), frame_size, algo)
+            if stepper is None and profile is None:
+                cached = RESULT_CACHE.get(key)
+                if cached is not None:
+                    return None, cached
+            runner = stepper or Stepper(algo, frame_size, record=True)
+            # A cancelled run leaves the stepper where it started
+            mark = runner.snapshot() if runner is stepper else None
+            try:
+                if profile:
+                    with profile:
+                        feed_profiled(runner, refs, profile,
+                                      lambda: report(runner.position - start))
+                else:
+                    runner.prepare(refs)
+                    for chunk in iter_chunks(refs):
+                        runner.feed(chunk)
+                        report(runner.position - start)
+            except BaseException:
+                if mark is not None:
+                    runner.restore(mark)
+                raise
+            result = runner.result()
+            RESULT_CACHE.put(key, result)
+            return runner, result
+
+        def done(outcome):
+            runner, result = outcome
+            if runner is not None:
+                self.stepper = runner
+                self.stepper_refs = ref_string
+                self.stepper_digest = digest
+            self.set_profile(profile, f"{algo}, {frame_size} frames")
+            self.show_simulation_result(result, ref_string)
+
+        self.run_in_background(f"Running {algo}", work, done,
+                               total=len(ref_string) - start)
+
+    def show_simulation_result(self, result, ref_string):
+        algo = result.algo
+        faults = result.faults
+        self.simulation_details = {
+            "faults": faults, "steps": result.steps, "algo": algo,
+            "ref_string": ref_string, "frame_size": result.frame_size,
+            "hits": result.hits, "misses": result.misses,
+            "frame_states": result.frame_states,
+            "faults_over_time": result.faults_over_time,
+            "adaptation_label": result.adaptation_label,
+            "adaptation_over_time": result.adaptation_over_time
+        }
+        self.result_label.config(text=f"Page Faults using {algo}: {faults}",
+                                 style='Success.TLabel')
+        self.details_button.config(state="normal")
+        self.ratio_button.config(state="normal")
+        self.frames_button.config(state="normal")
+        self.save_button.config(state="normal")
+
+    def load_trace_file(self):
         try:
-            algo_methods = {
-                "FIFO": lambda: (sim.fifo(), sim.get_fifo_steps(), sim.get_faults_over_time("FIFO")),
-                "LRU": lambda: (sim.lru(), sim.get_lru_steps(), sim.get_faults_over_time("LRU")),
-                "Optimal": lambda: (sim.optimal(), sim.get_optimal_steps(), sim.get_faults_over_time("Optimal"))
-            }
-            faults, steps, faults_over_time = algo_methods[algo]()
-            self.simulation_details = {
-                "faults": faults, "steps": steps, "algo": algo,
-                "ref_string": ref_string, "frame_size": frame_size,
-                "hits": sim.hits, "misses": sim.misses, "frame_states": sim.frame_states,
-                "faults_over_time": faults_over_time
-            }
+            frame_size = int(self.entry_frames.get())
+            if frame_size <= 0:
+                raise ValueError("Invalid frame size")
+        except ValueError:
+            messagebox.showerror("Error", "Please enter a positive integer for Frame Size",
+                                 parent=self.root)
+            return
+
+        filename = filedialog.askopenfilename(
+            filetypes=[("Trace files", "*.txt *.trace *.bin"), ("All files", "*.*")],
+            title="Load Trace File", parent=self.root
+        )
+        if not filename:
+            return
+
+        # Text traces are streamed in chunks and binary traces memory-mapped;
+        # either way only fault counts at chunk boundaries are kept, so the
+        # per-step views are not available.
+        algo = self.algo_var.get()
+        profile = Profile() if self.profile_var.get() else None
+
+        def work(report):
+            with open_trace(filename) as trace, profile or nullcontext():
+                sim = algorithms.PageReplacement(frame_size, trace, progress=report,
+                                                 profile=profile)
+                faults = sim.run(algo)
+                return faults, sim.timeline, sim.adaptation_timeline
+
+        def done(outcome):
+            faults, timeline, adaptation = outcome
+            self.simulation_details = None
+            self.details_button.config(state="disabled")
+            self.ratio_button.config(state="disabled")
+            self.frames_button.config(state="disabled")
+            self.save_button.config(state="disabled")
             self.result_label.config(text=f"Page Faults using {algo}: {faults}",
                                      style='Success.TLabel')
-            self.details_button.config(state="normal")
-            self.ratio_button.config(state="normal")
-            self.frames_button.config(state="normal")
-            self.save_button.config(state="normal")
-        except Exception as e:
-            messagebox.showerror("Error", f"Simulation failed: {str(e)}",
+            self.set_profile(profile, f"{algo}, {frame_size} frames, "
+                                      f"{os.path.basename(filename)}")
+            self.show_trace_timeline(filename, algo, timeline, adaptation)
+
+        def failed(error):
+            messagebox.showerror("Error", f"Could not read trace file: {str(error)}",
                                  parent=self.root)
 
+        self.run_in_background(f"Running {algo} on {filename.split('/')[-1]}", work, done,
+                               on_error=failed)
+
+    def show_generate_dialog(self):
+        from workloads import PATTERNS, Workload, fitting_dtype, write_workload
+        dialog = tk.Toplevel(self.root, bg=BG_COLOR)
+        dialog.title("Generate Reference String")
+        dialog.transient(self.root)
+        dialog.resizable(False, False)
+
+        body = ttk.Frame(dialog, padding=15)
+        body.pack(fill="both", expand=True)
+        pattern = tk.StringVar(value="zipf")
+        ttk.Label(body, text="Pattern:").grid(row=0, column=0, sticky="w", pady=4)
+        ttk.OptionMenu(body, pattern, "zipf", *PATTERNS,
+                       style='TMenubutton').grid(row=0, column=1, sticky="w", pady=4)
+
+        # (label, default, parser, patterns the field applies to)
+        fields = [
+            ("Length", "10000", int, None),
+            ("Seed", "0", int, None),
+            ("Pages", "100", int, ("uniform", "zipf", "loop", "working_set")),
+            ("Skew", "1.0", float, ("zipf",)),
+            ("Phase Length", "1000", int, ("working_set",)),
+            ("Shift", "", int, ("working_set",)),
+            ("Start", "0", int, ("sequential", "loop")),
+        ]
+        entries = {}
+        for row, (label, default, _, _) in enumerate(fields, 1):
+            ttk.Label(body, text=f"{label}:").grid(row=row, column=0, sticky="w", pady=4)
+            entry = ttk.Entry(body, width=12)
+            entry.insert(0, default)
+            entry.grid(row=row, column=1, sticky="w", pady=4)
+            entries[label] = entry
+
+        def update_fields(*_):
+            for label, _, _, patterns in fields:
+                usable = patterns is None or pattern.get() in patterns
+                entries[label].config(state="normal" if usable else "disabled")
+
+        pattern.trace_add("write", update_fields)
+        update_fields()
+
+        def workload():
+            values = {}
+            try:
+                for label, _, parse, patterns in fields:
+                    if patterns is not None and pattern.get() not in patterns:
+                        continue
+                    text = entries[label].get().strip()
+                    if text:
+                        values[label] = parse(text)
+                length = values.pop("Length", 0)
+                if length <= 0 or values.get("Pages", 1) <= 0 or values.get("Phase Length", 1) <= 0:
+                    raise ValueError("Invalid workload parameters")
+            except ValueError:
+                messagebox.showerror("Error",
+                                     "Please enter a positive Length, Pages and Phase Length\n"
+                                     "and numeric values for the other fields",
+                                     parent=dialog)
+                return None
+            seed = values.pop("Seed", 0)
+            params = {label.lower().replace(" ", "_"): value for label, value in values.items()}
+            return Workload(pattern.get(), length, seed, **params)
+
+        def insert():
+            generated = workload()
+            if generated is None:
+                return
+            if len(generated) > INSERT_LIMIT:
+                messagebox.showerror("Error",
+                                     f"Traces over {INSERT_LIMIT:,} references cannot be edited;\n"
+                                     "use Save as Trace… and Load Trace File… instead",
+                                     parent=dialog)
+                return
+            self.entry_ref.delete(0, tk.END)
+            self.entry_ref.insert(0, " ".join(map(str, generated.to_numpy().tolist())))
+            dialog.destroy()
+
+        def save():
+            generated = workload()
+            if generated is None:
+                return
+            filename = filedialog.asksaveasfilename(
+                defaultextension=".bin",
+                filetypes=[("Binary traces", "*.bin"), ("All files", "*.*")],
+                title="Save Trace", parent=dialog,
+                initialfile=f"{generated.pattern}_{len(generated)}"
+            )
+            if not filename:
+                return
+            dialog.destroy()
+
+            def work(report):
+                return write_workload(filename, generated, fitting_dtype(generated))
+
+            def done(length):
+                self.result_label.config(
+                    text=f"Saved {length:,} references to {filename.split('/')[-1]}",
+                    style='Success.TLabel')
+
+            def failed(error):
+                messagebox.showerror("Error", f"Could not write trace file: {str(error)}",
+                                     parent=self.root)
+
+            self.run_in_background(f"Generating {generated.pattern} trace", work, done,
+                                   on_error=failed)
+
+        buttons = ttk.Frame(body)
+        buttons.grid(row=len(fields) + 1, column=0, columnspan=2, pady=(10, 0))
+        ttk.Button(buttons, text="Insert", command=insert).pack(side="left", padx=5)
+        ttk.Button(buttons, text="Save as Trace…", command=save).pack(side="left", padx=5)
+        ttk.Button(buttons, text="Cancel", command=dialog.destroy).pack(side="left", padx=5)
+
+    @timed_view("Trace Timeline")
+    def show_trace_timeline(self, filename, algo, timeline, adaptation=None):
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+        timeline_window = tk.Toplevel(self.root, bg=BG_COLOR)
+        timeline_window.title(f"{algo} Trace File Results")
+        timeline_window.geometry("800x500")
+
+        positions = [position for position, _ in timeline]
+        faults = [fault_count for _, fault_count in timeline]
+
+        fig = Figure(figsize=(8, 5), dpi=100, facecolor=BG_COLOR)
+        ax = fig.add_subplot(111, facecolor="#FFFFFF")
+        ax.plot(positions, faults, color=PRIMARY_COLOR, linewidth=2)
+        ax.set_title(f"Faults Over Time ({filename.split('/')[-1]})", color=TEXT_COLOR)
+        ax.set_xlabel("Position in Reference String", color=TEXT_COLOR)
+        ax.set_ylabel("Cumulative Faults", color=TEXT_COLOR)
+        ax.tick_params(axis='both', colors=TEXT_COLOR)
+        if adaptation:
+            adapt_ax = self.adaptation_axes(ax, POLICIES[algo].adaptation_label)
+            adapt_ax.plot([position for position, _ in adaptation],
+                          [value for _, value in adaptation],
+                          color=ACCENT_COLOR, linewidth=1.5)
+
+        canvas = FigureCanvasTkAgg(fig, master=timeline_window)
+        canvas.get_tk_widget().pack(fill="both", expand=True, padx=10, pady=10)
+        canvas.draw()
+
     def show_comparisons(self):
+        from compare import simulate_all
         ref_string, frame_size = self.validate_inputs()
         if ref_string is None:
             return
 
-        sim = PageReplacement(frame_size, ref_string)
-        algorithms = ["FIFO", "LRU", "Optimal"]
-        faults_over_time = {algo: sim.get_faults_over_time(algo) for algo in algorithms}
-        total_faults = {algo: faults_over_time[algo][-1] for algo in algorithms}
+        algorithms = list(POLICIES)
+        self.run_in_background(
+            "Comparing Algorithms",
+            lambda report: simulate_all(ref_string, frame_size, algorithms, progress=report),
+            lambda results: self.plot_comparisons(algorithms, results)
+        )
+
+    def plot_comparisons(self, algorithms, results):
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
+        from plotting import DecimatedArea, DecimatedLine
+        faults_over_time = {algo: results[algo].faults_over_time for algo in algorithms}
+        total_faults = {algo: results[algo].faults for algo in algorithms}
 
         plot_window = tk.Toplevel(self.root, bg=BG_COLOR)
         plot_window.title("Algorithm Comparisons")
         plot_window.geometry("1000x800")
 
-        fig = plt.Figure(figsize=(10, 7), dpi=100, facecolor=BG_COLOR)
+        fig = Figure(figsize=(10, 7), dpi=100, facecolor=BG_COLOR)
 
         # Line Chart
         ax1 = fig.add_subplot(311, facecolor="#FFFFFF")
-        for algo, color in zip(algorithms, CHART_COLORS):
-            ax1.plot(range(1, len(ref_string) + 1), faults_over_time[algo],
-                     label=algo, color=color, marker='o',linewidth=2)
+        colors = [CHART_COLORS[i % len(CHART_COLORS)] for i in range(len(algorithms))]
+        for algo, color in zip(algorithms, colors):
+            DecimatedLine(ax1, faults_over_time[algo], label=algo, color=color,
+                          marker='o', linewidth=2)
         ax1.set_title("Faults Over Time (Line)", color=TEXT_COLOR)
         ax1.set_xlabel("Position", color=TEXT_COLOR)
         ax1.set_ylabel("Cumulative Faults", color=TEXT_COLOR)
@@ -350,28 +746,98 @@ class PageReplacementSimulator:
         # Bar Chart
         ax2 = fig.add_subplot(312, facecolor="#FFFFFF")
         ax2.bar(algorithms, [total_faults[algo] for algo in algorithms],
-                color=CHART_COLORS)
+                color=colors)
         ax2.set_title("Total Faults (Bar)", color=TEXT_COLOR)
         ax2.set_ylabel("Faults", color=TEXT_COLOR)
         ax2.tick_params(axis='both', colors=TEXT_COLOR)
 
         # Area Chart
         ax3 = fig.add_subplot(313, facecolor="#FFFFFF")
-        for algo, color in zip(algorithms, CHART_COLORS):
-            ax3.fill_between(range(1, len(ref_string) + 1), faults_over_time[algo],
-                             label=algo, color=color, alpha=0.5)
+        for algo, color in zip(algorithms, colors):
+            DecimatedArea(ax3, faults_over_time[algo], label=algo, color=color,
+                          alpha=0.5)
         ax3.set_title("Faults Over Time (Area)", color=TEXT_COLOR)
         ax3.set_xlabel("Position", color=TEXT_COLOR)
         ax3.set_ylabel("Cumulative Faults", color=TEXT_COLOR)
         ax3.tick_params(axis='both', colors=TEXT_COLOR)
         ax3.legend(facecolor=BG_COLOR, edgecolor=BORDER_COLOR)
 
+        ax1.sharex(ax3)
+
         fig.tight_layout(pad=3.0)
+        ttk.Button(plot_window, text="Save Results…",
+                   command=lambda: self.save_comparisons([results[algo] for algo in algorithms])
+                   ).pack(side="bottom", pady=(0, 10))
         canvas = FigureCanvasTkAgg(fig, master=plot_window)
+        # Zooming re-decimates the timelines for the visible range
+        NavigationToolbar2Tk(canvas, plot_window).update()
         canvas.get_tk_widget().pack(fill="both", expand=True, padx=10, pady=10)
         canvas.draw()
 
+    def show_miss_ratio_curve(self):
+        ref_string, frame_size = self.validate_inputs()
+        if ref_string is None:
+            return
+
+        # OPT's pass costs up to the largest frame size per reference, so
+        # the curves stop at a size the user picks
+        limit = simpledialog.askinteger(
+            "Miss Ratio Curve", "Largest frame size to plot:",
+            initialvalue=max(frame_size, CURVE_FRAME_LIMIT), minvalue=1, parent=self.root)
+        if limit is None:
+            return
+        total = len(ref_string)
+
+        def work(report):
+            # One stack-distance pass per algorithm covers every frame size
+            max_frames = min(limit, len(set(ref_string))) or 1
+            curves = {}
+            base = 0
+            for algo, curve in CURVES.items():
+                faults = curve(ref_string, max_frames,
+                               progress=lambda done, base=base: report(base + done))
+                base += total * CURVE_PASSES[algo]
+                curves[algo] = [f / total for f in faults]
+            return curves, max_frames
+
+        self.run_in_background(
+            "Computing Miss Ratio Curves", work,
+            lambda outcome: self.plot_miss_ratio_curve(*outcome, frame_size),
+            total=total * sum(CURVE_PASSES.values())
+        )
+
+    def plot_miss_ratio_curve(self, curves, max_frames, frame_size):
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+        sizes = range(1, max_frames + 1)
+
+        curve_window = tk.Toplevel(self.root, bg=BG_COLOR)
+        curve_window.title("Miss Ratio Curve")
+        curve_window.geometry("800x500")
+
+        fig = Figure(figsize=(8, 5), dpi=100, facecolor=BG_COLOR)
+        ax = fig.add_subplot(111, facecolor="#FFFFFF")
+        for (algo, ratios), color in zip(curves.items(), CHART_COLORS[1:]):
+            ax.step(sizes, ratios, where="post", label=algo, color=color,
+                    linewidth=2)
+        ax.axvline(frame_size, color=SECONDARY_COLOR, linestyle="--",
+                   label=f"Frame Size = {frame_size}")
+        ax.set_title("Miss Ratio Curve", color=TEXT_COLOR)
+        ax.set_xlabel("Frame Size", color=TEXT_COLOR)
+        ax.set_ylabel("Miss Ratio", color=TEXT_COLOR)
+        ax.set_ylim(0, 1.05)
+        ax.tick_params(axis='both', colors=TEXT_COLOR)
+        ax.legend(facecolor=BG_COLOR, edgecolor=BORDER_COLOR)
+
+        canvas = FigureCanvasTkAgg(fig, master=curve_window)
+        canvas.get_tk_widget().pack(fill="both", expand=True, padx=10, pady=10)
+        canvas.draw()
+
+    @timed_view("Details")
     def show_details(self):
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
+        from plotting import DecimatedLine
         if not self.simulation_details:
             messagebox.showinfo("Info", "No simulation data available",
                                  parent=self.root)
@@ -381,63 +847,117 @@ class PageReplacementSimulator:
         details_window.title(f"{self.simulation_details['algo']} Simulation Details")
         details_window.geometry("900x700")
 
-        # Text Area for Steps
-        text_frame = ttk.Frame(details_window)
-        text_frame.pack(padx=10, pady=10, fill="both", expand=True)
-        text = tk.Text(text_frame, height=15, width=60, bg="#FFFFFF",
-                         fg=PRIMARY_COLOR,  # Modified this line to set text color to blue
-                         font=("Helvetica", 10), borderwidth=1,
-                         relief="flat")
-        text.pack(side="left", fill="both", expand=True)
-        scrollbar = ttk.Scrollbar(text_frame, command=text.yview)
-        scrollbar.pack(side="right", fill="y")
-        text.config(yscrollcommand=scrollbar.set)
-
-        details = f"Algorithm: {self.simulation_details['algo']}\n"
-        details += f"Reference String: {' '.join(map(str, self.simulation_details['ref_string']))}\n"
-        details += f"Frame Size: {self.simulation_details['frame_size']}\n"
-        details += f"Total Page Faults: {self.simulation_details['faults']}\n\n"
-        details += "Simulation Steps:\n"
-        for step in self.simulation_details["steps"]:
-            details += f"{step}\n"
-        text.insert(tk.END, details)
-        text.config(state="disabled")
+        # Steps are rendered lazily by a virtual list over the event log
+        ref_string = self.simulation_details['ref_string']
+        shown = ' '.join(map(str, ref_string[:REF_PREVIEW]))
+        if len(ref_string) > REF_PREVIEW:
+            shown += f" ... ({len(ref_string):,} references)"
+        header = [
+            f"Algorithm: {self.simulation_details['algo']}",
+            f"Reference String: {shown}",
+            f"Frame Size: {self.simulation_details['frame_size']}",
+            f"Total Page Faults: {self.simulation_details['faults']}",
+            "",
+            "Simulation Steps:",
+        ]
+        log = self.simulation_details["steps"].log
+        steps_view = StepListView(details_window, log, header, self.profile)
+
+        search_frame = ttk.Frame(details_window, padding=5)
+        search_frame.pack(fill="x", padx=10, pady=(10, 0))
+        ttk.Label(search_frame, text="Step:").pack(side="left")
+        step_entry = ttk.Entry(search_frame, width=10)
+        step_entry.pack(side="left", padx=5)
+        ttk.Button(search_frame, text="Go",
+                   command=lambda: jump_to_step()).pack(side="left", padx=5)
+        ttk.Label(search_frame, text="Page:").pack(side="left", padx=(20, 0))
+        page_entry = ttk.Entry(search_frame, width=10)
+        page_entry.pack(side="left", padx=5)
+        ttk.Button(search_frame, text="Next Fault",
+                   command=lambda: find_next_fault()).pack(side="left", padx=5)
+        search_status = ttk.Label(search_frame, text="")
+        search_status.pack(side="left", padx=10)
+        steps_view.frame.pack(padx=10, pady=10, fill="both", expand=True)
+
+        def jump_to_step():
+            try:
+                step = int(step_entry.get())
+                if not 1 <= step <= len(log):
+                    raise ValueError("Step out of range")
+            except ValueError:
+                search_status.config(text=f"Enter a step between 1 and {len(log)}")
+                return
+            search_status.config(text="")
+            steps_view.show_step(step - 1)
+
+        def find_next_fault():
+            try:
+                page = int(page_entry.get())
+            except ValueError:
+                search_status.config(text="Enter a page number")
+                return
+            # Continue after the highlighted step, wrapping around once
+            start = 0
+            if steps_view.marked is not None:
+                start = steps_view.marked - len(header) + 1
+            step = log.next_fault(page, start)
+            if step is None and start:
+                step = log.next_fault(page, 0)
+            if step is None:
+                search_status.config(text=f"No faults on page {page}")
+                return
+            search_status.config(text=f"Fault on page {page} at step {step + 1}")
+            steps_view.show_step(step)
 
         # Faults Over Time Graph
         graph_frame = ttk.Frame(details_window)
         graph_frame.pack(padx=10, pady=10, fill="x")
-        fig = plt.Figure(figsize=(8, 4), dpi=100, facecolor=BG_COLOR)
+        fig = Figure(figsize=(8, 4), dpi=100, facecolor=BG_COLOR)
         ax = fig.add_subplot(111, facecolor="#FFFFFF")
-        ax.plot(range(1, len(self.simulation_details['ref_string']) + 1),
-                self.simulation_details['faults_over_time'],
-                color=PRIMARY_COLOR, marker='o', linewidth=2)
+        DecimatedLine(ax, self.simulation_details['faults_over_time'],
+                      color=PRIMARY_COLOR, marker='o', linewidth=2)
         ax.set_title("Faults Over Time", color=TEXT_COLOR)
         ax.set_xlabel("Position in Reference String", color=TEXT_COLOR)
         ax.set_ylabel("Cumulative Faults", color=TEXT_COLOR)
         ax.tick_params(axis='both', colors=TEXT_COLOR)
+        if self.simulation_details['adaptation_over_time'] is not None:
+            adapt_ax = self.adaptation_axes(ax, self.simulation_details['adaptation_label'])
+            DecimatedLine(adapt_ax, self.simulation_details['adaptation_over_time'],
+                          color=ACCENT_COLOR, linewidth=1.5)
 
         canvas = FigureCanvasTkAgg(fig, master=graph_frame)
+        NavigationToolbar2Tk(canvas, graph_frame).update()
         canvas_widget = canvas.get_tk_widget()
         canvas_widget.pack(fill="both", expand=True)
         canvas.draw()
 
+    def adaptation_axes(self, ax, label):
+        # Second y axis for the value an adaptive policy tunes as it runs,
+        # drawn over the fault timeline
+        adapt_ax = ax.twinx()
+        adapt_ax.set_ylabel(label, color=ACCENT_COLOR)
+        adapt_ax.tick_params(axis='y', colors=ACCENT_COLOR)
+        return adapt_ax
+
+    @timed_view("Hit/Miss Ratio")
     def show_hit_miss_ratio(self):
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
         if not self.simulation_details:
             messagebox.showinfo("Info", "No simulation data available",
                                  parent=self.root)
             return
 
-        sim = PageReplacement(self.simulation_details['frame_size'],
-                                 self.simulation_details['ref_string'])
         algo = self.simulation_details['algo']
-        {"FIFO": sim.fifo, "LRU": sim.lru, "Optimal": sim.optimal}[algo]()
-        hit_ratio, miss_ratio = sim.get_hit_miss_ratio()
+        hits, misses = self.simulation_details['hits'], self.simulation_details['misses']
+        total = hits + misses
+        hit_ratio, miss_ratio = (hits / total * 100, misses / total * 100) if total else (0, 0)
 
         ratio_window = tk.Toplevel(self.root, bg=BG_COLOR)
         ratio_window.title(f"{algo} Hit/Miss Ratio")
         ratio_window.geometry("600x500")
 
-        fig = plt.Figure(figsize=(5, 4), dpi=100, facecolor=BG_COLOR)
+        fig = Figure(figsize=(5, 4), dpi=100, facecolor=BG_COLOR)
         ax = fig.add_subplot(111, facecolor="#FFFFFF")
         ax.pie([hit_ratio, miss_ratio], labels=['Hits', 'Misses'],
                colors=[ACCENT_COLOR, ERROR_COLOR], autopct='%1.1f%%',
@@ -448,7 +968,11 @@ class PageReplacementSimulator:
         canvas.get_tk_widget().pack(fill="both", expand=True, padx=10, pady=10)
         canvas.draw()
 
+    @timed_view("Frame States")
     def show_frame_states(self):
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
+        from plotting import FrameStateHeatmap
         if not self.simulation_details:
             messagebox.showinfo("Info", "No simulation data available",
                                  parent=self.root)
@@ -456,75 +980,256 @@ class PageReplacementSimulator:
 
         states_window = tk.Toplevel(self.root, bg=BG_COLOR)
         states_window.title(f"{self.simulation_details['algo']} Frame States")
-        states_window.geometry("800x600")
+        states_window.geometry("800x650")
 
-        fig = plt.Figure(figsize=(8, 5), dpi=100, facecolor=BG_COLOR)
+        fig = Figure(figsize=(8, 5), dpi=100, facecolor=BG_COLOR)
         ax = fig.add_subplot(111, facecolor="#FFFFFF")
 
-        frame_states = self.simulation_details["frame_states"]
-        steps = range(1, len(frame_states) + 1)
+        # One image for the visible window of steps, rebuilt from the event log
+        log = self.simulation_details["frame_states"].log
         frame_size = self.simulation_details["frame_size"]
-
-        # Prepare data for stacked bar chart
-        unique_pages = sorted(set(self.simulation_details["ref_string"]))
-        colors = plt.colormaps.get_cmap('tab20')(np.linspace(0, 1, len(unique_pages)))  # Updated colormap access
-        page_to_color = {page: colors[i % len(colors)] for i, page in enumerate(unique_pages)}
-
-        bottom = np.zeros(len(steps))
-        for i in range(frame_size):
-            layer = [state[i] if i < len(state) else None for state in frame_states]
-            values = [page if page is not None else 0 for page in layer]
-            bars = ax.bar(steps, [1 if v != 0 else 0 for v in values], bottom=bottom,
-                          color=[page_to_color.get(v, '#FFFFFF') for v in values],
-                          edgecolor=BORDER_COLOR, width=0.8)
-            for bar, value in zip(bars, values):
-                if value != 0:
-                    ax.text(bar.get_x() + bar.get_width()/2, bar.get_y() + bar.get_height()/2,
-                            str(value), ha='center', va='center', color=TEXT_COLOR)
-            bottom += [1 if v != 0 else 0 for v in values]
+        window = tk.IntVar(value=min(50, len(log)))
+        heatmap = FrameStateHeatmap(ax, log, 0, window.get())
 
         ax.set_title(f"{self.simulation_details['algo']} Frame States", color=TEXT_COLOR)
         ax.set_xlabel("Step", color=TEXT_COLOR)
         ax.set_ylabel("Frame Position", color=TEXT_COLOR)
-        ax.set_yticks(range(frame_size))
+        if frame_size <= 32:
+            ax.set_yticks(range(frame_size))
         ax.tick_params(axis='both', colors=TEXT_COLOR)
 
         canvas = FigureCanvasTkAgg(fig, master=states_window)
+        toolbar = NavigationToolbar2Tk(canvas, states_window)
+        toolbar.update()
         canvas.get_tk_widget().pack(fill="both", expand=True, padx=10, pady=10)
+
+        controls = ttk.Frame(states_window, padding=5)
+        controls.pack(fill="x", padx=10, pady=(0, 10))
+        ttk.Label(controls, text="Steps shown:").pack(side="left")
+        ttk.Spinbox(controls, from_=10, to=5000, increment=10, width=6,
+                    textvariable=window, command=lambda: redraw()).pack(side="left", padx=5)
+        position = tk.DoubleVar(value=0)
+        scroller = ttk.Scale(controls, from_=0, to=max(len(log) - window.get(), 0),
+                             variable=position, command=lambda _: redraw())
+        scroller.pack(side="left", fill="x", expand=True, padx=5)
+
+        def redraw():
+            try:
+                width = max(int(window.get()), 1)
+            except (tk.TclError, ValueError):
+                return
+            scroller.config(to=max(len(log) - width, 0))
+            with self.timing("Frame States window"):
+                heatmap.set_window(int(position.get()), width)
+            # The toolbar's saved views belong to the previous window
+            toolbar.update()
+            canvas.draw_idle()
+
         canvas.draw()
 
     def save_results(self):
+        from datetime import datetime
         if not self.simulation_details:
             messagebox.showinfo("Info", "No results to save", parent=self.root)
             return
 
         filename = filedialog.asksaveasfilename(
-            defaultextension=".json",
-            filetypes=[("JSON files", "*.json"), ("All files", "*.*")],
+            defaultextension=".pgres",
+            filetypes=[("Result files", "*.pgres"), ("JSON files", "*.json"), ("All files", "*.*")],
             title="Save Results",
             initialfile=f"simulation_{self.simulation_details['algo']}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
         )
+        if not filename:
+            return
+        if filename.lower().endswith(".json"):
+            self.export_json(filename)
+            return
+
+        details = self.simulation_details
+        result = SimulationResult(details['algo'], details['frame_size'], details['faults'],
+                                  details['hits'], details['misses'], details['faults_over_time'],
+                                  details['steps'].log, details['adaptation_over_time'])
+        self.write_results(filename, [result])
+
+    def save_comparisons(self, results):
+        from datetime import datetime
+        filename = filedialog.asksaveasfilename(
+            defaultextension=".pgres",
+            filetypes=[("Result files", "*.pgres"), ("All files", "*.*")],
+            title="Save Comparison Results",
+            initialfile=f"comparison_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        )
         if filename:
-            with open(filename, 'w') as f:
-                json.dump(self.simulation_details, f, indent=4)
-            messagebox.showinfo("Success", "Results saved successfully",
+            self.write_results(filename, results)
+
+    def write_results(self, filename, results):
+        # Writes SimulationResults to a result file in the background. The
+        # runs are already in memory, so they are written from their logs;
+        # only batch.py --save-results streams runs while simulating.
+        from results import ResultWriter
+        total = sum(len(result.log) for result in results)
+
+        def work(report):
+            done = 0
+            try:
+                with ResultWriter(filename) as writer:
+                    for result in results:
+                        writer.add_result(result, progress=lambda n, _: report(done + n, total))
+                        done += len(result.log)
+            except BaseException:
+                # The file may not even have been created
+                with suppress(OSError):
+                    os.remove(filename)
+                raise
+
+        def failed(error):
+            messagebox.showerror("Error", f"Could not save results: {str(error)}",
                                  parent=self.root)
 
+        self.run_in_background(
+            "Saving Results", work,
+            lambda _: messagebox.showinfo("Success", "Results saved successfully",
+                                          parent=self.root),
+            total=total, on_error=failed)
+
+    def open_results(self):
+        # Runs are opened lazily: only the footer is read here, and each view
+        # decompresses just the blocks it shows
+        from results import ResultFile
+        filename = filedialog.askopenfilename(
+            title="Open Results",
+            filetypes=[("Result files", "*.pgres"), ("All files", "*.*")]
+        )
+        if not filename:
+            return
+        try:
+            results = ResultFile(filename).results()
+        except (OSError, ValueError) as e:
+            messagebox.showerror("Error", f"Could not open results: {str(e)}",
+                                 parent=self.root)
+            return
+        if not results:
+            messagebox.showinfo("Info", "The file holds no runs", parent=self.root)
+            return
+
+        self.stepper = None
+        self.stepper_refs = []
+        self.stepper_digest = None
+        self.set_profile(None)
+        if len(results) == 1:
+            (result,) = results
+            # The event log's pages are the reference string
+            self.show_simulation_result(result, result.log.pages)
+            return
+        labels = [result.algo for result in results]
+        if len(set(labels)) < len(labels):
+            labels = [f"{result.algo} ({result.frame_size} frames)" for result in results]
+        self.plot_comparisons(labels, dict(zip(labels, results)))
+
+    def export_json(self, filename):
+        # Every step and frame state spelled out: only sensible for small runs
+        import json
+        steps = len(self.simulation_details['steps'])
+        if steps > JSON_EXPORT_LIMIT and not messagebox.askyesno(
+                "Large Export",
+                f"This run has {steps:,} steps, so the JSON file will be very large and slow "
+                "to write. Result files (.pgres) are far smaller. Export as JSON anyway?",
+                parent=self.root):
+            return
+        with open(filename, 'w') as f:
+            # Steps and frame states are lazy views over the event log
+            json.dump(self.simulation_details, f, indent=4, default=list)
+        messagebox.showinfo("Success", "Results saved successfully",
+                            parent=self.root)
+
+    def set_profile(self, profile, title=None):
+        self.profile = profile
+        self.profile_title = title
+        self.performance_button.config(state="normal" if profile else "disabled")
+
+    def timing(self, view):
+        # Context that times view into the last run's profile, if any
+        if self.profile is None:
+            return nullcontext()
+        return self.profile.phase(f"render: {view}")
+
+    def show_performance(self):
+        # The last run's profile; views opened since are added on Refresh
+        import json
+        if self.profile is None:
+            messagebox.showinfo("Info", "Tick \"Profile runs\" and run a simulation first",
+                                parent=self.root)
+            return
+        profile = self.profile
+        perf_window = tk.Toplevel(self.root, bg=BG_COLOR)
+        perf_window.title(f"Performance ({self.profile_title})")
+        perf_window.geometry("480x460")
+
+        table = ttk.Treeview(perf_window, columns=("measure", "value"), show="headings")
+        table.heading("measure", text="Measure")
+        table.heading("value", text="Value")
+        table.column("measure", width=260)
+        table.column("value", width=160, anchor="e")
+        table.pack(fill="both", expand=True, padx=10, pady=10)
+
+        def fill():
+            table.delete(*table.get_children())
+            for measure, value in profile.rows():
+                table.insert("", tk.END, values=(measure, value))
+
+        def save():
+            filename = filedialog.asksaveasfilename(
+                defaultextension=".json", filetypes=[("JSON files", "*.json")],
+                title="Save Profile", parent=perf_window)
+            if not filename:
+                return
+            try:
+                with open(filename, "w") as f:
+                    json.dump({"run": self.profile_title, **profile.as_dict()}, f, indent=4)
+            except OSError as e:
+                messagebox.showerror("Error", f"Could not save profile: {str(e)}",
+                                     parent=perf_window)
+
+        buttons = ttk.Frame(perf_window, padding=5)
+        buttons.pack(fill="x", padx=10, pady=(0, 10))
+        ttk.Button(buttons, text="Refresh", command=fill).pack(side="left", padx=5)
+        ttk.Button(buttons, text="Save JSON…", command=save).pack(side="left", padx=5)
+        fill()
+
     def reset_fields(self):
         self.entry_ref.delete(0, tk.END)
         self.entry_frames.delete(0, tk.END)
         self.algo_var.set("FIFO")
         self.result_label.config(text="Page Faults: -", style='TLabel')
         self.simulation_details = None
+        self.stepper = None
+        self.stepper_refs = []
+        self.stepper_digest = None
+        self.set_profile(None)
         self.details_button.config(state="disabled")
         self.ratio_button.config(state="disabled")
         self.frames_button.config(state="disabled")
         self.save_button.config(state="disabled")
 
-def main():
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Page replacement simulator")
+    parser.add_argument("--startup-time", action="store_true",
+                        help="print the time from start-up to the first window")
+    parser.add_argument("--exit", action="store_true",
+                        help="close as soon as the window is shown")
+    args = parser.parse_args(argv)
+
     root = tk.Tk()
     app = PageReplacementSimulator(root)
+    seconds = time_to_window(root, STARTED)
+    if args.startup_time:
+        print(f"First window after {seconds * 1000:.0f} ms", flush=True)
+    if args.exit:
+        root.destroy()
+        return
+    # Only now, with the window up, start loading the plotting modules
+    prewarm(PREWARM_MODULES)
     root.mainloop()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
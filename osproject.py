@@ -51,56 +51,53 @@
 import tkinter as tk
 from tkinter import messagebox
 from algorithms import PageReplacement
+from policies import POLICIES
 
-def run_simulation():
-    ref_string = entry_ref.get().split()
-    try:
-        ref_string = list(map(int, ref_string)) # Convert to integers
-        frame_size = int(entry_frames.get())
-        algo = algo_var.get()
-        sim = PageReplacement(frame_size, ref_string)
-        if algo == "FIFO":
-            result = sim.fifo()
-        elif algo == "LRU":
-            result = sim.lru()
-        elif algo == "Optimal":
-            result = sim.optimal()
-        else:
-            messagebox.showerror("Error", "Invalid Algorithm")
-            return
-        messagebox.showinfo("Result", f"Page Faults using {algo}: {result}")
-    except ValueError:
-        messagebox.showerror("Error", "Invalid input for Reference String or Frame Size. Please enter space-separated integers.")
+def open_window():
+    # The simulator window; only built when run as a script, so that worker
+    # processes re-importing this module (see compare.py) open no window
+    root = tk.Tk()
+    root.title("Page Replacement Simulator")
 
-root = tk.Tk()
-root.title("Page Replacement Simulator")
+    def run_simulation():
+        ref_string = entry_ref.get().split()
+        try:
+            ref_string = list(map(int, ref_string)) # Convert to integers
+            frame_size = int(entry_frames.get())
+            algo = algo_var.get()
+            if algo not in POLICIES:
+                messagebox.showerror("Error", "Invalid Algorithm")
+                return
+            result = PageReplacement(frame_size, ref_string).run(algo)
+            messagebox.showinfo("Result", f"Page Faults using {algo}: {result}")
+        except ValueError:
+            messagebox.showerror("Error", "Invalid input for Reference String or Frame Size. Please enter space-separated integers.")
 
-tk.Label(root, text="Reference String:").grid(row=0, column=0)
-entry_ref = tk.Entry(root)
-entry_ref.grid(row=0, column=1)
+    tk.Label(root, text="Reference String:").grid(row=0, column=0)
+    entry_ref = tk.Entry(root)
+    entry_ref.grid(row=0, column=1)
 
-tk.Label(root, text="Frame Size:").grid(row=1, column=0)
-entry_frames = tk.Entry(root)
-entry_frames.grid(row=1, column=1)
+    tk.Label(root, text="Frame Size:").grid(row=1, column=0)
+    entry_frames = tk.Entry(root)
+    entry_frames.grid(row=1, column=1)
 
-tk.Label(root, text="Algorithm:").grid(row=2, column=0)
-algo_var = tk.StringVar(value="FIFO")
-tk.OptionMenu(root, algo_var, "FIFO", "LRU", "Optimal").grid(row=2, column=1)
+    tk.Label(root, text="Algorithm:").grid(row=2, column=0)
+    algo_var = tk.StringVar(value="FIFO")
+    tk.OptionMenu(root, algo_var, *POLICIES).grid(row=2, column=1)
 
-tk.Button(root, text="Run", command=run_simulation).grid(row=3, column=0, columnspan=2)
+    tk.Button(root, text="Run", command=run_simulation).grid(row=3, column=0, columnspan=2)
 
-root.mainloop()
+    root.mainloop()
 
-import matplotlib.pyplot as plt
-from algorithms import PageReplacement
+import sys
+from compare import compare
+from policies import POLICIES
+from traces import open_trace
 
 def compare_algorithms(reference_string, frame_size):
-    sim = PageReplacement(frame_size, reference_string)
-    results = {
-        "FIFO": sim.fifo(),
-        "LRU": sim.lru(),
-        "Optimal": sim.optimal()
-    }
+    import matplotlib.pyplot as plt  # Only needed once there is a chart to show
+    rows = compare([reference_string], list(POLICIES), [frame_size])
+    results = {row["algo"]: row["faults"] for row in rows}
     plt.bar(results.keys(), results.values(), color=['blue', 'green', 'red'])
     plt.xlabel("Algorithm")
     plt.ylabel("Page Faults")
@@ -108,6 +105,11 @@ def compare_algorithms(reference_string, frame_size):
     plt.show()
 
 if __name__ == "__main__":
-    reference_string = [7, 0, 1, 2, 0, 3, 4, 2, 3, 0, 3, 2]
+    open_window()
+    # Optionally compare on a text or binary trace file: osproject.py TRACE
     frame_size = 3
-    compare_algorithms(reference_string, frame_size)
\ No newline at end of file
+    if len(sys.argv) > 1:
+        with open_trace(sys.argv[1]) as reference_string:
+            compare_algorithms(reference_string, frame_size)
+    else:
+        compare_algorithms([7, 0, 1, 2, 0, 3, 4, 2, 3, 0, 3, 2], frame_size)
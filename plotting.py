@@ -0,0 +1,228 @@
+from array import array
+import matplotlib
+import numpy as np
+from matplotlib.colors import ListedColormap
+from eventlog import HIT
+
+# Fault timelines can have millions of points, far more than the axes has
+# pixels. The artists below draw a min/max envelope per pixel column of the
+# visible range instead, and re-decimate whenever the x limits change, so
+# zooming in brings back full detail.
+
+# Markers are only drawn when this few raw points are visible
+MARKER_LIMIT = 200
+
+# Most values of a stored column decompressed for one redraw
+STORED_RAW_LIMIT = 1 << 22
+
+# Frame state cells get page labels only when a cell has room for the text
+# (about this many pixels per character and in height) and the number of
+# labels stays small
+LABEL_CHAR_PIXELS = 7
+LABEL_MIN_HEIGHT = 12
+LABEL_LIMIT = 2000
+
+def as_numpy(values):
+    if isinstance(values, array):
+        return np.frombuffer(values, dtype=values.typecode)
+    return np.asarray(values)
+
+def minmax_decimate(y, start, stop, buckets):
+    # Returns (indices, values) covering y[start:stop] with at most two points
+    # per bucket: the bucket's minimum and maximum.
+    start = max(0, start)
+    stop = min(len(y), stop)
+    if stop - start <= 2 * buckets:
+        indices = np.arange(start, stop)
+        return indices, y[start:stop]
+    edges = np.linspace(start, stop, buckets + 1).astype(np.int64)[:-1]
+    segment = y[start:stop]
+    offsets = edges - start
+    lows = np.minimum.reduceat(segment, offsets)
+    highs = np.maximum.reduceat(segment, offsets)
+    indices = np.repeat(edges, 2)
+    values = np.empty(2 * len(edges), dtype=y.dtype)
+    values[0::2] = lows
+    values[1::2] = highs
+    return indices, values
+
+def stored_decimate(column, start, stop, buckets):
+    # minmax_decimate() for a column of a result file (results.StoredColumn):
+    # a range spanning more blocks than there are buckets, or more than
+    # STORED_RAW_LIMIT values, is drawn from the blocks' stored minimum and
+    # maximum, a narrower one from just the blocks it covers.
+    start = max(0, start)
+    stop = min(len(column), stop)
+    numbers = column.block_range(start, stop)
+    if len(numbers) > buckets or (len(numbers) > 1 and stop - start > STORED_RAW_LIMIT):
+        summary = np.array(column.summary(numbers), dtype=float)
+        indices = np.repeat(summary[:, 0].astype(np.int64), 2)
+        values = summary[:, 1:].ravel()
+        return indices, values
+    indices, values = minmax_decimate(as_numpy(column[start:stop]), 0, stop - start, buckets)
+    return indices + start, values
+
+def distinct_pages(pages):
+    # Sorted distinct pages. Stored page columns come with them; otherwise
+    # stored columns are scanned a block at a time.
+    if getattr(pages, "distinct", None) is not None and len(pages.distinct):
+        return as_numpy(pages.distinct[:])
+    if hasattr(pages, "blocks"):
+        seen = [np.unique(as_numpy(block)) for block in pages.blocks()]
+        return np.unique(np.concatenate(seen)) if seen else np.empty(0, dtype=np.int64)
+    return np.unique(as_numpy(pages))
+
+class DecimatedSeries:
+    # Base class: y is indexed by step, plotted at x = x_offset + index. y
+    # may also be a stored column (see results.py), read only where viewed.
+    def __init__(self, ax, y, x_offset=1):
+        self.ax = ax
+        self.y = y if hasattr(y, "block_range") else as_numpy(y)
+        self.x_offset = x_offset
+        self.raw = True
+        self.shown = None
+        self.draw(0, len(self.y))
+        ax.callbacks.connect("xlim_changed", self.on_xlim_changed)
+
+    def buckets(self):
+        return max(int(self.ax.get_window_extent().width), 1)
+
+    def visible(self):
+        low, high = self.ax.get_xlim()
+        start = int(np.floor(low)) - self.x_offset
+        stop = int(np.ceil(high)) - self.x_offset + 1
+        return start, stop
+
+    def decimate(self, start, stop):
+        decimate = stored_decimate if hasattr(self.y, "block_range") else minmax_decimate
+        indices, values = decimate(self.y, start, stop, self.buckets())
+        self.raw = len(indices) == max(0, min(len(self.y), stop) - max(0, start))
+        return indices + self.x_offset, values
+
+    def on_xlim_changed(self, ax):
+        # Autoscaling re-emits the same limits; only redraw on a real change
+        shown = (*self.visible(), self.buckets())
+        if shown == self.shown:
+            return
+        self.shown = shown
+        self.draw(*shown[:2])
+        ax.figure.canvas.draw_idle()
+
+    def draw(self, start, stop):
+        raise NotImplementedError
+
+class DecimatedLine(DecimatedSeries):
+    def __init__(self, ax, y, x_offset=1, marker=None, **kwargs):
+        self.marker = marker
+        (self.line,) = ax.plot([], [], **kwargs)
+        super().__init__(ax, y, x_offset)
+        ax.relim()
+        ax.autoscale_view()
+
+    def draw(self, start, stop):
+        x, y = self.decimate(start, stop)
+        self.line.set_data(x, y)
+        show_markers = self.marker and self.raw and len(x) <= MARKER_LIMIT
+        self.line.set_marker(self.marker if show_markers else "")
+
+class DecimatedArea(DecimatedSeries):
+    def __init__(self, ax, y, x_offset=1, **kwargs):
+        self.kwargs = kwargs
+        self.collection = None
+        super().__init__(ax, y, x_offset)
+
+    def draw(self, start, stop):
+        # The filled area only needs the upper envelope of each bucket
+        x, y = self.decimate(start, stop)
+        if not self.raw:
+            x, y = x[1::2], y[1::2]
+        if self.collection is not None:
+            self.collection.remove()
+            # Keep a single legend entry across redraws
+            self.kwargs.pop("label", None)
+        self.collection = self.ax.fill_between(x, y, **self.kwargs)
+
+def frame_matrix(log, start, stop):
+    # (frame slot x step) matrix of resident pages for steps [start, stop) of
+    # an EventLog, as a masked array with empty slots masked out. Each slot's
+    # row is a forward fill of the pages loaded into it.
+    stop = min(stop, len(log))
+    width = max(stop - start, 0)
+    initial = log.frames_at(start - 1) if start > 0 else [None] * log.frame_size
+    pages = as_numpy(log.pages[start:stop])
+    loaded = as_numpy(log.kinds[start:stop]) != HIT
+    slots = as_numpy(log.slots[start:stop])
+    positions = np.arange(width)
+    matrix = np.zeros((log.frame_size, width), dtype=np.int64)
+    mask = np.ones((log.frame_size, width), dtype=bool)
+    for slot in range(log.frame_size):
+        last = np.maximum.accumulate(np.where(loaded & (slots == slot), positions, -1))
+        have = last >= 0
+        matrix[slot, have] = pages[last[have]]
+        mask[slot, have] = False
+        if initial[slot] is not None:
+            matrix[slot, ~have] = initial[slot]
+            mask[slot, ~have] = False
+    return np.ma.masked_array(matrix, mask)
+
+class FrameStateHeatmap:
+    # Draws a window of frame states as a single image: one row per frame
+    # slot, one column per step. Page labels are added only once few enough
+    # cells are visible to read them.
+    def __init__(self, ax, log, start=0, width=200, colormap="tab20"):
+        self.ax = ax
+        self.log = log
+        self.pages = distinct_pages(log.pages)
+        cmap = matplotlib.colormaps.get_cmap(colormap)
+        self.cmap = ListedColormap(cmap(np.linspace(0, 1, max(len(self.pages), 1))))
+        self.cmap.set_bad("#FFFFFF")
+        self.image = None
+        self.labels = []
+        self.set_window(start, width)
+        ax.callbacks.connect("xlim_changed", self.update_labels)
+        ax.callbacks.connect("ylim_changed", self.update_labels)
+
+    def set_window(self, start, width):
+        self.start = max(0, min(start, len(self.log) - 1))
+        self.stop = min(self.start + width, len(self.log))
+        self.matrix = frame_matrix(self.log, self.start, self.stop)
+        # Colour by the page's rank so colours stay fixed while scrolling
+        ranks = np.ma.masked_array(np.searchsorted(self.pages, self.matrix.data),
+                                   self.matrix.mask)
+        extent = (self.start + 0.5, self.stop + 0.5, -0.5, self.log.frame_size - 0.5)
+        if self.image is None:
+            self.image = self.ax.imshow(ranks, cmap=self.cmap, aspect="auto",
+                                        origin="lower", interpolation="nearest",
+                                        extent=extent, vmin=0,
+                                        vmax=max(len(self.pages) - 1, 1))
+        else:
+            self.image.set_data(ranks)
+            self.image.set_extent(extent)
+        self.ax.set_xlim(extent[0], extent[1])
+        self.ax.set_ylim(extent[2], extent[3])
+        self.update_labels()
+
+    def update_labels(self, ax=None):
+        for label in self.labels:
+            label.remove()
+        self.labels = []
+        low, high = self.ax.get_xlim()
+        bottom, top = self.ax.get_ylim()
+        first = max(int(np.ceil(low - 0.5)), self.start + 1)
+        last = min(int(np.floor(high + 0.5)), self.stop)
+        rows = range(max(int(np.ceil(bottom)), 0), min(int(np.floor(top)) + 1, self.log.frame_size))
+        columns = last - first + 1
+        if columns <= 0 or not rows or columns * len(rows) > LABEL_LIMIT:
+            return
+        box = self.ax.get_window_extent()
+        digits = max(len(str(self.pages[0])), len(str(self.pages[-1])))
+        if (box.width / (high - low) < LABEL_CHAR_PIXELS * digits + 2
+                or box.height / (top - bottom) < LABEL_MIN_HEIGHT):
+            return
+        for step in range(first, last + 1):
+            column = step - 1 - self.start
+            for slot in rows:
+                if not self.matrix.mask[slot, column]:
+                    self.labels.append(self.ax.text(step, slot, str(self.matrix.data[slot, column]),
+                                                    ha='center', va='center', fontsize=8,
+                                                    color="#000000", clip_on=True))
@@ -0,0 +1,656 @@
+import heapq
+from array import array
+from collections import OrderedDict
+
+# Page-replacement policies behind one interface, and the registry that the
+# simulators, GUIs and comparisons take their algorithm lists from.
+#
+# A policy tracks which pages are resident in frame_size frames. The engines
+# call access(page) once per reference; it returns True on a hit, and on a
+# fault loads the page, leaving the evicted page (or None) in self.victim.
+# The default access() is built from three hooks:
+#   hit(page)     update state for a resident page
+#   evict()       choose, remove and return a victim (frames are full)
+#   insert(page)  load a page that is not resident
+# count(pages) runs access() over a chunk of references and returns the
+# number of faults; policies override it with an inlined loop, which is what
+# the fault-counting engine uses. state() returns the policy's internal
+# counters for display. Policies that look ahead in the trace (Optimal) get
+# the whole trace through prepare() before the first access. Adaptive
+# policies name the quantity they tune in adaptation_label and return its
+# current value from adaptation(); the engines record it over time next to
+# the fault counts. victim_comparisons() returns how many candidates the
+# policy has examined to choose its victims so far, for profiling (see
+# profiling.py); None means one per eviction.
+
+# Algorithm name -> policy class, in menu order
+POLICIES = {}
+
+def register(cls):
+    POLICIES[cls.name] = cls
+    return cls
+
+class Policy:
+    name = None
+    adaptation_label = None
+    # True if the policy needs the whole trace up front (see prepare())
+    lookahead = False
+    # Attributes that prepare() sets and nothing changes afterwards, shared
+    # rather than copied between snapshots of a stepper
+    frozen = ()
+
+    def __init__(self, frame_size):
+        if frame_size <= 0:
+            raise ValueError("Frame size must be a positive integer")
+        self.frame_size = frame_size
+        self.victim = None
+
+    def prepare(self, reference_string):
+        pass
+
+    def __contains__(self, page):
+        raise NotImplementedError
+
+    def __len__(self):
+        raise NotImplementedError
+
+    def access(self, page):
+        if page in self:
+            self.hit(page)
+            return True
+        self.victim = self.evict() if len(self) >= self.frame_size else None
+        self.insert(page)
+        return False
+
+    def count(self, pages):
+        access = self.access
+        faults = 0
+        for page in pages:
+            if not access(page):
+                faults += 1
+        return faults
+
+    def hit(self, page):
+        pass
+
+    def evict(self):
+        raise NotImplementedError
+
+    def insert(self, page):
+        raise NotImplementedError
+
+    def state(self):
+        return {}
+
+    def adaptation(self):
+        return None
+
+    def victim_comparisons(self):
+        return None
+
+@register
+class FIFO(Policy):
+    # Ring buffer of slots plus a set for residency checks
+    name = "FIFO"
+
+    def __init__(self, frame_size):
+        super().__init__(frame_size)
+        self.ring = [None] * frame_size
+        self.resident = set()
+        self.hand = 0
+
+    def __contains__(self, page):
+        return page in self.resident
+
+    def __len__(self):
+        return len(self.resident)
+
+    def access(self, page):
+        # The default access() with the hooks inlined
+        if page in self.resident:
+            return True
+        self.victim = self.evict() if len(self.resident) >= self.frame_size else None
+        self.insert(page)
+        return False
+
+    def count(self, pages):
+        ring = self.ring
+        resident = self.resident
+        hand = self.hand
+        faults = 0
+        for page in pages:
+            if page not in resident:
+                if len(resident) >= self.frame_size:
+                    resident.discard(ring[hand])
+                ring[hand] = page
+                resident.add(page)
+                hand = (hand + 1) % self.frame_size
+                faults += 1
+        self.hand = hand
+        return faults
+
+    def evict(self):
+        victim = self.ring[self.hand]
+        self.resident.discard(victim)
+        return victim
+
+    def insert(self, page):
+        self.ring[self.hand] = page
+        self.resident.add(page)
+        self.hand = (self.hand + 1) % self.frame_size
+
+@register
+class LRU(Policy):
+    # Ordered map: least recently used page first
+    name = "LRU"
+
+    def __init__(self, frame_size):
+        super().__init__(frame_size)
+        self.frame = OrderedDict()
+
+    def __contains__(self, page):
+        return page in self.frame
+
+    def __len__(self):
+        return len(self.frame)
+
+    def access(self, page):
+        frame = self.frame
+        if page in frame:
+            frame.move_to_end(page)
+            return True
+        self.victim = frame.popitem(last=False)[0] if len(frame) >= self.frame_size else None
+        frame[page] = None
+        return False
+
+    def count(self, pages):
+        frame = self.frame
+        faults = 0
+        for page in pages:
+            if page not in frame:
+                if len(frame) >= self.frame_size:
+                    frame.popitem(last=False)
+                frame[page] = None
+                faults += 1
+            else:
+                frame.move_to_end(page) # Move to the most recently used
+        return faults
+
+    def hit(self, page):
+        self.frame.move_to_end(page) # Move to the most recently used
+
+    def evict(self):
+        return self.frame.popitem(last=False)[0]
+
+    def insert(self, page):
+        self.frame[page] = None
+
+def next_use_index(reference_string):
+    # next_use[i] is the position of the next reference to the same page, or
+    # the trace length if it is never used again. Built in one forward pass
+    # into a compact array, so streamed traces work as well as lists.
+    next_use = array('q')
+    last_seen = {}
+    for i, page in enumerate(reference_string):
+        next_use.append(0)
+        prev = last_seen.get(page)
+        if prev is not None:
+            next_use[prev] = i
+        last_seen[page] = i
+    n = len(next_use)
+    for i in last_seen.values():
+        next_use[i] = n
+    return next_use
+
+class OptimalVictims:
+    # Resident pages in a max-heap keyed by next use. Stale heap entries are
+    # skipped lazily and the heap is compacted once it outgrows the frames, so
+    # every operation stays O(log k). A stale entry's next use has already
+    # passed, so it sorts below every resident page: an eviction is a single
+    # pop, and Optimal leaves victim_comparisons() at one per eviction.
+    def __init__(self, frame_size):
+        self.next_use = {}
+        self.heap = []
+        self.limit = 2 * frame_size + 16
+
+    def __contains__(self, page):
+        return page in self.next_use
+
+    def __len__(self):
+        return len(self.next_use)
+
+    def touch(self, page, next_use):
+        self.next_use[page] = next_use
+        heapq.heappush(self.heap, (-next_use, page))
+        if len(self.heap) > self.limit:
+            self.heap = [(-n, p) for p, n in self.next_use.items()]
+            heapq.heapify(self.heap)
+
+    def pop_victim(self):
+        while True:
+            neg_next, page = heapq.heappop(self.heap)
+            if self.next_use.get(page) == -neg_next:
+                del self.next_use[page]
+                return page
+
+@register
+class Optimal(Policy):
+    # Evicts the page used furthest in the future. The lookahead comes from a
+    # pre-pass over the trace in prepare(), so the engines stream it twice.
+    name = "Optimal"
+    lookahead = True
+    frozen = ("next_use",)
+
+    def __init__(self, frame_size):
+        super().__init__(frame_size)
+        self.victims = OptimalVictims(frame_size)
+        self.next_use = None
+        self.position = 0
+
+    def prepare(self, reference_string):
+        self.next_use = next_use_index(reference_string)
+        self.position = 0
+
+    def __contains__(self, page):
+        return page in self.victims
+
+    def __len__(self):
+        return len(self.victims)
+
+    def access(self, page):
+        if self.next_use is None:
+            raise ValueError("Optimal needs the whole reference string; call prepare() first")
+        upcoming = self.next_use[self.position]
+        self.position += 1
+        victims = self.victims
+        hit = page in victims
+        if not hit:
+            self.victim = victims.pop_victim() if len(victims) >= self.frame_size else None
+        victims.touch(page, upcoming)
+        return hit
+
+    def count(self, pages):
+        if self.next_use is None:
+            raise ValueError("Optimal needs the whole reference string; call prepare() first")
+        next_use = self.next_use
+        victims = self.victims
+        faults = 0
+        for i, page in enumerate(pages, self.position):
+            if page not in victims:
+                if len(victims) >= self.frame_size:
+                    victims.pop_victim()
+                faults += 1
+            victims.touch(page, next_use[i])
+        self.position += len(pages)
+        return faults
+
+    def hit(self, page):
+        self.victims.touch(page, self.next_use[self.position - 1])
+
+    def evict(self):
+        return self.victims.pop_victim()
+
+    def insert(self, page):
+        self.victims.touch(page, self.next_use[self.position - 1])
+
+@register
+class Clock(Policy):
+    # Frames form a circular buffer with a reference bit per slot. A hit sets
+    # the bit; on a fault the hand sweeps forward clearing set bits and
+    # replaces the first page whose bit is already clear. Every bit the hand
+    # clears was set by an earlier reference, so the sweep is amortized O(1).
+    name = "CLOCK"
+    # Reference bit of a newly loaded page: CLOCK counts the load itself as
+    # a reference
+    loaded_bit = 1
+
+    def __init__(self, frame_size):
+        super().__init__(frame_size)
+        self.pages = [None] * frame_size
+        self.referenced = bytearray(frame_size)
+        self.slot_of = {}
+        self.hand = 0
+        # Slots the hand has inspected on faults
+        self.probes = 0
+
+    def __contains__(self, page):
+        return page in self.slot_of
+
+    def __len__(self):
+        return len(self.slot_of)
+
+    def count(self, pages):
+        # Hits inline; faults go through evict() and insert(), which
+        # subclasses override
+        referenced = self.referenced
+        slot_of = self.slot_of
+        faults = 0
+        for page in pages:
+            slot = slot_of.get(page)
+            if slot is None:
+                if len(slot_of) >= self.frame_size:
+                    self.evict()
+                self.insert(page)
+                faults += 1
+            else:
+                referenced[slot] = 1
+        return faults
+
+    def hit(self, page):
+        self.referenced[self.slot_of[page]] = 1
+
+    def evict(self):
+        referenced = self.referenced
+        hand = self.hand
+        probes = 1
+        while referenced[hand]:
+            referenced[hand] = 0
+            hand = (hand + 1) % self.frame_size
+            probes += 1
+        self.hand = hand
+        self.probes += probes
+        victim = self.pages[hand]
+        del self.slot_of[victim]
+        return victim
+
+    def insert(self, page):
+        # Slots fill in order; once the frames are full the hand rests on
+        # the slot just freed by evict()
+        slot = self.hand
+        self.pages[slot] = page
+        self.referenced[slot] = self.loaded_bit
+        self.slot_of[page] = slot
+        self.hand = (slot + 1) % self.frame_size
+
+    def state(self):
+        return {"hand": self.hand}
+
+    def victim_comparisons(self):
+        return self.probes
+
+@register
+class SecondChance(Clock):
+    # FIFO order, but a page referenced since it was loaded goes round once
+    # more instead of being evicted. Loaded pages start with the bit clear,
+    # so only a hit earns the second chance.
+    name = "Second-Chance"
+    loaded_bit = 0
+
+class EnhancedClock(Clock):
+    # CLOCK over (reference, dirty) bit pairs. The hand clears a set
+    # reference bit, schedules a write-back for a dirty page (clearing its
+    # dirty bit) and evicts the first page with both bits clear, so clean
+    # pages are preferred and every step still clears a bit that a reference
+    # set. Writes are reported with access(page, write=True). The trace
+    # formats only carry reads, and without writes this is plain CLOCK, so it
+    # is not registered: it is for callers that drive access() themselves.
+    name = "Enhanced-CLOCK"
+
+    def __init__(self, frame_size):
+        super().__init__(frame_size)
+        self.dirty = bytearray(frame_size)
+        self.writebacks = 0
+
+    def access(self, page, write=False):
+        hit = super().access(page)
+        if write:
+            self.dirty[self.slot_of[page]] = 1
+        return hit
+
+    def evict(self):
+        referenced = self.referenced
+        dirty = self.dirty
+        hand = self.hand
+        probes = 1
+        while referenced[hand] or dirty[hand]:
+            if referenced[hand]:
+                referenced[hand] = 0
+            else:
+                dirty[hand] = 0
+                self.writebacks += 1
+            hand = (hand + 1) % self.frame_size
+            probes += 1
+        self.hand = hand
+        self.probes += probes
+        victim = self.pages[hand]
+        del self.slot_of[victim]
+        return victim
+
+    def insert(self, page):
+        self.dirty[self.hand] = 0
+        super().insert(page)
+
+    def state(self):
+        return {"hand": self.hand, "writebacks": self.writebacks}
+
+@register
+class LFU(Policy):
+    # Least frequently used, ties broken by least recently used. Pages sit in
+    # buckets by reference count (ordered maps, oldest first) and the
+    # smallest non-empty count is tracked, so every operation is O(1).
+    name = "LFU"
+
+    def __init__(self, frame_size):
+        super().__init__(frame_size)
+        self.count_of = {}
+        self.buckets = {}
+        self.min_count = 0
+
+    def __contains__(self, page):
+        return page in self.count_of
+
+    def __len__(self):
+        return len(self.count_of)
+
+    def access(self, page):
+        count_of = self.count_of
+        if page in count_of:
+            self.hit(page)
+            return True
+        self.victim = self.evict() if len(count_of) >= self.frame_size else None
+        self.insert(page)
+        return False
+
+    def _move(self, page, count):
+        self.count_of[page] = count
+        bucket = self.buckets.get(count)
+        if bucket is None:
+            bucket = self.buckets[count] = OrderedDict()
+        bucket[page] = None
+
+    def hit(self, page):
+        count = self.count_of[page]
+        bucket = self.buckets[count]
+        del bucket[page]
+        if not bucket:
+            del self.buckets[count]
+            if self.min_count == count:
+                self.min_count = count + 1
+        self._move(page, count + 1)
+
+    def evict(self):
+        count = self.min_count
+        bucket = self.buckets[count]
+        victim = bucket.popitem(last=False)[0]
+        if not bucket:
+            del self.buckets[count]
+        del self.count_of[victim]
+        self.evicted(count)
+        return victim
+
+    def evicted(self, count):
+        pass
+
+    def initial_count(self):
+        return 1
+
+    def insert(self, page):
+        count = self.initial_count()
+        self._move(page, count)
+        # Every other page has a count of at least this one's once the
+        # smallest bucket has been emptied by evict()
+        if count < self.min_count or self.min_count not in self.buckets:
+            self.min_count = count
+
+    def state(self):
+        return {"min_count": self.min_count}
+
+@register
+class LFUAging(LFU):
+    # LFU with dynamic aging (LFU-DA): a loaded page starts one above the
+    # count of the last page evicted, instead of at 1. The entry level rises
+    # as long-lived pages are displaced, so pages that were popular in an
+    # earlier phase eventually age out. Counts never need rescaling, so it
+    # stays O(1) per reference.
+    name = "LFU-Aging"
+
+    def __init__(self, frame_size):
+        super().__init__(frame_size)
+        self.age = 0
+
+    def evicted(self, count):
+        self.age = count
+
+    def initial_count(self):
+        return self.age + 1
+
+    def state(self):
+        return {"min_count": self.min_count, "age": self.age}
+
+@register
+class ARC(Policy):
+    # Adaptive Replacement Cache (Megiddo and Modha). T1 holds pages seen
+    # once recently and T2 pages seen at least twice; B1 and B2 are ghost
+    # lists remembering pages recently evicted from each. A hit in a ghost
+    # list moves the target size p of T1 towards the list that would have
+    # kept the page. All four lists are ordered maps (LRU first), so every
+    # step is O(1).
+    name = "ARC"
+    adaptation_label = "Target T1 size (p)"
+
+    def __init__(self, frame_size):
+        super().__init__(frame_size)
+        self.t1 = OrderedDict()
+        self.t2 = OrderedDict()
+        self.b1 = OrderedDict()
+        self.b2 = OrderedDict()
+        self.p = 0
+
+    def __contains__(self, page):
+        return page in self.t1 or page in self.t2
+
+    def __len__(self):
+        return len(self.t1) + len(self.t2)
+
+    def access(self, page):
+        t1, t2, b1, b2 = self.t1, self.t2, self.b1, self.b2
+        if page in t1:
+            del t1[page]
+            t2[page] = None
+            return True
+        if page in t2:
+            t2.move_to_end(page)
+            return True
+        c = self.frame_size
+        if page in b1:
+            self.p = min(c, self.p + max(len(b2) / len(b1), 1))
+            self.victim = self.evict(page)
+            del b1[page]
+            t2[page] = None
+            return False
+        if page in b2:
+            self.p = max(0, self.p - max(len(b1) / len(b2), 1))
+            self.victim = self.evict(page)
+            del b2[page]
+            t2[page] = None
+            return False
+        self.victim = None
+        if len(t1) + len(b1) == c:
+            if len(t1) < c:
+                b1.popitem(last=False)
+                self.victim = self.evict(page)
+            else:
+                self.victim = t1.popitem(last=False)[0]
+        elif len(t1) + len(t2) + len(b1) + len(b2) >= c:
+            if len(t1) + len(t2) + len(b1) + len(b2) == 2 * c:
+                b2.popitem(last=False)
+            self.victim = self.evict(page)
+        t1[page] = None
+        return False
+
+    def evict(self, page=None):
+        # REPLACE from the paper: demote the LRU page of T1 or T2 to its
+        # ghost list, depending on whether T1 is over its target size
+        t1 = self.t1
+        if t1 and (len(t1) > self.p or (page in self.b2 and len(t1) == self.p)):
+            victim = t1.popitem(last=False)[0]
+            self.b1[victim] = None
+        else:
+            victim = self.t2.popitem(last=False)[0]
+            self.b2[victim] = None
+        return victim
+
+    def state(self):
+        return {"p": self.p, "t1": len(self.t1), "t2": len(self.t2),
+                "b1": len(self.b1), "b2": len(self.b2)}
+
+    def adaptation(self):
+        return self.p
+
+@register
+class TwoQ(Policy):
+    # Full 2Q (Johnson and Shasha). New pages enter A1in, a FIFO holding a
+    # quarter of the frames; pages pushed out of it are remembered in the
+    # ghost FIFO A1out (half as many entries as frames). Only a page
+    # referenced again while in A1out is promoted to Am, an LRU list, so a
+    # one-off scan never displaces Am. All lists are ordered maps.
+    name = "2Q"
+    adaptation_label = "A1in size"
+    in_share = 0.25
+    out_share = 0.5
+
+    def __init__(self, frame_size):
+        super().__init__(frame_size)
+        self.k_in = max(1, int(frame_size * self.in_share))
+        self.k_out = max(1, int(frame_size * self.out_share))
+        self.a1in = OrderedDict()
+        self.a1out = OrderedDict()
+        self.am = OrderedDict()
+
+    def __contains__(self, page):
+        return page in self.am or page in self.a1in
+
+    def __len__(self):
+        return len(self.am) + len(self.a1in)
+
+    def access(self, page):
+        am = self.am
+        if page in am:
+            am.move_to_end(page)
+            return True
+        if page in self.a1in:
+            return True
+        full = len(am) + len(self.a1in) >= self.frame_size
+        self.victim = self.evict() if full else None
+        if page in self.a1out:
+            del self.a1out[page]
+            am[page] = None
+        else:
+            self.a1in[page] = None
+        return False
+
+    def evict(self):
+        a1in = self.a1in
+        if len(a1in) > self.k_in or not self.am:
+            victim = a1in.popitem(last=False)[0]
+            self.a1out[victim] = None
+            if len(self.a1out) > self.k_out:
+                self.a1out.popitem(last=False)
+            return victim
+        return self.am.popitem(last=False)[0]
+
+    def state(self):
+        return {"a1in": len(self.a1in), "a1out": len(self.a1out), "am": len(self.am)}
+
+    def adaptation(self):
+        return len(self.a1in)
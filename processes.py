@@ -0,0 +1,429 @@
+import argparse
+import csv
+import json
+import sys
+from array import array
+from collections import Counter, defaultdict
+from time import perf_counter
+from policies import POLICIES
+from profiling import Profile
+from traces import iter_chunks, open_trace
+
+# Several processes sharing one pool of frames. A multi-process trace
+# interleaves the references of all processes as flat pid, page pairs: text
+# traces hold one "pid page" pair per line, binary traces (see traces.py)
+# alternate the two values, and in memory any flat sequence will do.
+#
+#   python processes.py mix.txt LRU 4096 --scope local --allocation proportional
+#   python processes.py mix.bin ARC 65536 --priority 7=4 12=2 --allocation priority --scope local
+#
+# With global replacement one policy manages every frame, so a fault may
+# evict a page of any process. With local replacement every process has
+# its own policy over a fixed share of the frames: an equal share, one
+# proportional to its size (the distinct pages it references), or one
+# proportional to its priority (1 unless given). Per-process counters are
+# kept in lists indexed by process, and local replacement hands each
+# process's references in a chunk to its policy in one batch, so the cost
+# per reference does not grow with the number of processes.
+
+SCOPES = ("global", "local")
+ALLOCATIONS = ("equal", "proportional", "priority")
+
+# Under global replacement pages are keyed by page << PROCESS_BITS | index,
+# so that processes' page numbers do not collide and the owner of an evicted
+# page is its low bits
+PROCESS_BITS = 32
+PROCESS_MASK = (1 << PROCESS_BITS) - 1
+
+def iter_pairs(trace):
+    # (pids, pages) lists per chunk of a flat multi-process trace. Chunks of
+    # a memory-mapped trace are copied out, so that nothing keeps the mapping
+    # open if the run fails.
+    carry = None
+    for chunk in iter_chunks(trace):
+        if hasattr(chunk, "tolist"):
+            chunk = chunk.tolist()
+        if carry is not None:
+            chunk = [carry, *chunk]
+            carry = None
+        if len(chunk) % 2:
+            carry = chunk[-1]
+            chunk = chunk[:-1]
+        yield chunk[0::2], chunk[1::2]
+    if carry is not None:
+        raise ValueError("The trace ends with a process ID but no page; "
+                         "a multi-process trace holds pid, page pairs")
+
+def interleave(traces, quantum=1):
+    # A flat multi-process trace from {pid: pages}, taking up to quantum
+    # references from each process in turn (round robin) until all are done
+    iterators = {pid: iter(pages) for pid, pages in traces.items()}
+    out = []
+    while iterators:
+        for pid in list(iterators):
+            taken = 0
+            for page in iterators[pid]:
+                out += (pid, page)
+                taken += 1
+                if taken == quantum:
+                    break
+            else:
+                del iterators[pid]
+    return out
+
+def allocate(frame_size, weights):
+    # Splits frame_size frames between processes in proportion to weights
+    # ({pid: weight}), one frame at least each; fractions go to the largest
+    # remainders, so the shares add up to frame_size exactly
+    if len(weights) > frame_size:
+        raise ValueError(f"{len(weights):,} processes need at least as many frames, "
+                         f"got {frame_size:,}")
+    for pid, weight in weights.items():
+        if weight <= 0:
+            raise ValueError(f"Process {pid} has weight {weight}; weights must be positive")
+    spare = frame_size - len(weights)
+    total = sum(weights.values())
+    shares = {}
+    remainders = []
+    for pid, weight in weights.items():
+        whole, remainder = divmod(spare * weight, total)
+        shares[pid] = 1 + int(whole)
+        remainders.append((remainder, pid))
+    left = frame_size - sum(shares.values())
+    remainders.sort(key=lambda item: item[0], reverse=True)
+    for _, pid in remainders[:left]:
+        shares[pid] += 1
+    return shares
+
+class Process:
+    # Counters of one process. timeline() is its cumulative fault count at
+    # the end of every chunk of the trace in which it ran.
+    __slots__ = ("pid", "index", "frames", "references", "faults", "resident", "policy",
+                 "positions", "fault_counts")
+
+    def __init__(self, pid, index, frames=None, policy=None):
+        self.pid = pid
+        self.index = index
+        # Frames allotted under local replacement; None under global
+        self.frames = frames
+        self.references = 0
+        self.faults = 0
+        # Frames holding its pages at the end of the run
+        self.resident = 0
+        self.policy = policy
+        self.positions = array('q')
+        self.fault_counts = array('q')
+
+    def fault_rate(self):
+        return self.faults / self.references if self.references else 0.0
+
+    def timeline(self):
+        return list(zip(self.positions, self.fault_counts))
+
+    def as_dict(self):
+        return {"pid": self.pid, "frames": self.frames, "references": self.references,
+                "faults": self.faults, "fault_rate": self.fault_rate(),
+                "resident": self.resident}
+
+class MultiProcessReplacement:
+    # One pass of a policy over a multi-process trace with frame_size frames
+    # in all. After run(), processes lists every process in order of first
+    # reference, and timeline holds (position, total faults) at every chunk
+    # boundary as in algorithms.PageReplacement. priorities ({pid: weight})
+    # is used by priority allocation; set timelines=False to skip the
+    # per-process timelines of very long runs. progress and profile are as
+    # for the single-process engines.
+    def __init__(self, frame_size, trace, scope="global", allocation="equal",
+                 priorities=None, timelines=True, progress=None, profile=None):
+        if frame_size <= 0:
+            raise ValueError("Frame size must be a positive integer")
+        if scope not in SCOPES:
+            raise ValueError(f"Unknown replacement scope: {scope}")
+        if allocation not in ALLOCATIONS:
+            raise ValueError(f"Unknown frame allocation: {allocation}")
+        self.frame_size = frame_size
+        self.trace = trace
+        self.scope = scope
+        self.allocation = allocation
+        self.priorities = priorities or {}
+        self.timelines = timelines
+        self.progress = progress
+        self.profile = profile
+        self.page_faults = 0
+        self.timeline = []
+        self.processes = []
+        self.index_of = {}
+
+    def process(self, pid):
+        return self.processes[self.index_of[pid]]
+
+    def run(self, algo):
+        # Total fault count of a registered policy over all processes
+        if algo not in POLICIES:
+            raise ValueError(f"Unknown algorithm: {algo}")
+        self.page_faults = 0
+        self.timeline = []
+        self.processes = []
+        self.index_of = {}
+        profile = self.profile
+        chunks = iter_pairs(self.trace)
+        if profile:
+            chunks = profile.timed("read", chunks)
+        if self.scope == "global":
+            faults = self._run_global(algo, chunks)
+        else:
+            faults = self._run_local(algo, chunks)
+        self.page_faults = faults
+        if profile:
+            self._count(faults)
+        return faults
+
+    def _add(self, pid, frames=None, policy=None):
+        index = len(self.processes)
+        self.index_of[pid] = index
+        self.processes.append(Process(pid, index, frames, policy))
+        return index
+
+    def _keys(self):
+        # The global policy's view of the trace, for lookahead policies
+        index_of = self.index_of
+        for pids, pages in iter_pairs(self.trace):
+            for pid, page in zip(pids, pages):
+                index = index_of.get(pid)
+                if index is None:
+                    index = self._add(pid)
+                yield (page << PROCESS_BITS) | index
+
+    def _run_global(self, algo, chunks):
+        policy = POLICIES[algo](self.frame_size)
+        profile = self.profile
+        if policy.lookahead:
+            if profile:
+                with profile.phase("prepare"):
+                    policy.prepare(self._keys())
+            else:
+                policy.prepare(self._keys())
+        self.policy = policy
+        index_of = self.index_of
+        # Per-process counters by index, grown as processes appear
+        references = [0] * len(self.processes)
+        faults = [0] * len(self.processes)
+        resident = [0] * len(self.processes)
+        access = policy.access
+        total = 0
+        position = 0
+        for pids, pages in chunks:
+            if profile:
+                started = perf_counter()
+            for pid, page in zip(pids, pages):
+                index = index_of.get(pid)
+                if index is None:
+                    index = self._add(pid)
+                    references.append(0)
+                    faults.append(0)
+                    resident.append(0)
+                if not access((page << PROCESS_BITS) | index):
+                    total += 1
+                    faults[index] += 1
+                    resident[index] += 1
+                    victim = policy.victim
+                    if victim is not None:
+                        resident[victim & PROCESS_MASK] -= 1
+            if profile:
+                profile.add_time("simulate", perf_counter() - started)
+            position += len(pids)
+            for pid, count in Counter(pids).items():
+                index = index_of[pid]
+                references[index] += count
+                if self.timelines:
+                    process = self.processes[index]
+                    process.positions.append(position)
+                    process.fault_counts.append(faults[index])
+            self._report(position, total)
+        for process in self.processes:
+            process.references = references[process.index]
+            process.faults = faults[process.index]
+            process.resident = resident[process.index]
+        return total
+
+    def _scan(self, lookahead):
+        # Pre-pass for local replacement: the processes in order of first
+        # reference, their sizes for proportional allocation, and for
+        # lookahead policies each process's own references
+        order = {}
+        distinct = defaultdict(set) if self.allocation == "proportional" else None
+        own_pages = defaultdict(lambda: array('q')) if lookahead else None
+        for pids, pages in iter_pairs(self.trace):
+            order.update(dict.fromkeys(pids))
+            if distinct is not None:
+                for pid, page in set(zip(pids, pages)):
+                    distinct[pid].add(page)
+            if own_pages is not None:
+                for pid, page in zip(pids, pages):
+                    own_pages[pid].append(page)
+        if self.allocation == "proportional":
+            weights = {pid: len(distinct[pid]) for pid in order}
+        elif self.allocation == "priority":
+            weights = {pid: self.priorities.get(pid, 1) for pid in order}
+        else:
+            weights = dict.fromkeys(order, 1)
+        return allocate(self.frame_size, weights) if weights else {}, own_pages
+
+    def _run_local(self, algo, chunks):
+        policy_class = POLICIES[algo]
+        profile = self.profile
+        if profile:
+            with profile.phase("prepare"):
+                shares, own_pages = self._scan(policy_class.lookahead)
+        else:
+            shares, own_pages = self._scan(policy_class.lookahead)
+        for pid, frames in shares.items():
+            policy = policy_class(frames)
+            if own_pages is not None:
+                policy.prepare(own_pages.pop(pid))
+            self._add(pid, frames, policy)
+        processes = self.processes
+        index_of = self.index_of
+        total = 0
+        position = 0
+        for pids, pages in chunks:
+            if profile:
+                started = perf_counter()
+            # Each process's references in this chunk, in order, as one batch
+            groups = defaultdict(list)
+            for pid, page in zip(pids, pages):
+                groups[pid].append(page)
+            for pid, group in groups.items():
+                index = index_of.get(pid)
+                if index is None:
+                    raise ValueError(f"Process {pid} was not in the trace when frames were allocated")
+                process = processes[index]
+                faults = process.policy.count(group)
+                process.references += len(group)
+                process.faults += faults
+                total += faults
+                if self.timelines:
+                    process.positions.append(position + len(pids))
+                    process.fault_counts.append(process.faults)
+            if profile:
+                profile.add_time("simulate", perf_counter() - started)
+            position += len(pids)
+            self._report(position, total)
+        for process in processes:
+            process.resident = len(process.policy)
+        return total
+
+    def _report(self, position, total):
+        self.timeline.append((position, total))
+        if self.progress:
+            self.progress(position)
+
+    def _count(self, faults):
+        # Profile counters of the finished run (see profiling.py)
+        if self.scope == "global":
+            runs = [(self.policy, faults)]
+        else:
+            runs = [(process.policy, process.faults) for process in self.processes]
+        evictions = comparisons = 0
+        for policy, policy_faults in runs:
+            evicted = policy_faults - len(policy)
+            probes = policy.victim_comparisons()
+            evictions += evicted
+            comparisons += evicted if probes is None else probes
+            if probes is None:
+                self.profile.comparisons_estimated = True
+        profile = self.profile
+        profile.add("references", sum(process.references for process in self.processes))
+        profile.add("faults", faults)
+        profile.add("evictions", evictions)
+        profile.add("victim comparisons", comparisons)
+
+FIELDS = ["pid", "frames", "references", "faults", "fault_rate", "resident"]
+
+def parse_priorities(values):
+    # {pid: weight} from values such as "7=4"
+    priorities = {}
+    for value in values:
+        pid, _, weight = value.partition("=")
+        try:
+            priorities[int(pid)] = float(weight)
+        except ValueError:
+            raise ValueError(f"Invalid priority {value!r}; expected PID=WEIGHT") from None
+        if priorities[int(pid)] <= 0:
+            raise ValueError(f"Priority of process {pid} must be positive")
+    return priorities
+
+def print_table(sim, top):
+    processes = sorted(sim.processes, key=lambda process: process.faults, reverse=True)
+    shown = processes[:top] if top else processes
+    print(f"{'PID':>10} {'Frames':>8} {'References':>14} {'Faults':>12} {'Rate':>8} {'Resident':>9}")
+    for process in shown:
+        frames = "-" if process.frames is None else f"{process.frames:,}"
+        print(f"{process.pid:>10} {frames:>8} {process.references:>14,} {process.faults:>12,} "
+              f"{process.fault_rate():>8.2%} {process.resident:>9,}")
+    if len(shown) < len(processes):
+        print(f"... {len(processes) - len(shown):,} more processes")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulate processes sharing a pool of frames")
+    parser.add_argument("trace", help="multi-process trace file of pid, page pairs")
+    parser.add_argument("algorithm", choices=list(POLICIES))
+    parser.add_argument("frames", type=int, help="frames shared by all processes")
+    parser.add_argument("--scope", choices=SCOPES, default="global",
+                        help="replace among all frames or within each process's own (default: global)")
+    parser.add_argument("--allocation", choices=ALLOCATIONS, default="equal",
+                        help="how local replacement divides the frames (default: equal)")
+    parser.add_argument("--priority", nargs="+", default=[], metavar="PID=WEIGHT",
+                        help="process weights for priority allocation (default 1)")
+    parser.add_argument("--format", choices=["table", "csv", "jsonl"], default="table")
+    parser.add_argument("--top", type=int, default=20,
+                        help="processes shown in the table, most faults first (0: all)")
+    parser.add_argument("--profile", action="store_true",
+                        help="print time per phase, evictions, comparisons and peak memory")
+    args = parser.parse_args(argv)
+    if args.frames <= 0:
+        parser.error("frames must be a positive integer")
+    try:
+        priorities = parse_priorities(args.priority)
+    except ValueError as e:
+        parser.error(str(e))
+
+    started = perf_counter()
+    profile = Profile() if args.profile else None
+    try:
+        with open_trace(args.trace) as trace:
+            sim = MultiProcessReplacement(args.frames, trace, args.scope, args.allocation,
+                                          priorities, timelines=False, profile=profile)
+            if profile:
+                with profile:
+                    faults = sim.run(args.algorithm)
+            else:
+                faults = sim.run(args.algorithm)
+    except (OSError, ValueError) as e:
+        print(e, file=sys.stderr)
+        return 1
+    seconds = perf_counter() - started
+    if profile:
+        print(profile.format(), file=sys.stderr)
+
+    references = sum(process.references for process in sim.processes)
+    summary = (f"{args.algorithm}, {args.scope} replacement, {args.frames:,} frames: "
+               f"{len(sim.processes):,} processes, {references:,} references, {faults:,} faults "
+               f"({faults / references if references else 0:.2%}) in {seconds:.1f} s")
+    if args.format == "table":
+        print(summary)
+        print_table(sim, args.top)
+        return 0
+    if args.format == "csv":
+        writer = csv.DictWriter(sys.stdout, FIELDS)
+        writer.writeheader()
+        for process in sim.processes:
+            writer.writerow(process.as_dict())
+    else:
+        for process in sim.processes:
+            print(json.dumps(process.as_dict()))
+    print(summary, file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
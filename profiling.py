@@ -0,0 +1,211 @@
+import argparse
+import json
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Opt-in measurements of a simulation and of the views that render it: wall
+# time per phase, counters (references, faults, evictions, victim-search
+# comparisons) and peak memory. The engines take a Profile as profile=...;
+# without one they pay a single `if profile` test per chunk. Profile one
+# trace from the command line:
+#
+#   python profiling.py trace.bin LRU 64
+#   python profiling.py trace.bin Optimal 1024 --engine record --json
+#
+# Phases the engines use:
+#   prepare    the lookahead pre-pass of Optimal
+#   read       producing chunks of the trace (file reading, parsing)
+#   simulate   running the policy, and with the recording engine logging
+#              every step
+#   write      streaming recorded steps into a result file
+# The GUI adds "render: <view>" phases for its plots and tables.
+
+class Profile:
+    # Peak memory is the process's peak resident set size, unless
+    # trace_memory is set, in which case tracemalloc measures the Python
+    # allocations made between start() and stop() (slower, but per run)
+    def __init__(self, trace_memory=False):
+        self.trace_memory = trace_memory
+        self.phases = {}
+        self.counters = {}
+        self.wall_seconds = 0.0
+        self.peak_bytes = None
+        # True if a policy did not count its victim search, so that
+        # "victim comparisons" includes one per eviction in its place
+        self.comparisons_estimated = False
+        self._started = None
+        self._tracing = False
+        self._before = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def start(self):
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._tracing = True
+        self._started = time.perf_counter()
+
+    def stop(self):
+        if self._started is not None:
+            self.wall_seconds += time.perf_counter() - self._started
+            self._started = None
+        if self._tracing:
+            self.peak_bytes = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            self._tracing = False
+        elif not self.trace_memory:
+            self.peak_bytes = peak_rss()
+
+    @contextmanager
+    def phase(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - started)
+
+    def add_time(self, name, seconds):
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    def add(self, name, value=1):
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def timed(self, name, iterable):
+        # Yields the items of iterable, charging the time spent producing
+        # them to phase name
+        iterator = iter(iterable)
+        while True:
+            started = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                self.add_time(name, time.perf_counter() - started)
+                return
+            self.add_time(name, time.perf_counter() - started)
+            yield item
+
+    def begin_run(self, policy):
+        # Call before feeding policy, and end_run() after; the counters cover
+        # just the references in between, so a resumed run counts only its
+        # own
+        self._before = (len(policy), policy.victim_comparisons())
+
+    def end_run(self, policy, references, faults):
+        resident, comparisons = self._before or (0, None)
+        # Every fault loads a page; those that did not fill a free frame
+        # evicted one
+        evictions = faults - (len(policy) - resident)
+        after = policy.victim_comparisons()
+        if after is None:
+            self.comparisons_estimated = True
+        self.add("references", references)
+        self.add("faults", faults)
+        self.add("evictions", evictions)
+        self.add("victim comparisons", evictions if after is None else after - (comparisons or 0))
+        self._before = None
+
+    def refs_per_second(self):
+        # Throughput of the policy itself, excluding reading and rendering
+        seconds = self.phases.get("simulate", 0.0)
+        references = self.counters.get("references", 0)
+        return references / seconds if seconds > 0 else None
+
+    def as_dict(self):
+        return {"wall_seconds": self.wall_seconds, "phases": dict(self.phases),
+                "counters": dict(self.counters), "refs_per_sec": self.refs_per_second(),
+                "comparisons_estimated": self.comparisons_estimated,
+                "peak_bytes": self.peak_bytes}
+
+    def rows(self):
+        # (measure, formatted value) pairs for display
+        rows = [("Wall time", format_seconds(self.wall_seconds))]
+        rows += [(f"Phase: {name}", format_seconds(seconds)) for name, seconds in self.phases.items()]
+        for name, value in self.counters.items():
+            label = name.capitalize()
+            if name == "victim comparisons" and self.comparisons_estimated:
+                label += " (one per eviction)"
+            rows.append((label, f"{value:,}"))
+        evictions = self.counters.get("evictions")
+        if evictions and not self.comparisons_estimated:
+            rows.append(("Comparisons per eviction",
+                         f"{self.counters['victim comparisons'] / evictions:.2f}"))
+        rate = self.refs_per_second()
+        if rate is not None:
+            rows.append(("Throughput", f"{rate:,.0f} refs/s"))
+        if self.peak_bytes is not None:
+            label = "Peak traced memory" if self.trace_memory else "Peak resident memory"
+            rows.append((label, f"{self.peak_bytes / 2**20:,.1f} MB"))
+        return rows
+
+    def format(self):
+        rows = self.rows()
+        width = max(len(measure) for measure, _ in rows)
+        return "\n".join(f"{measure:<{width}}  {value}" for measure, value in rows)
+
+def format_seconds(seconds):
+    return f"{seconds * 1000:,.1f} ms" if seconds < 1 else f"{seconds:,.3f} s"
+
+def peak_rss():
+    # Peak resident set size of this process in bytes, or None if unknown
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return peak if sys.platform == "darwin" else peak * 1024
+
+def profile_run(reference_string, frame_size, algo, engine="count", trace_memory=False):
+    # Profile of one run of algo, with the fault-counting engine or the
+    # recording engine that logs every step
+    from algorithms import PageReplacement as CountingEngine
+    from simulation import PageReplacement as RecordingEngine
+    profile = Profile(trace_memory)
+    with profile:
+        if engine == "count":
+            CountingEngine(frame_size, reference_string, profile=profile).run(algo)
+        else:
+            RecordingEngine(frame_size, reference_string, profile=profile).run(algo)
+    return profile
+
+def main(argv=None):
+    from policies import POLICIES
+    from traces import open_trace
+    parser = argparse.ArgumentParser(description="Profile one page-replacement simulation")
+    parser.add_argument("trace", help="trace file")
+    parser.add_argument("algorithm", choices=list(POLICIES))
+    parser.add_argument("frames", type=int)
+    parser.add_argument("--engine", choices=["count", "record"], default="count",
+                        help="fault counting only, or recording every step (default: count)")
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="measure the run's own allocations with tracemalloc (slower)")
+    parser.add_argument("--json", action="store_true", help="print the profile as JSON")
+    args = parser.parse_args(argv)
+    if args.frames <= 0:
+        parser.error("frames must be a positive integer")
+    try:
+        with open_trace(args.trace) as trace:
+            profile = profile_run(trace, args.frames, args.algorithm, args.engine,
+                                  args.trace_memory)
+    except (OSError, ValueError) as e:
+        print(e, file=sys.stderr)
+        return 1
+    if args.json:
+        print(json.dumps({"trace": args.trace, "algo": args.algorithm, "frames": args.frames,
+                          "engine": args.engine, **profile.as_dict()}))
+    else:
+        print(profile.format())
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,302 @@
+import re
+import numpy as np
+from traces import DEFAULT_CHUNK_SIZE
+
+# Parser for reference strings typed or pasted into the GUIs. Besides plain
+# whitespace- or comma-separated page numbers it accepts a compact grammar:
+#
+#   1..500          pages 1 to 500 (descending if the second is smaller)
+#   1..500*20       that range twenty times
+#   (3 4 5)*1000    a group repeated, groups nest
+#   # note          a comment, up to the end of the line
+#
+# Runs of plain numbers are tokenized in bulk with NumPy. Ranges and
+# repetitions are kept as a tree that expands lazily, chunk by chunk, so
+# the result can be fed to the engines without building the full list.
+
+# Decimal digits in the longest page number that fits an int64
+MAX_DIGITS = 18
+
+_POW10 = 10 ** np.arange(MAX_DIGITS, dtype=np.int64)
+_STRUCTURE = re.compile(r"\.\.|[()*]")
+_COMMENT = re.compile(r"#[^\n]*")
+
+class ParseError(ValueError):
+    # position is the 0-based index of the offending character
+    def __init__(self, message, position):
+        super().__init__(f"{message} at position {position + 1}")
+        self.message = message
+        self.position = position
+
+def parse_numbers(data, offset=0):
+    # Returns (values, starts): the integers in a run of separated numbers
+    # and where each starts, as int64 arrays. offset is added to positions.
+    buf = np.frombuffer(data, dtype=np.uint8)
+    if not len(buf):
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty
+    digit = (buf >= 48) & (buf <= 57)
+    separator = (buf == 32) | (buf == 44) | ((buf >= 9) & (buf <= 13))
+    minus = buf == 45
+    after_separator = np.concatenate(([True], separator[:-1]))
+    before_digit = np.concatenate((digit[1:], [False]))
+    valid = digit | separator | (minus & after_separator & before_digit)
+    if not valid.all():
+        position = int(np.argmin(valid))
+        character = data[position:position + 4].decode(errors="ignore")[:1] or chr(data[position])
+        raise ParseError(f"Unexpected character {character!r}", offset + position)
+
+    starts = np.flatnonzero((digit | minus) & after_separator)
+    ends = np.flatnonzero(digit & ~before_digit) + 1
+    if not len(ends):
+        return ends, ends
+    negative = minus[starts]
+    digits = ends - starts - negative
+    if len(digits) and digits.max() > MAX_DIGITS:
+        position = int(starts[np.argmax(digits > MAX_DIGITS)])
+        raise ParseError("Page number too large", offset + position)
+
+    # Numbers are summed one decimal place at a time, right to left, so the
+    # work is per number and place rather than per byte
+    values = np.zeros(len(ends), dtype=np.int64)
+    last = ends - 1
+    for place in range(int(digits.max())):
+        has_place = digits > place
+        digit_values = buf[np.where(has_place, last - place, 0)].astype(np.int64) - 48
+        values += np.where(has_place, digit_values, 0) * _POW10[place]
+    values[negative] = -values[negative]
+    return values, starts + offset
+
+class Block:
+    def __init__(self, values):
+        self.values = values
+
+    def __len__(self):
+        return len(self.values)
+
+    def blocks(self, chunk_size):
+        for start in range(0, len(self.values), chunk_size):
+            yield self.values[start:start + chunk_size]
+
+class Range:
+    def __init__(self, first, last):
+        self.first = first
+        self.last = last
+        self.step = 1 if last >= first else -1
+
+    def __len__(self):
+        return abs(self.last - self.first) + 1
+
+    def blocks(self, chunk_size):
+        stop = self.last + self.step
+        for start in range(self.first, stop, self.step * chunk_size):
+            end = start + self.step * chunk_size
+            end = min(end, stop) if self.step > 0 else max(end, stop)
+            yield np.arange(start, end, self.step, dtype=np.int64)
+
+class Repeat:
+    def __init__(self, node, count):
+        self.node = node
+        self.count = count
+
+    def __len__(self):
+        return len(self.node) * self.count
+
+    def blocks(self, chunk_size):
+        size = len(self.node)
+        if not size or not self.count:
+            return
+        if size > chunk_size:
+            for _ in range(self.count):
+                yield from self.node.blocks(chunk_size)
+            return
+        # Short bodies are tiled up to about a chunk, which is then reused
+        body = np.concatenate(list(self.node.blocks(chunk_size)))
+        per_tile = max(1, chunk_size // size)
+        tile = np.tile(body, min(per_tile, self.count))
+        full, rest = divmod(self.count, per_tile)
+        for _ in range(full):
+            yield tile
+        if rest:
+            yield tile[:rest * size]
+
+class Sequence:
+    def __init__(self, nodes):
+        self.nodes = nodes
+
+    def __len__(self):
+        return sum(len(node) for node in self.nodes)
+
+    def blocks(self, chunk_size):
+        for node in self.nodes:
+            yield from node.blocks(chunk_size)
+
+class _Token:
+    def __init__(self, kind, position, values=None, starts=None):
+        self.kind = kind
+        self.position = position
+        self.values = values
+        self.starts = starts
+        self.first = 0
+
+    def remaining(self):
+        return len(self.values) - self.first if self.kind == "number" else 0
+
+class _Parser:
+    def __init__(self, tokens, end):
+        self.tokens = tokens
+        self.end = end
+        self.index = 0
+
+    def peek(self):
+        while self.index < len(self.tokens):
+            token = self.tokens[self.index]
+            if token.kind != "number" or token.remaining():
+                return token
+            self.index += 1
+        return None
+
+    def number(self, what):
+        token = self.peek()
+        if token is None or token.kind != "number":
+            raise ParseError(f"Expected {what}",
+                             token.position if token else self.end)
+        value = int(token.values[token.first])
+        position = int(token.starts[token.first])
+        token.first += 1
+        return value, position
+
+    def sequence(self, opening=None):
+        nodes = []
+        while True:
+            token = self.peek()
+            if token is None:
+                if opening is not None:
+                    raise ParseError("Unclosed '('", opening)
+                return Sequence(nodes)
+            if token.kind == ")":
+                if opening is None:
+                    raise ParseError("Unmatched ')'", token.position)
+                self.index += 1
+                return Sequence(nodes)
+            if token.kind == "(":
+                self.index += 1
+                node = self.sequence(token.position)
+            elif token.kind == "number":
+                # Numbers are taken as one block, except a last number that
+                # starts a range or is repeated
+                following = self.tokens[self.index + 1] if self.index + 1 < len(self.tokens) else None
+                operand = following is not None and following.kind in ("..", "*")
+                count = token.remaining() - operand
+                if count:
+                    nodes.append(Block(token.values[token.first:token.first + count]))
+                    token.first += count
+                    continue
+                first, _ = self.number("a page number")
+                node = Block(np.array([first], dtype=np.int64))
+                if self.peek().kind == "..":
+                    self.index += 1
+                    last, _ = self.number("a page number after '..'")
+                    node = Range(first, last)
+            else:
+                raise ParseError(f"Expected a page number or '(' before '{token.kind}'",
+                                 token.position)
+            token = self.peek()
+            while token is not None and token.kind == "*":
+                self.index += 1
+                count, _ = self.number("a repeat count after '*'")
+                if count < 0:
+                    raise ParseError("Repeat count cannot be negative", token.position + 1)
+                node = Repeat(node, count)
+                token = self.peek()
+            nodes.append(node)
+
+class RefString:
+    # A parsed reference string, expanded lazily. It behaves like a trace
+    # object (see traces.py): len(), chunks() of plain ints and iteration,
+    # plus indexing and slicing, which expand only as far as needed.
+    def __init__(self, node, text="", chunk_size=DEFAULT_CHUNK_SIZE):
+        self.node = node
+        self.text = text
+        self.chunk_size = chunk_size
+        self.length = len(node)
+
+    def __len__(self):
+        return self.length
+
+    def arrays(self):
+        # int64 arrays of chunk_size references (the last may be shorter)
+        pending = []
+        have = 0
+        for block in self.node.blocks(self.chunk_size):
+            start = 0
+            while start < len(block):
+                take = min(self.chunk_size - have, len(block) - start)
+                pending.append(block[start:start + take])
+                have += take
+                start += take
+                if have == self.chunk_size:
+                    yield np.concatenate(pending)
+                    pending = []
+                    have = 0
+        if have:
+            yield np.concatenate(pending)
+
+    def chunks(self):
+        for block in self.arrays():
+            yield block.tolist()
+
+    def __iter__(self):
+        for chunk in self.chunks():
+            yield from chunk
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(self.length)
+            if step != 1:
+                return self[start:stop][::step]
+            out = []
+            position = 0
+            for block in self.arrays():
+                if position >= stop:
+                    break
+                if position + len(block) > start:
+                    out.extend(block[max(start - position, 0):stop - position].tolist())
+                position += len(block)
+            return out
+        if index < 0:
+            index += self.length
+        if not 0 <= index < self.length:
+            raise IndexError("reference index out of range")
+        return self[index:index + 1][0]
+
+    def to_numpy(self):
+        blocks = list(self.arrays())
+        return np.concatenate(blocks) if blocks else np.empty(0, dtype=np.int64)
+
+    def to_list(self):
+        return self.to_numpy().tolist()
+
+def parse_reference_string(text, chunk_size=DEFAULT_CHUNK_SIZE):
+    # Parses text into a RefString, raising ParseError on bad input
+    source = text
+    if "#" in text:
+        # Comments are blanked rather than cut, so positions stay those of
+        # the text as entered
+        text = _COMMENT.sub(lambda match: " " * len(match.group()), text)
+    if not any(symbol in text for symbol in ("..", "*", "(", ")")):
+        values, _ = parse_numbers(text.encode())
+        return RefString(Block(values), source, chunk_size)
+    tokens = []
+    last = 0
+    for match in _STRUCTURE.finditer(text):
+        if match.start() > last:
+            values, starts = parse_numbers(text[last:match.start()].encode(), last)
+            if len(values):
+                tokens.append(_Token("number", int(starts[0]), values, starts))
+        tokens.append(_Token(match.group(), match.start()))
+        last = match.end()
+    values, starts = parse_numbers(text[last:].encode(), last)
+    if len(values):
+        tokens.append(_Token("number", int(starts[0]), values, starts))
+    return RefString(_Parser(tokens, len(text)).sequence(), source, chunk_size)
@@ -0,0 +1,431 @@
+import json
+import mmap
+import struct
+import sys
+import zlib
+from array import array
+from bisect import bisect_right
+from collections import OrderedDict
+from datetime import datetime
+from itertools import accumulate
+from eventlog import HIT, EventLog, default_interval
+from policies import POLICIES
+from simulation import SimulationResult, Stepper, feed_profiled
+from traces import iter_chunks
+
+# Result files hold one or more recorded simulation runs in a compact,
+# columnar layout: a short header, then zlib-compressed blocks of each
+# column (the event log, the fault timeline and frame checkpoints) in the
+# order they were produced, then a JSON footer describing the runs and
+# where each of their blocks lives, and finally a trailer pointing at the
+# footer. Blocks are written while the simulation runs, so a run never has
+# to be held in memory to be saved, and are read back one at a time, so a
+# run can be viewed without loading it.
+
+RESULT_MAGIC = b"PGRS"
+RESULT_VERSION = 1
+RESULT_HEADER = struct.Struct("<4sB3x")
+RESULT_TRAILER = struct.Struct("<Q4s")  # footer offset, magic
+
+# Values per compressed block
+BLOCK_SIZE = 1 << 16
+COMPRESSION_LEVEL = 1
+
+# Column name -> typecode of the stored values. checkpoints holds the frame
+# slots at every checkpoint (empty slots as 0) and filled how many of them
+# were in use; slots fill in order and are never emptied. distinct is the
+# sorted set of pages referenced, written when the run is closed.
+COLUMNS = {"pages": "q", "kinds": "b", "evicted": "q", "slots": "q",
+           "faults": "q", "adaptation": "d", "checkpoints": "q", "filled": "q",
+           "distinct": "q"}
+
+# Columns holding page numbers. A run with page IDs from 2**63 up (uint64
+# traces) stores them unsigned ("Q") instead; the reader takes each column's
+# typecode from the footer.
+PAGE_COLUMNS = ("pages", "evicted", "checkpoints", "distinct")
+
+# Columns whose blocks also record their minimum and maximum, for plotting
+# an overview without decompressing them
+SUMMARIZED = ("faults", "adaptation")
+
+# Decompressed blocks kept per stored column
+CACHED_BLOCKS = 16
+
+class RunWriter:
+    # Streams one run into a ResultWriter. It takes the place of the
+    # EventLog of a recording Stepper (Stepper(algo, k, record=run)), which
+    # appends steps and timeline values to it; flush() then writes out every
+    # complete block. Use ResultWriter.run() to create one.
+    def __init__(self, writer, algo, frame_size, interval=None):
+        self.writer = writer
+        self.algo = algo
+        self.frame_size = frame_size
+        self.interval = interval or default_interval(frame_size)
+        self.length = 0
+        self.pages = array('q')
+        self.kinds = array('b')
+        self.evicted = array('q')
+        self.slots = array('q')
+        self.faults_over_time = array('q')
+        self.adaptation_over_time = None
+        if POLICIES[algo].adaptation_label is not None:
+            self.adaptation_over_time = array('d')
+        self.checkpoints = array('q')
+        self.filled = array('q')
+        self.blocks = {name: [] for name in COLUMNS}
+        self.typecodes = dict(COLUMNS)
+        self.distinct = set()
+        self._frames = [None] * frame_size
+
+    def __len__(self):
+        return self.length
+
+    def append(self, page, kind, slot, evicted=0):
+        if self.length % self.interval == 0:
+            self.checkpoint(self._frames)
+        try:
+            self.pages.append(page)
+        except OverflowError:
+            self.widen()
+            self.pages.append(page)
+        self.kinds.append(kind)
+        self.evicted.append(evicted)
+        self.slots.append(slot)
+        self.length += 1
+        if kind != HIT:
+            self._frames[slot] = page
+
+    def widen(self):
+        # Switches the page columns to unsigned. Blocks already written keep
+        # their bytes: the pages in them are non-negative, and those are the
+        # same 64 bits signed or unsigned. Negative pages cannot be widened,
+        # nor can an unsigned run take one.
+        try:
+            if self.typecodes["pages"] == "Q" or (self.distinct and min(self.distinct) < 0):
+                raise OverflowError
+            self.pages = array('Q', self.pages)
+            self.evicted = array('Q', self.evicted)
+            self.checkpoints = array('Q', self.checkpoints)
+        except OverflowError:
+            raise ValueError("Page numbers must all fit one 64-bit type, signed or "
+                             "unsigned") from None
+        for name in PAGE_COLUMNS:
+            self.typecodes[name] = "Q"
+
+    def checkpoint(self, frames):
+        self.checkpoints.extend(0 if page is None else page for page in frames)
+        self.filled.append(sum(page is not None for page in frames))
+
+    def columns(self):
+        columns = {"pages": self.pages, "kinds": self.kinds, "evicted": self.evicted,
+                   "slots": self.slots, "faults": self.faults_over_time,
+                   "checkpoints": self.checkpoints, "filled": self.filled}
+        if self.adaptation_over_time is not None:
+            columns["adaptation"] = self.adaptation_over_time
+        return columns
+
+    def flush(self, final=False):
+        # Writes the complete blocks of every column (all of them if final)
+        # and drops them from memory
+        for name, values in self.columns().items():
+            full = len(values) if final else len(values) - len(values) % BLOCK_SIZE
+            for start in range(0, full, BLOCK_SIZE):
+                block = values[start:start + BLOCK_SIZE]
+                self.blocks[name].append(self.writer.write_block(block, name in SUMMARIZED))
+                if name == "pages":
+                    self.distinct.update(block)
+            del values[:full]
+
+    def close(self, faults, hits, misses):
+        self.flush(final=True)
+        distinct = array(self.typecodes["distinct"], sorted(self.distinct))
+        for start in range(0, len(distinct), BLOCK_SIZE):
+            self.blocks["distinct"].append(self.writer.write_block(distinct[start:start + BLOCK_SIZE]))
+        self.writer.runs.append({
+            "algo": self.algo, "frame_size": self.frame_size, "length": self.length,
+            "faults": faults, "hits": hits, "misses": misses, "interval": self.interval,
+            "adaptation_label": POLICIES[self.algo].adaptation_label,
+            "columns": {name: {"typecode": self.typecodes[name], "blocks": blocks}
+                        for name, blocks in self.blocks.items() if blocks},
+        })
+
+class ResultWriter:
+    # Writes a new result file. Add runs with record_run(), add_result() or
+    # run(); the footer is written on close.
+    def __init__(self, path, meta=None):
+        self.path = path
+        self.meta = {"created": datetime.now().isoformat(timespec="seconds"), **(meta or {})}
+        self.runs = []
+        self.file = open(path, "wb")
+        self.file.write(RESULT_HEADER.pack(RESULT_MAGIC, RESULT_VERSION))
+
+    def run(self, algo, frame_size, interval=None):
+        if algo not in POLICIES:
+            raise ValueError(f"Unknown algorithm: {algo}")
+        return RunWriter(self, algo, frame_size, interval)
+
+    def write_block(self, values, summarize=False):
+        # Returns the block's [offset, compressed size, count, min, max]
+        low = high = None
+        if summarize and len(values):
+            low, high = min(values), max(values)
+        if sys.byteorder != "little":
+            values = array(values.typecode, values)
+            values.byteswap()
+        data = zlib.compress(values.tobytes(), COMPRESSION_LEVEL)
+        offset = self.file.tell()
+        self.file.write(data)
+        return [offset, len(data), len(values), low, high]
+
+    def add_result(self, result, progress=None):
+        # Writes an in-memory SimulationResult as a run
+        log = result.log
+        run = self.run(result.algo, result.frame_size, log.interval)
+        if getattr(log.pages, "typecode", "q") == "Q":
+            run.widen()
+        adaptation = result.adaptation_over_time
+        for start in range(0, len(log), BLOCK_SIZE):
+            stop = start + BLOCK_SIZE
+            run.pages.extend(log.pages[start:stop])
+            run.kinds.extend(log.kinds[start:stop])
+            run.evicted.extend(log.evicted[start:stop])
+            run.slots.fromlist(log.slots[start:stop].tolist())
+            run.faults_over_time.fromlist(list(result.faults_over_time[start:stop]))
+            if adaptation is not None and run.adaptation_over_time is not None:
+                run.adaptation_over_time.fromlist(list(adaptation[start:stop]))
+            run.length = min(stop, len(log))
+            run.flush()
+            if progress:
+                progress(run.length, len(log))
+        for frames in log.checkpoints():
+            run.checkpoint(frames)
+        run.close(result.faults, result.hits, result.misses)
+
+    def close(self):
+        if self.file.closed:
+            return
+        footer = json.dumps({"version": RESULT_VERSION, "meta": self.meta,
+                             "runs": self.runs}).encode()
+        offset = self.file.tell()
+        self.file.write(footer)
+        self.file.write(RESULT_TRAILER.pack(offset, RESULT_MAGIC))
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def record_run(writer, reference_string, frame_size, algo, progress=None, profile=None):
+    # Simulates algo over reference_string, streaming every step into writer
+    # chunk by chunk, and returns the fault count. progress, if given, is
+    # called with the number of references done; profile, if given, is a
+    # profiling.Profile to charge the run to.
+    run = writer.run(algo, frame_size)
+    stepper = Stepper(algo, frame_size, record=run)
+    report = (lambda: progress(stepper.position)) if progress else None
+    if profile:
+        def flush():
+            with profile.phase("write"):
+                run.flush()
+        feed_profiled(stepper, reference_string, profile, report, flush)
+        with profile.phase("write"):
+            run.close(stepper.faults, stepper.hits, stepper.faults)
+        return stepper.faults
+    stepper.prepare(reference_string)
+    for chunk in iter_chunks(reference_string):
+        stepper.feed(chunk)
+        run.flush()
+        if report:
+            report()
+    run.close(stepper.faults, stepper.hits, stepper.faults)
+    return stepper.faults
+
+def is_result_file(path):
+    with open(path, "rb") as f:
+        return f.read(len(RESULT_MAGIC)) == RESULT_MAGIC
+
+def read_footer(f, path=""):
+    # The footer of an open result file: {"version", "meta", "runs"}
+    header = f.read(RESULT_HEADER.size)
+    if len(header) < RESULT_HEADER.size or header[:len(RESULT_MAGIC)] != RESULT_MAGIC:
+        raise ValueError(f"{path} is not a result file")
+    _, version = RESULT_HEADER.unpack(header)
+    if version != RESULT_VERSION:
+        raise ValueError(f"Unsupported result file version: {version}")
+    end = f.seek(0, 2) - RESULT_TRAILER.size
+    f.seek(end)
+    offset, magic = RESULT_TRAILER.unpack(f.read(RESULT_TRAILER.size))
+    if magic != RESULT_MAGIC or not RESULT_HEADER.size <= offset <= end:
+        raise ValueError(f"{path} is incomplete; it was not closed after writing")
+    f.seek(offset)
+    return json.loads(f.read(end - offset))
+
+class StoredColumn:
+    # Read-only sequence over one column of a stored run. Blocks are
+    # decompressed from the memory-mapped file only when something in them
+    # is read, and the last few used are kept, so viewing a window of a huge
+    # run reads just the blocks under it.
+    def __init__(self, data, column):
+        self.data = data
+        self.typecode = column["typecode"]
+        self.index_entries = column["blocks"]
+        self.starts = list(accumulate((count for _, _, count, _, _ in self.index_entries),
+                                      initial=0))
+        # Sorted distinct values, where the file has them (page columns)
+        self.distinct = None
+        self._cache = OrderedDict()
+
+    def __len__(self):
+        return self.starts[-1]
+
+    def locate(self, position):
+        # Number of the block holding position
+        return bisect_right(self.starts, position) - 1
+
+    def read(self, number):
+        offset, size, _, _, _ = self.index_entries[number]
+        values = array(self.typecode, zlib.decompress(self.data[offset:offset + size]))
+        if sys.byteorder != "little":
+            values.byteswap()
+        return values
+
+    def block(self, number):
+        values = self._cache.get(number)
+        if values is None:
+            values = self._cache[number] = self.read(number)
+            if len(self._cache) > CACHED_BLOCKS:
+                self._cache.popitem(last=False)
+        else:
+            self._cache.move_to_end(number)
+        return values
+
+    def blocks(self):
+        # Every block in order, bypassing the cache
+        for number in range(len(self.index_entries)):
+            yield self.read(number)
+
+    def __iter__(self):
+        for values in self.blocks():
+            yield from values
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step != 1:
+                return array(self.typecode, (self[i] for i in range(start, stop, step)))
+            out = array(self.typecode)
+            while start < stop:
+                number = self.locate(start)
+                first = self.starts[number]
+                out.extend(self.block(number)[start - first:stop - first])
+                start = self.starts[number + 1]
+            return out
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("column index out of range")
+        number = self.locate(index)
+        return self.block(number)[index - self.starts[number]]
+
+    def index(self, value, start=0):
+        # Like list.index, searching block by block from start
+        for number in range(self.locate(max(start, 0)), len(self.index_entries)):
+            first = self.starts[number]
+            try:
+                return first + self.block(number).index(value, max(start - first, 0))
+            except ValueError:
+                pass
+        raise ValueError(f"{value} is not in the column")
+
+    def block_range(self, start, stop):
+        # Numbers of the blocks covering [start, stop), as a range
+        if start >= stop:
+            return range(0)
+        return range(self.locate(start), self.locate(stop - 1) + 1)
+
+    def summary(self, numbers):
+        # (first position, minimum, maximum) of each block in numbers; only
+        # the SUMMARIZED columns have them
+        return [(self.starts[n], *self.index_entries[n][3:]) for n in numbers]
+
+class StoredCheckpoints:
+    # The frame checkpoints of a stored run, as EventLog keeps them
+    def __init__(self, values, filled, frame_size):
+        self.values = values
+        self.filled = filled
+        self.frame_size = frame_size
+
+    def __len__(self):
+        return len(self.filled)
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        start = index * self.frame_size
+        count = self.filled[index]
+        return tuple(self.values[start:start + count]) + (None,) * (self.frame_size - count)
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+class ResultFile:
+    # Opens a result file without reading its runs: result() returns a
+    # SimulationResult whose event log, timelines and checkpoints are
+    # StoredColumns over the memory-mapped file.
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            footer = read_footer(f, path)
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.meta = footer["meta"]
+        self.runs = footer["runs"]
+
+    def __len__(self):
+        return len(self.runs)
+
+    def column(self, run, name):
+        empty = {"typecode": COLUMNS[name], "blocks": []}
+        return StoredColumn(self.data, run["columns"].get(name, empty))
+
+    def result(self, index=0):
+        run = self.runs[index]
+        column = lambda name: self.column(run, name)
+        checkpoints = StoredCheckpoints(column("checkpoints"), column("filled"), run["frame_size"])
+        pages = column("pages")
+        pages.distinct = column("distinct")
+        log = EventLog.from_columns(run["frame_size"], run["interval"], pages,
+                                    column("kinds"), column("evicted"), column("slots"),
+                                    checkpoints)
+        adaptation = column("adaptation") if "adaptation" in run["columns"] else None
+        return SimulationResult(run["algo"], run["frame_size"], run["faults"], run["hits"],
+                                run["misses"], column("faults"), log, adaptation)
+
+    def results(self):
+        return [self.result(index) for index in range(len(self))]
+
+    def close(self):
+        self.data.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def load_results(path):
+    # Reads every run of a result file fully into memory, as SimulationResults
+    results = []
+    with ResultFile(path) as stored:
+        for result in stored.results():
+            log = result.log
+            log = EventLog.from_columns(log.frame_size, log.interval, log.pages[:], log.kinds[:],
+                                        log.evicted[:], log.slots[:], list(log.checkpoints()))
+            adaptation = result.adaptation_over_time
+            results.append(SimulationResult(result.algo, result.frame_size, result.faults,
+                                            result.hits, result.misses,
+                                            result.faults_over_time[:], log,
+                                            adaptation[:] if adaptation is not None else None))
+    return results
@@ -0,0 +1,379 @@
+import copy
+import hashlib
+import threading
+from array import array
+from collections import OrderedDict
+from eventlog import EVICT, FILL, HIT, EventLog, LogView
+from policies import POLICIES
+from traces import iter_chunks
+
+class Stepper:
+    # Runs one policy incrementally: feed() simulates just the references it
+    # is given, so a growing trace or a live feed never has to be replayed
+    # from the start. With record=True every step goes into an EventLog
+    # (frames are fixed slots: a faulting page takes the slot of the page it
+    # evicts), faults_over_time and, for adaptive policies,
+    # adaptation_over_time; otherwise only counts are kept, using the
+    # policy's batched count(). record may instead be a sink with the same
+    # append() and columns as an EventLog, such as a results.RunWriter that
+    # streams the steps to a file.
+    def __init__(self, algo, frame_size, record=False):
+        if algo not in POLICIES:
+            raise ValueError(f"Unknown algorithm: {algo}")
+        self.algo = algo
+        self.frame_size = frame_size
+        self.policy = POLICIES[algo](frame_size)
+        self.prepared = False
+        self.position = 0
+        self.faults = 0
+        self.slot_of = {}
+        self.log = None
+        self.faults_over_time = None
+        self.adaptation_over_time = None
+        # True while a result() shares the recorded arrays
+        self._shared = False
+        if record is True:
+            self.log = EventLog(frame_size)
+            self.faults_over_time = array('q')
+            if self.policy.adaptation_label is not None:
+                self.adaptation_over_time = array('d')
+        elif hasattr(record, "append"):
+            self.log = record
+            self.faults_over_time = record.faults_over_time
+            if self.policy.adaptation_label is not None:
+                self.adaptation_over_time = record.adaptation_over_time
+
+    def prepare(self, reference_string):
+        # Lookahead policies (Optimal) must see the complete trace before
+        # it is fed; the rest ignore this
+        self.policy.prepare(reference_string)
+        self.prepared = True
+
+    def feed(self, pages):
+        # Simulates the next references and returns how many of them faulted
+        if self.policy.lookahead and not self.prepared:
+            raise ValueError(f"{self.algo} needs the whole trace in advance and cannot be fed online")
+        self._unshare()
+        faults = 0
+        for chunk in iter_chunks(pages):
+            faults += self._record(chunk) if self.log is not None else self.policy.count(chunk)
+            self.position += len(chunk)
+        self.faults += faults
+        return faults
+
+    def _record(self, pages):
+        log = self.log
+        policy = self.policy
+        access = policy.access
+        slot_of = self.slot_of
+        faults_over_time = self.faults_over_time
+        adaptation_over_time = self.adaptation_over_time
+        adaptation = policy.adaptation
+        faults = self.faults
+        start = faults
+
+        for page in pages:
+            if access(page):
+                log.append(page, HIT, slot_of[page])
+            else:
+                faults += 1
+                victim = policy.victim
+                if victim is not None:
+                    slot = slot_of.pop(victim)
+                    log.append(page, EVICT, slot, victim)
+                else:
+                    slot = len(slot_of)
+                    log.append(page, FILL, slot)
+                slot_of[page] = slot
+            faults_over_time.append(faults)
+            if adaptation_over_time is not None:
+                adaptation_over_time.append(adaptation())
+        return faults - start
+
+    @property
+    def hits(self):
+        return self.position - self.faults
+
+    def fault_rate(self):
+        return self.faults / self.position if self.position else 0.0
+
+    def snapshot(self):
+        # Opaque copy of the simulation state for restore(). A recorded run
+        # is not copied; restore() truncates it back instead.
+        return {"position": self.position, "faults": self.faults,
+                "slot_of": dict(self.slot_of), "policy": self._copy_policy(self.policy)}
+
+    def restore(self, snapshot):
+        # Rewinds to a snapshot taken earlier in this run (or, without
+        # recording, any snapshot of the same policy and frame size)
+        if self.log is not None:
+            if snapshot["position"] > len(self.log):
+                raise ValueError("Cannot restore a snapshot past the recorded steps")
+            self._unshare()
+            length = snapshot["position"]
+            self.log.truncate(length)
+            del self.faults_over_time[length:]
+            if self.adaptation_over_time is not None:
+                del self.adaptation_over_time[length:]
+        self.position = snapshot["position"]
+        self.faults = snapshot["faults"]
+        self.slot_of = dict(snapshot["slot_of"])
+        self.policy = self._copy_policy(snapshot["policy"])
+
+    def _copy_policy(self, policy):
+        memo = {id(getattr(policy, name)): getattr(policy, name) for name in policy.frozen}
+        return copy.deepcopy(policy, memo)
+
+    def result(self):
+        # SimulationResult of the steps so far. It shares the recorded arrays
+        # instead of copying them; the stepper copies them for itself the
+        # next time it is fed or restored, so the result never changes.
+        if self.log is None:
+            raise ValueError("Only a recording stepper has per-step results")
+        self._shared = True
+        return SimulationResult(self.algo, self.frame_size, self.faults, self.hits, self.faults,
+                                self.faults_over_time, self.log.share(),
+                                self.adaptation_over_time)
+
+    def _unshare(self):
+        # Copy on write: takes private copies of arrays a result() shares
+        if not self._shared:
+            return
+        self.log = self.log.copy()
+        self.faults_over_time = self.faults_over_time[:]
+        if self.adaptation_over_time is not None:
+            self.adaptation_over_time = self.adaptation_over_time[:]
+        self._shared = False
+
+class PageReplacement:
+    # One full pass of a policy over a reference string, through a recording
+    # Stepper. Every step is kept in a compact EventLog; steps and
+    # frame_states are lazy views that render text and frame lists on demand.
+    # progress, if given, is called with the number of references done after
+    # each chunk of the reference string; profile, if given, is a
+    # profiling.Profile to charge the run's phases and counters to.
+    def __init__(self, frame_size, ref_string, progress=None, profile=None):
+        self.frame_size = frame_size
+        self.ref_string = ref_string
+        self.progress = progress
+        self.profile = profile
+        self.reset()
+
+    def reset(self, stepper=None):
+        self.stepper = stepper
+        self.log = stepper.log if stepper else EventLog(self.frame_size)
+        self.steps = LogView(self.log, self.log.steps)
+        self.frame_states = LogView(self.log, self.log.frame_states)
+        self.faults_over_time = stepper.faults_over_time if stepper else array('q')
+        # Value an adaptive policy tunes (see policies.py), after every step
+        self.adaptation_over_time = stepper.adaptation_over_time if stepper else None
+        self.hits = 0
+        self.misses = 0
+        self.policy = stepper.policy if stepper else None
+
+    def run(self, algo):
+        # Simulates a registered policy, logging every step
+        stepper = Stepper(algo, self.frame_size, record=True)
+        self.reset(stepper)
+        profile = self.profile
+        if profile:
+            feed_profiled(stepper, self.ref_string, profile, self._report)
+        else:
+            stepper.prepare(self.ref_string)
+            for chunk in iter_chunks(self.ref_string):
+                stepper.feed(chunk)
+                self._report()
+        self.misses = stepper.faults
+        self.hits = stepper.hits
+        return stepper.faults
+
+    def fifo(self):
+        return self.run("FIFO")
+
+    def lru(self):
+        return self.run("LRU")
+
+    def optimal(self):
+        return self.run("Optimal")
+
+    def _report(self):
+        if self.progress:
+            self.progress(len(self.log))
+
+    def get_fifo_steps(self):
+        self.fifo()
+        return self.steps
+
+    def get_lru_steps(self):
+        self.lru()
+        return self.steps
+
+    def get_optimal_steps(self):
+        self.optimal()
+        return self.steps
+
+    def get_faults_over_time(self, algo):
+        self.run(algo)
+        return self.faults_over_time
+
+    def get_hit_miss_ratio(self):
+        total = self.hits + self.misses
+        return (self.hits / total * 100, self.misses / total * 100) if total > 0 else (0, 0)
+
+    def get_frame_states(self):
+        return self.frame_states
+
+class SimulationResult:
+    # Immutable outcome of one simulation pass
+    __slots__ = ("algo", "frame_size", "faults", "hits", "misses",
+                 "faults_over_time", "log", "adaptation_over_time")
+
+    def __init__(self, algo, frame_size, faults, hits, misses, faults_over_time, log,
+                 adaptation_over_time=None):
+        for name, value in zip(self.__slots__, (algo, frame_size, faults, hits, misses,
+                                                faults_over_time, log, adaptation_over_time)):
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("SimulationResult is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError("SimulationResult is immutable")
+
+    def __reduce__(self):
+        return (SimulationResult, tuple(getattr(self, name) for name in self.__slots__))
+
+    def __repr__(self):
+        return (f"SimulationResult(algo={self.algo!r}, frame_size={self.frame_size}, "
+                f"faults={self.faults}, hits={self.hits})")
+
+    @classmethod
+    def from_simulation(cls, algo, sim, faults):
+        return cls(algo, sim.frame_size, faults, sim.hits, sim.misses,
+                   sim.faults_over_time, sim.log, sim.adaptation_over_time)
+
+    @property
+    def adaptation_label(self):
+        policy = POLICIES.get(self.algo)
+        return policy.adaptation_label if policy else None
+
+    @property
+    def steps(self):
+        return LogView(self.log, self.log.steps)
+
+    @property
+    def frame_states(self):
+        return LogView(self.log, self.log.frame_states)
+
+    def get_hit_miss_ratio(self):
+        total = self.hits + self.misses
+        return (self.hits / total * 100, self.misses / total * 100) if total > 0 else (0, 0)
+
+class ResultCache:
+    # Bounded LRU cache of SimulationResults keyed by
+    # (trace digest, frame size, algorithm). Safe to share with the GUI's
+    # background worker thread.
+    def __init__(self, maxsize=16):
+        self.maxsize = maxsize
+        self._results = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._results)
+
+    def get(self, key):
+        with self._lock:
+            result = self._results.get(key)
+            if result is not None:
+                self._results.move_to_end(key)
+            return result
+
+    def put(self, key, result):
+        with self._lock:
+            self._results[key] = result
+            self._results.move_to_end(key)
+            while len(self._results) > self.maxsize:
+                self._results.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._results.clear()
+
+RESULT_CACHE = ResultCache()
+
+class TraceDigest:
+    # Incremental digest of a reference string: update() it with successive
+    # chunks, and copy() the state to extend a prefix in different ways.
+    # Page IDs are hashed as 64-bit words, so how the string is chunked does
+    # not matter. IDs from 2**63 up (uint64 traces) share their words with
+    # negative IDs; a marker added to the digest of any string holding them
+    # keeps the two apart.
+    def __init__(self):
+        self._hash = hashlib.blake2b(digest_size=16)
+        self.wide = False
+
+    def update(self, pages):
+        try:
+            words = array('q', pages)
+        except OverflowError:
+            try:
+                words = array('Q', pages)
+            except OverflowError:
+                raise ValueError("Page numbers must all fit one 64-bit type, signed or "
+                                 "unsigned") from None
+            self.wide = True
+        self._hash.update(words)
+
+    def copy(self):
+        other = TraceDigest.__new__(TraceDigest)
+        other._hash = self._hash.copy()
+        other.wide = self.wide
+        return other
+
+    def hexdigest(self):
+        if not self.wide:
+            return self._hash.hexdigest()
+        final = self._hash.copy()
+        final.update(b"u")
+        return final.hexdigest()
+
+def trace_digest(ref_string):
+    digest = TraceDigest()
+    for chunk in iter_chunks(ref_string):
+        digest.update(chunk)
+    return digest.hexdigest()
+
+def feed_profiled(stepper, reference_string, profile, report=None, after_chunk=None):
+    # Prepares stepper and feeds it the whole of reference_string, charging
+    # the phases and counters to profile. after_chunk, if given, runs after
+    # each chunk is simulated (outside the "simulate" phase), then report.
+    with profile.phase("prepare"):
+        stepper.prepare(reference_string)
+    profile.begin_run(stepper.policy)
+    position, faults = stepper.position, stepper.faults
+    for chunk in profile.timed("read", iter_chunks(reference_string)):
+        with profile.phase("simulate"):
+            stepper.feed(chunk)
+        if after_chunk:
+            after_chunk()
+        if report:
+            report()
+    profile.end_run(stepper.policy, stepper.position - position, stepper.faults - faults)
+
+def simulate(ref_string, frame_size, algo, cache=RESULT_CACHE, progress=None, profile=None):
+    # Runs one pass of algo over ref_string, or returns the cached result of
+    # an identical earlier run. Pass cache=None to always recompute; a
+    # profiled run is never answered from the cache.
+    if algo not in POLICIES:
+        raise ValueError(f"Unknown algorithm: {algo}")
+    key = (trace_digest(ref_string), frame_size, algo)
+    if cache is not None and not profile:
+        result = cache.get(key)
+        if result is not None:
+            return result
+    sim = PageReplacement(frame_size, ref_string, progress, profile)
+    faults = sim.run(algo)
+    result = SimulationResult.from_simulation(algo, sim, faults)
+    if cache is not None:
+        cache.put(key, result)
+    return result
@@ -0,0 +1,155 @@
+from policies import next_use_index
+
+# Fault counts for every frame size from one simulation. LRU and OPT are both
+# stack algorithms (Mattson et al.), so recording the stack distance of each
+# reference gives the exact fault count for all frame sizes at once. LRU
+# takes one pass over the trace; OPT takes two, since its stack needs the
+# next-use index first.
+
+# How many references fault_curve() consumes between progress reports
+PROGRESS_INTERVAL = 1 << 16
+
+# Largest frame size opt_fault_curve() covers by default. Every step of the
+# OPT stack costs up to its depth, so an uncapped curve is O(n * distinct
+# pages).
+OPT_FRAME_LIMIT = 1024
+
+class FenwickTree:
+    def __init__(self, size):
+        self.tree = [0] * (size + 1)
+
+    def add(self, index, delta):
+        index += 1
+        while index < len(self.tree):
+            self.tree[index] += delta
+            index += index & -index
+
+    def prefix_sum(self, index):
+        # Sum of positions [0, index)
+        total = 0
+        while index > 0:
+            total += self.tree[index]
+            index -= index & -index
+        return total
+
+def lru_stack_distances(reference_string):
+    # Yields the LRU stack distance of each reference (1 = top of stack),
+    # or 0 for the first reference to a page. O(n log n) overall.
+    marks = FenwickTree(len(reference_string))
+    last_access = {}
+    for i, page in enumerate(reference_string):
+        prev = last_access.get(page)
+        if prev is None:
+            yield 0
+        else:
+            yield marks.prefix_sum(i) - marks.prefix_sum(prev)
+            marks.add(prev, -1)
+        marks.add(i, 1)
+        last_access[page] = i
+
+def opt_stack_distances(reference_string, max_frames=None, next_use=None):
+    # Mattson's OPT stack: priority is the next use of each page, and on every
+    # reference the lower-priority page is carried down the stack until the
+    # referenced page's old slot. Each step costs O(depth of the reference),
+    # so the stack is kept to max_frames entries: a page carried below that
+    # faults at every frame size of interest, and is reported like a first
+    # reference, as 0. next_use may be passed if already built.
+    if next_use is None:
+        next_use = next_use_index(reference_string)
+    cap = max_frames or float("inf")
+    stack = []
+    priority = []
+    position = {}
+    for i, page in enumerate(reference_string):
+        depth = position.get(page)
+        if depth is None:
+            depth = len(stack)
+            yield 0
+        else:
+            yield depth + 1
+        upcoming = next_use[i]
+        if depth == 0 and stack:
+            priority[0] = upcoming
+            continue
+        if not stack:
+            stack.append(page)
+            priority.append(upcoming)
+            position[page] = 0
+            continue
+        carry, carry_priority = stack[0], priority[0]
+        stack[0] = page
+        priority[0] = upcoming
+        position[page] = 0
+        for j in range(1, depth):
+            if priority[j] > carry_priority:
+                stack[j], carry = carry, stack[j]
+                priority[j], carry_priority = carry_priority, priority[j]
+                position[stack[j]] = j
+        if depth < len(stack):
+            stack[depth] = carry
+            priority[depth] = carry_priority
+            position[carry] = depth
+        elif len(stack) < cap:
+            stack.append(carry)
+            priority.append(carry_priority)
+            position[carry] = depth
+        else:
+            del position[carry]
+
+def reported(reference_string, progress):
+    # Iterates reference_string, calling progress(count) every
+    # PROGRESS_INTERVAL references
+    if not progress:
+        yield from reference_string
+        return
+    for count, page in enumerate(reference_string, 1):
+        if count % PROGRESS_INTERVAL == 0:
+            progress(count)
+        yield page
+
+def fault_curve(distances, max_frames=None, progress=None):
+    # faults[k - 1] is the number of page faults with k frames
+    histogram = {}
+    cold = 0
+    for count, distance in enumerate(distances, 1):
+        if progress and count % PROGRESS_INTERVAL == 0:
+            progress(count)
+        if distance == 0:
+            cold += 1
+        else:
+            histogram[distance] = histogram.get(distance, 0) + 1
+    if max_frames is None:
+        max_frames = max(cold, 1)
+    remaining = sum(histogram.values())
+    faults = []
+    for k in range(1, max_frames + 1):
+        remaining -= histogram.get(k, 0)
+        faults.append(cold + remaining)
+    return faults
+
+def lru_fault_curve(reference_string, max_frames=None, progress=None):
+    return fault_curve(lru_stack_distances(reference_string), max_frames, progress)
+
+def opt_fault_curve(reference_string, max_frames=None, progress=None):
+    # Two passes, the next-use index and then the stack; progress counts
+    # the references of both. max_frames defaults to the number of distinct
+    # pages, but at most OPT_FRAME_LIMIT; a larger one costs up to
+    # O(n * max_frames).
+    next_use = next_use_index(reported(reference_string, progress))
+    if max_frames is None:
+        # Each page's last reference has the trace length as its next use
+        max_frames = min(max(next_use.count(len(next_use)), 1), OPT_FRAME_LIMIT)
+    stack_progress = (lambda done: progress(len(next_use) + done)) if progress else None
+    distances = opt_stack_distances(reference_string, max_frames, next_use)
+    return fault_curve(distances, max_frames, stack_progress)
+
+CURVES = {"LRU": lru_fault_curve, "Optimal": opt_fault_curve}
+# Passes each curve makes over the trace, for progress totals
+CURVE_PASSES = {"LRU": 1, "Optimal": 2}
+
+def miss_ratio_curve(reference_string, algo="LRU", max_frames=None):
+    if algo not in CURVES:
+        raise ValueError(f"No single-pass curve for {algo}")
+    faults = CURVES[algo](reference_string, max_frames)
+    total = len(reference_string)
+    return [f / total for f in faults] if total else []
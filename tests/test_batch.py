@@ -0,0 +1,55 @@
+import csv
+import batch
+from batch import iter_jobs, main, run_batch
+from traces import write_binary_trace
+
+def corrupt_traces(directory):
+    good = directory / "good.bin"
+    write_binary_trace(good, [1, 2, 3, 1, 4, 1, 2] * 10, "int32")
+    data = good.read_bytes()
+    (directory / "truncated.bin").write_bytes(data[:-6])
+    (directory / "short_header.bin").write_bytes(data[:10])
+    (directory / "bad_type.bin").write_bytes(data[:5] + b"z" + data[6:])
+    return good
+
+def test_corrupt_binary_traces_become_error_rows(tmp_path):
+    corrupt_traces(tmp_path)
+    rows = {row["trace"].rsplit("/", 1)[-1]: row
+            for row in run_batch(iter_jobs([str(tmp_path / "*.bin")], ["LRU"], [3]), workers=1)}
+    assert rows["good.bin"]["references"] == 70 and "error" not in rows["good.bin"]
+    assert "truncated" in rows["truncated.bin"]["error"]
+    assert "not a binary trace" in rows["short_header.bin"]["error"]
+    assert "unknown page type" in rows["bad_type.bin"]["error"]
+
+def test_sweep_finishes_past_a_truncated_trace(tmp_path):
+    corrupt_traces(tmp_path)
+    output = tmp_path / "sweep.csv"
+    status = main([str(tmp_path / "*.bin"), "--algorithms", "FIFO", "LRU", "--frames", "2", "3",
+                   "--workers", "1", "-o", str(output)])
+    with open(output, newline="") as f:
+        rows = list(csv.DictReader(f))
+    assert status == 1
+    assert len(rows) == 16
+    assert sum(1 for row in rows if not row["error"]) == 4
+
+def test_unexpected_errors_become_error_rows(tmp_path, monkeypatch):
+    good = corrupt_traces(tmp_path)
+
+    def fail(*args, **kwargs):
+        raise RuntimeError("engine failure")
+
+    monkeypatch.setattr(batch, "PageReplacement", fail)
+    (row,) = run_batch([(str(good), "LRU", 3, None, False)], workers=1)
+    assert row["error"] == "RuntimeError: engine failure"
+
+def test_pool_jobs_that_cannot_run_become_error_rows(tmp_path):
+    good = corrupt_traces(tmp_path)
+    # An argument that cannot be pickled fails the job before it reaches a
+    # worker; the other jobs still run
+    jobs = [(str(good), "LRU", 3, None, False), (str(good), "FIFO", lambda: 3, None, False),
+            (str(good), "FIFO", 3, None, False)]
+    rows = list(run_batch(jobs, workers=2))
+    assert len(rows) == 3
+    failed = [row for row in rows if row.get("error")]
+    assert len(failed) == 1 and failed[0]["algo"] == "FIFO"
+    assert sorted(row["algo"] for row in rows if not row.get("error")) == ["FIFO", "LRU"]
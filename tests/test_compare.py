@@ -0,0 +1,39 @@
+import random
+import pytest
+import compare
+from traces import BinaryTrace, write_binary_trace
+
+class Cancelled(Exception):
+    pass
+
+def test_pool_matches_serial_runs(tmp_path, monkeypatch):
+    rng = random.Random(5)
+    pages = [rng.randrange(40) for _ in range(3000)]
+    path = tmp_path / "trace.bin"
+    write_binary_trace(path, pages)
+    traces = [pages, str(path)]
+    serial = compare.compare(traces, ["LRU", "ARC", "Optimal"], [4, 9], workers=1)
+    monkeypatch.setattr(compare, "PARALLEL_THRESHOLD", 0)
+    ticks = []
+    pooled = compare.compare(traces, ["LRU", "ARC", "Optimal"], [4, 9], workers=2,
+                             progress=lambda done, total: ticks.append((done, total)))
+    assert [(row["trace"], row["algo"], row["faults"]) for row in pooled] == [
+        (row["trace"], row["algo"], row["faults"]) for row in serial]
+    # Paths have no length until opened, so the total is unknown
+    assert ticks[-1] == (12 * 3000, None)
+
+def test_serial_cancel_closes_the_traces_it_opened(tmp_path, monkeypatch):
+    path = tmp_path / "trace.bin"
+    write_binary_trace(path, list(range(200_000)))
+    opened = []
+    original_close = BinaryTrace.close
+    monkeypatch.setattr(BinaryTrace, "close", lambda self: opened.append(self) or original_close(self))
+
+    def cancel(done, total):
+        raise Cancelled
+
+    # The cancellation itself surfaces, even though chunks of the mapped
+    # trace are still referenced from its traceback
+    with pytest.raises(Cancelled):
+        compare.compare([str(path)], ["LRU"], [3], workers=1, progress=cancel)
+    assert len(opened) == 1
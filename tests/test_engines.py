@@ -0,0 +1,29 @@
+import random
+import pytest
+from algorithms import LIST_ENGINES, PageReplacement
+
+# The hashed engines must fault exactly where the original list engines do
+
+def random_trace(seed, length, pages):
+    rng = random.Random(seed)
+    return [rng.randrange(pages) for _ in range(length)]
+
+@pytest.mark.parametrize("algo", sorted(LIST_ENGINES))
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("frame_size", [1, 2, 3, 4, 7, 16, 64])
+def test_fast_engine_matches_list_engine(algo, seed, frame_size):
+    trace = random_trace(seed, 400, 20)
+    fast = PageReplacement(frame_size, trace, engine="fast").run(algo)
+    listed = PageReplacement(frame_size, trace, engine="list").run(algo)
+    assert fast == listed
+
+@pytest.mark.parametrize("algo", sorted(LIST_ENGINES))
+def test_more_frames_than_distinct_pages(algo):
+    trace = random_trace(1, 300, 10)
+    for engine in ("fast", "list"):
+        assert PageReplacement(50, trace, engine=engine).run(algo) == 10
+
+@pytest.mark.parametrize("algo", sorted(LIST_ENGINES))
+def test_empty_trace(algo):
+    for engine in ("fast", "list"):
+        assert PageReplacement(3, [], engine=engine).run(algo) == 0
@@ -0,0 +1,93 @@
+import random
+import pytest
+from eventlog import EVICT, FILL, HIT, EventLog
+from simulation import Stepper
+
+FRAMES = 4
+INTERVAL = 8
+
+def recorded_steps(length=200, seed=0):
+    # (page, kind, slot, evicted) of every step of an LRU run
+    rng = random.Random(seed)
+    stepper = Stepper("LRU", FRAMES, record=True)
+    stepper.feed([rng.randrange(9) for _ in range(length)])
+    log = stepper.log
+    return list(zip(log.pages, log.kinds, log.slots, log.evicted))
+
+def small_log(steps):
+    log = EventLog(FRAMES, INTERVAL)
+    for page, kind, slot, evicted in steps:
+        log.append(page, kind, slot, evicted)
+    return log
+
+def replay(steps):
+    # Frame slots after every step, replayed naively
+    frames = [None] * FRAMES
+    states = []
+    for page, kind, slot, _ in steps:
+        if kind != HIT:
+            frames[slot] = page
+        states.append(list(frames))
+    return states
+
+def test_iter_frames_matches_a_replay_across_checkpoints():
+    steps = recorded_steps()
+    log = small_log(steps)
+    expected = replay(steps)
+    assert len(log.checkpoints()) == -(-len(steps) // INTERVAL)
+    for start, stop in [(0, None), (0, 1), (7, 9), (8, 16), (13, 50), (199, None), (150, 400)]:
+        assert [list(frames) for frames in log.iter_frames(start, stop)] == expected[start:stop]
+    assert list(log.frames_at(63)) == expected[63]
+    assert list(log.frame_states(5, 6)) == [[page for page in expected[5] if page is not None]]
+
+@pytest.mark.parametrize("length", [0, 1, 13, 16, 17, 199])
+def test_truncate_mid_interval_and_append_again(length):
+    steps = recorded_steps()
+    log = small_log(steps)
+    log.truncate(length)
+    assert len(log) == length
+    assert [list(frames) for frames in log.iter_frames()] == replay(steps[:length])
+    # Appending the same steps again rebuilds the log exactly
+    for step in steps[length:]:
+        log.append(step[0], step[1], step[2], step[3])
+    original = small_log(steps)
+    assert log.checkpoints() == original.checkpoints()
+    assert list(log.steps()) == list(original.steps())
+
+def test_truncate_then_diverge():
+    steps = recorded_steps()
+    log = small_log(steps)
+    log.truncate(21)
+    # Continue with steps valid from the truncated state: hits on what is
+    # resident, then evictions into the existing slots
+    frames = replay(steps[:21])[-1]
+    tail = [(frames[slot], HIT, slot, 0) for slot in range(FRAMES)]
+    tail += [(100 + slot, EVICT, slot, frames[slot]) for slot in range(FRAMES)]
+    for step in tail:
+        log.append(*step[:3], step[3])
+    assert [list(frames) for frames in log.iter_frames()] == replay(steps[:21] + tail)
+
+def test_next_fault_skips_hits():
+    log = EventLog(2, INTERVAL)
+    for page, kind, slot, evicted in [(1, FILL, 0, 0), (2, FILL, 1, 0), (1, HIT, 0, 0),
+                                      (3, EVICT, 1, 2), (1, HIT, 0, 0), (2, EVICT, 1, 3),
+                                      (1, HIT, 0, 0)]:
+        log.append(page, kind, slot, evicted)
+    assert log.next_fault(1) == 0
+    assert log.next_fault(1, start=1) is None
+    assert log.next_fault(2, start=1) == 1
+    assert log.next_fault(2, start=2) == 5
+    assert log.next_fault(3) == 3
+    assert log.next_fault(4) is None
+
+def test_from_columns_rebuilds_the_log():
+    steps = recorded_steps()
+    log = small_log(steps)
+    rebuilt = EventLog.from_columns(FRAMES, INTERVAL, list(log.pages), list(log.kinds),
+                                    list(log.evicted), list(log.slots), list(log.checkpoints()))
+    assert len(rebuilt) == len(log)
+    assert list(rebuilt.steps(40, 90)) == list(log.steps(40, 90))
+    # The rebuilt log carries on appending from where the columns end
+    last = replay(steps)[-1]
+    rebuilt.append(50, EVICT, 0, last[0])
+    assert list(rebuilt.frames_at(len(rebuilt) - 1)) == [50] + last[1:]
@@ -0,0 +1,98 @@
+import random
+import pytest
+from policies import ARC, LFU, POLICIES, Clock, EnhancedClock, LFUAging, TwoQ
+from profiling import profile_run
+from simulation import Stepper
+
+def victims(policy, pages, writes=(), track=None):
+    # Victim of every access (None on hits); writes holds the positions that are writes,
+    # and track is called after every access
+    chosen = []
+    for position, page in enumerate(pages):
+        if position in writes:
+            hit = policy.access(page, write=True)
+        else:
+            hit = policy.access(page)
+        chosen.append(None if hit else policy.victim)
+        if track:
+            track()
+    return chosen
+
+def test_enhanced_clock_is_not_registered():
+    assert EnhancedClock not in POLICIES.values()
+
+def test_enhanced_clock_without_writes_matches_clock():
+    pages = [1, 2, 3, 1, 4, 5, 2, 1, 6, 3, 4]
+    assert victims(EnhancedClock(3), pages) == victims(Clock(3), pages)
+
+def test_writes_spare_dirty_pages():
+    pages = [1, 2, 3, 4]
+    assert victims(Clock(3), pages)[-1] == 1
+    enhanced = EnhancedClock(3)
+    assert victims(enhanced, pages, writes={0})[-1] == 2
+    assert enhanced.state()["writebacks"] == 1
+
+def test_only_searching_policies_count_victim_comparisons():
+    pages = [page % 7 for page in range(0, 500, 3)] * 4
+    optimal = profile_run(pages, 3, "Optimal")
+    assert optimal.comparisons_estimated
+    assert ("Victim comparisons (one per eviction)",
+            f"{optimal.counters['evictions']:,}") in optimal.rows()
+    clock = profile_run(pages, 3, "CLOCK")
+    assert not clock.comparisons_estimated
+    assert clock.counters["victim comparisons"] > clock.counters["evictions"]
+
+def test_arc_ghost_hits_move_the_target():
+    # c = 2: 2 is demoted to B1 when 3 arrives; its ghost hit raises p to 1
+    # and demotes 1 from T2 to B2, whose ghost hit lowers p back to 0
+    arc = ARC(2)
+    targets = []
+    assert victims(arc, [1, 1, 2, 3, 2, 1], track=lambda: targets.append(arc.p)) == [
+        None, None, None, 2, 1, 3]
+    assert targets == [0, 0, 0, 0, 1, 0]
+    assert (list(arc.t1), list(arc.t2), list(arc.b1), list(arc.b2)) == ([], [2, 1], [3], [])
+
+def test_arc_full_t1_drops_its_lru_page_without_a_ghost():
+    arc = ARC(2)
+    assert victims(arc, [1, 2, 3]) == [None, None, 1]
+    assert (list(arc.t1), list(arc.b1)) == ([2, 3], [])
+
+def test_two_q_promotes_only_pages_seen_again_in_a1out():
+    # 4 frames: A1in holds 1 page beyond which it is evicted first, A1out
+    # remembers 2
+    two_q = TwoQ(4)
+    assert victims(two_q, [1, 2, 3, 4, 5, 1, 2, 6, 7, 1, 8]) == [
+        None, None, None, None, 1, 2, 3, 4, 5, None, 6]
+    assert list(two_q.am) == [2, 1]
+    assert list(two_q.a1in) == [7, 8]
+    assert list(two_q.a1out) == [5, 6]
+
+@pytest.mark.parametrize("algo", list(POLICIES))
+@pytest.mark.parametrize("frame_size", [1, 3, 16])
+def test_count_agrees_with_the_recording_stepper(algo, frame_size):
+    rng = random.Random(frame_size)
+    pages = [rng.randrange(40) if rng.random() < 0.7 else rng.randrange(8) for _ in range(3000)]
+    counting = Stepper(algo, frame_size)
+    recording = Stepper(algo, frame_size, record=True)
+    for stepper in (counting, recording):
+        stepper.prepare(pages)
+        for start in range(0, len(pages), 700):
+            stepper.feed(pages[start:start + 700])
+    assert counting.faults == recording.faults == recording.faults_over_time[-1]
+    if recording.adaptation_over_time is not None:
+        assert len(recording.adaptation_over_time) == len(pages)
+
+def test_lfu_breaks_ties_by_least_recent_use():
+    # 1 and 2 are both referenced twice; 1 was loaded first but used last
+    assert victims(LFU(2), [1, 2, 2, 1, 3]) == [None, None, None, None, 2]
+    assert victims(LFU(3), [1, 2, 3, 2, 1, 4, 5]) == [None] * 5 + [3, 4]
+
+def test_lfu_aging_lets_a_once_popular_page_age_out():
+    # Under LFU page 1's early count keeps it resident through the scan;
+    # with aging every eviction raises the entry level until the scan's
+    # pages catch up with it
+    pages = [1, 1, 1, 2, 3, 4, 5]
+    assert victims(LFU(2), pages) == [None] * 4 + [2, 3, 4]
+    aging = LFUAging(2)
+    assert victims(aging, pages) == [None] * 4 + [2, 3, 1]
+    assert aging.state()["age"] == 3
@@ -0,0 +1,57 @@
+import random
+import pytest
+from algorithms import PageReplacement
+from policies import POLICIES
+from processes import ALLOCATIONS, SCOPES, MultiProcessReplacement, allocate, interleave
+
+def random_pages(rng, length, distinct):
+    return [rng.randrange(distinct) for _ in range(length)]
+
+@pytest.mark.parametrize("algo", list(POLICIES))
+@pytest.mark.parametrize("scope", SCOPES)
+@pytest.mark.parametrize("frame_size", [1, 4, 32])
+def test_one_process_matches_the_single_process_engine(algo, scope, frame_size):
+    pages = random_pages(random.Random(frame_size), 2000, 50)
+    multi = MultiProcessReplacement(frame_size, interleave({9: pages}), scope)
+    assert multi.run(algo) == PageReplacement(frame_size, pages).run(algo)
+    assert multi.process(9).faults == multi.page_faults
+
+@pytest.mark.parametrize("algo", list(POLICIES))
+@pytest.mark.parametrize("allocation", ALLOCATIONS)
+def test_local_faults_are_those_of_separate_runs(algo, allocation):
+    rng = random.Random(algo)
+    traces = {pid: random_pages(rng, rng.randrange(200, 800), distinct)
+              for pid, distinct in [(1, 10), (2, 60), (3, 25)]}
+    priorities = {1: 5, 3: 2}
+    multi = MultiProcessReplacement(24, interleave(traces, quantum=7), "local", allocation,
+                                    priorities)
+    total = multi.run(algo)
+    assert sum(process.frames for process in multi.processes) == 24
+    for pid, pages in traces.items():
+        process = multi.process(pid)
+        assert process.references == len(pages)
+        assert process.faults == PageReplacement(process.frames, pages).run(algo)
+    assert total == sum(process.faults for process in multi.processes)
+
+def test_allocate_shares_add_up_to_the_frames():
+    rng = random.Random(0)
+    for _ in range(500):
+        weights = {pid: rng.choice([1, 2, 3, 0.5, rng.random() + 0.01, rng.randrange(1, 1000)])
+                   for pid in range(rng.randrange(1, 20))}
+        frame_size = rng.randrange(len(weights), 200)
+        shares = allocate(frame_size, weights)
+        assert sum(shares.values()) == frame_size
+        assert min(shares.values()) >= 1
+
+def test_allocate_follows_the_weights():
+    assert allocate(10, {1: 1, 2: 1}) == {1: 5, 2: 5}
+    assert allocate(10, {1: 3, 2: 1}) == {1: 7, 2: 3}
+
+def test_more_processes_than_frames_is_an_error():
+    trace = interleave({1: [1, 2], 2: [1, 2], 3: [1, 2]})
+    with pytest.raises(ValueError, match="3 processes need at least as many frames"):
+        MultiProcessReplacement(2, trace, "local").run("LRU")
+    with pytest.raises(ValueError, match="weights must be positive"):
+        allocate(4, {1: 0})
+    # Global replacement shares the frames, so it does not need one each
+    assert MultiProcessReplacement(2, trace, "global").run("LRU") == 6
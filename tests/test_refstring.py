@@ -0,0 +1,51 @@
+import pytest
+from refstring import ParseError, parse_reference_string
+
+@pytest.mark.parametrize("text, pages", [
+    ("1 2 3", [1, 2, 3]),
+    ("1,2,\t3\n4", [1, 2, 3, 4]),
+    ("-1 -20", [-1, -20]),
+    ("", []),
+    ("1..5", [1, 2, 3, 4, 5]),
+    ("5..3", [5, 4, 3]),
+    ("1..3*2", [1, 2, 3, 1, 2, 3]),
+    ("1 2*3", [1, 2, 2, 2]),
+    ("7*0 1", [1]),
+    ("(3 4)*3", [3, 4, 3, 4, 3, 4]),
+    ("((1 2)*2 3)*2", [1, 2, 1, 2, 3, 1, 2, 1, 2, 3]),
+    ("1 # two\n2 # 3..9\n", [1, 2]),
+    ("# nothing", []),
+    ("(1..2)*2*2", [1, 2] * 4),
+])
+def test_parses(text, pages):
+    ref = parse_reference_string(text)
+    assert len(ref) == len(pages)
+    assert ref.to_list() == pages
+
+@pytest.mark.parametrize("text, message, column", [
+    ("1 x 3", "Unexpected character 'x'", 3),
+    ("1.2", "Unexpected character '.'", 2),
+    ("-", "Unexpected character '-'", 1),
+    ("1 # note\n 2 y", "Unexpected character 'y'", 13),
+    ("1234567890123456789", "Page number too large", 1),
+    ("1..", "Expected a page number after '..'", 4),
+    ("1..5*", "Expected a repeat count after '*'", 6),
+    ("*3", "Expected a page number or '(' before '*'", 1),
+    ("1*-2", "Repeat count cannot be negative", 3),
+    ("(1 2", "Unclosed '('", 1),
+    ("1 2 (", "Unclosed '('", 5),
+    ("1 2)", "Unmatched ')'", 4),
+])
+def test_reports_the_column_of_errors(text, message, column):
+    with pytest.raises(ParseError) as error:
+        parse_reference_string(text)
+    assert str(error.value) == f"{message} at position {column}"
+    assert error.value.position == column - 1
+
+def test_expands_lazily_in_chunks():
+    ref = parse_reference_string("(1..3)*1000000 9", chunk_size=1000)
+    assert len(ref) == 3_000_001
+    chunk = next(ref.chunks())
+    assert len(chunk) == 1000 and chunk[:4] == [1, 2, 3, 1]
+    assert ref[-2:] == [3, 9]
+    assert ref[4] == 2
@@ -0,0 +1,58 @@
+import random
+import pytest
+from results import ResultFile, ResultWriter, load_results, record_run
+from simulation import simulate
+from traces import open_trace, write_binary_trace
+
+def assert_same_run(loaded, result):
+    assert (loaded.algo, loaded.frame_size, loaded.faults, loaded.hits) == (
+        result.algo, result.frame_size, result.faults, result.hits)
+    assert list(loaded.log.pages) == list(result.log.pages)
+    assert list(loaded.faults_over_time) == list(result.faults_over_time)
+    assert list(loaded.steps) == list(result.steps)
+    if result.adaptation_over_time is not None:
+        assert list(loaded.adaptation_over_time) == list(result.adaptation_over_time)
+
+def test_results_round_trip(tmp_path):
+    rng = random.Random(3)
+    pages = [rng.randrange(30) for _ in range(5000)]
+    results = [simulate(pages, 8, algo, cache=None) for algo in ("LRU", "ARC", "Optimal")]
+    path = tmp_path / "runs.pgres"
+    with ResultWriter(path, {"trace": "random"}) as writer:
+        for result in results:
+            writer.add_result(result)
+    loaded = load_results(path)
+    assert len(loaded) == 3
+    for stored, result in zip(loaded, results):
+        assert_same_run(stored, result)
+    with ResultFile(path) as stored:
+        assert stored.meta["trace"] == "random"
+        assert_same_run(stored.result(1), results[1])
+
+def test_uint64_results_round_trip(tmp_path):
+    pages = [2**64 - 1, 5, 2**63, 5, 2**64 - 1, 7] * 10
+    result = simulate(pages, 2, "LRU", cache=None)
+    path = tmp_path / "wide.pgres"
+    with ResultWriter(path) as writer:
+        writer.add_result(result)
+    (loaded,) = load_results(path)
+    assert_same_run(loaded, result)
+    assert loaded.log.pages[0] == 2**64 - 1
+
+def test_streamed_run_widens_after_blocks_were_written(tmp_path):
+    # Small pages fill whole blocks before the first page above 2**63
+    pages = [page % 100 for page in range(70_000)] + [2**64 - 1, 3, 2**63]
+    trace_path = tmp_path / "wide.bin"
+    write_binary_trace(trace_path, pages, "uint64")
+    path = tmp_path / "wide.pgres"
+    with open_trace(trace_path) as trace, ResultWriter(path) as writer:
+        faults = record_run(writer, trace, 50, "FIFO")
+    (loaded,) = load_results(path)
+    assert loaded.faults == faults == simulate(pages, 50, "FIFO", cache=None).faults
+    assert list(loaded.log.pages) == pages
+    assert loaded.frame_states[-1] == simulate(pages, 50, "FIFO", cache=None).frame_states[-1]
+
+def test_negative_and_uint64_pages_cannot_share_a_run(tmp_path):
+    with ResultWriter(tmp_path / "mixed.pgres") as writer:
+        with pytest.raises(ValueError, match="one 64-bit type"):
+            record_run(writer, [-1, 2**64 - 1], 2, "LRU")
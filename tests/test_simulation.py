@@ -0,0 +1,41 @@
+from algorithms import PageReplacement
+from simulation import ResultCache, Stepper, TraceDigest, simulate, trace_digest
+from traces import open_trace, write_binary_trace
+
+WIDE = [2**64 - 1, 5, 2**63, 5, 2**64 - 1]
+
+def test_digest_ignores_chunking():
+    pages = list(range(1000)) * 3
+    digest = TraceDigest()
+    digest.update(pages[:7])
+    digest.update(pages[7:])
+    assert digest.hexdigest() == trace_digest(pages)
+
+def test_uint64_pages_are_digested_apart_from_negative_ones():
+    assert trace_digest(WIDE) != trace_digest([-1, 5, -2**63, 5, -1])
+
+def test_uint64_trace_simulates_and_caches(tmp_path):
+    path = tmp_path / "wide.bin"
+    write_binary_trace(path, WIDE, "uint64")
+    cache = ResultCache()
+    with open_trace(path) as trace:
+        result = simulate(trace, 2, "LRU", cache=cache)
+        assert result.faults == PageReplacement(2, WIDE).run("LRU")
+        assert simulate(trace, 2, "LRU", cache=cache) is result
+    assert result.log.pages[0] == 2**64 - 1
+
+def test_stepper_result_shares_arrays_until_fed_again():
+    pages = [1, 2, 3, 1, 4, 5, 2, 1, 6, 3] * 50
+    stepper = Stepper("LRU", 3, record=True)
+    stepper.feed(pages[:200])
+    mark = stepper.snapshot()
+    stepper.feed(pages[200:300])
+    result = stepper.result()
+    assert result.faults_over_time is stepper.faults_over_time
+    steps = list(result.steps)
+    stepper.feed(pages[300:])
+    stepper.restore(mark)
+    stepper.feed(pages[200:])
+    assert len(result.log) == len(result.faults_over_time) == 300
+    assert list(result.steps) == steps
+    assert list(stepper.result().steps)[:300] == steps
@@ -0,0 +1,36 @@
+import random
+import pytest
+from algorithms import PageReplacement
+from stack_distance import OPT_FRAME_LIMIT, lru_fault_curve, miss_ratio_curve, opt_fault_curve
+
+def traces():
+    rng = random.Random(11)
+    yield [rng.randrange(25) for _ in range(1500)]
+    yield [rng.choice([rng.randrange(4), rng.randrange(60)]) for _ in range(1500)]
+    yield [page % 13 for page in range(400)] + [rng.randrange(30) for _ in range(400)]
+
+@pytest.mark.parametrize("curve, algo", [(lru_fault_curve, "LRU"), (opt_fault_curve, "Optimal")])
+def test_curves_match_runs_at_every_frame_size(curve, algo):
+    for pages in traces():
+        faults = curve(pages)
+        assert len(faults) == len(set(pages))
+        assert faults == [PageReplacement(k, pages).run(algo)
+                          for k in range(1, len(faults) + 1)]
+
+def test_capped_opt_curve_is_exact_up_to_the_cap():
+    pages = next(traces())
+    full = opt_fault_curve(pages, max_frames=len(set(pages)))
+    for cap in (1, 3, 10):
+        assert opt_fault_curve(pages, max_frames=cap) == full[:cap]
+
+def test_opt_curve_is_capped_by_default():
+    pages = list(range(OPT_FRAME_LIMIT + 50)) * 2
+    faults = opt_fault_curve(pages)
+    assert len(faults) == OPT_FRAME_LIMIT
+    assert faults[-1] == PageReplacement(OPT_FRAME_LIMIT, pages).run("Optimal")
+
+def test_miss_ratio_curve():
+    assert miss_ratio_curve([1, 2, 1, 3, 1, 2], "LRU") == [1.0, 4 / 6, 3 / 6]
+    assert miss_ratio_curve([], "Optimal") == []
+    with pytest.raises(ValueError):
+        miss_ratio_curve([1], "FIFO")
@@ -0,0 +1,25 @@
+import numpy as np
+import pytest
+from workloads import Workload, fitting_dtype
+
+@pytest.mark.parametrize("pattern, params", [
+    ("uniform", {"pages": 257}),
+    ("zipf", {"pages": 70000, "skew": 0.5}),
+    ("sequential", {"start": -5}),
+    ("loop", {"pages": 300, "start": 2**31 - 200}),
+    ("working_set", {"pages": 50, "phase_length": 100, "shift": -7}),
+    ("working_set", {"pages": 50, "phase_length": 100}),
+    ("mixture", {"components": [(1, "loop", {"pages": 10}), (1, "sequential", {"start": 1000})]}),
+])
+@pytest.mark.parametrize("length", [0, 1, 100, 1001, 70000])
+def test_fitting_dtype_holds_the_generated_pages(pattern, params, length):
+    workload = Workload(pattern, length, 3, **params)
+    dtype = np.iinfo(fitting_dtype(workload))
+    pages = workload.to_numpy()
+    if len(pages):
+        assert dtype.min <= pages.min() and pages.max() <= dtype.max
+
+def test_fitting_dtype_does_not_generate_the_workload(monkeypatch):
+    workload = Workload("zipf", 20_000_000, pages=5000)
+    monkeypatch.setattr(Workload, "arrays", lambda self: pytest.fail("generated the workload"))
+    assert fitting_dtype(workload) == "int16"
@@ -0,0 +1,209 @@
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+DEFAULT_CHUNK_SIZE = 1 << 16
+READ_BLOCK_SIZE = 1 << 20
+
+# Binary trace layout: a 24-byte header (magic, version, dtype code, padding,
+# reference count, page size) followed by fixed-width little-endian page IDs.
+BINARY_MAGIC = b"PGTR"
+BINARY_VERSION = 1
+BINARY_HEADER = struct.Struct("<4sBcxxQQ")
+DTYPES = {"int8": "b", "uint8": "B", "int16": "h", "uint16": "H",
+          "int32": "i", "uint32": "I", "int64": "q", "uint64": "Q"}
+
+class TextTrace:
+    # A reference string stored as whitespace-separated page numbers in a
+    # file. Every iteration re-reads the file in fixed-size blocks, so even
+    # very large traces are processed with bounded memory.
+    def __init__(self, path, chunk_size=DEFAULT_CHUNK_SIZE):
+        self.path = path
+        self.chunk_size = chunk_size
+
+    def chunks(self):
+        pending = []
+        carry = b""
+        with open(self.path, "rb") as f:
+            while True:
+                block = f.read(READ_BLOCK_SIZE)
+                if not block:
+                    break
+                tokens = (carry + block).split()
+                # A token touching the end of the block may continue in the next one
+                carry = tokens.pop() if tokens and not block[-1:].isspace() else b""
+                pending.extend(map(int, tokens))
+                while len(pending) >= self.chunk_size:
+                    yield pending[:self.chunk_size]
+                    del pending[:self.chunk_size]
+        if carry:
+            pending.append(int(carry))
+        if pending:
+            yield pending
+
+    def __iter__(self):
+        for chunk in self.chunks():
+            yield from chunk
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def iter_chunks(reference_string, chunk_size=DEFAULT_CHUNK_SIZE):
+    # Chunks of any reference string: trace objects provide their own,
+    # in-memory sequences are sliced.
+    if hasattr(reference_string, "chunks"):
+        yield from reference_string.chunks()
+        return
+    for start in range(0, len(reference_string), chunk_size):
+        yield reference_string[start:start + chunk_size]
+
+def smallest_dtype(pages):
+    if not len(pages):
+        return "uint8"
+    if hasattr(pages, "min"):
+        low, high = int(pages.min()), int(pages.max())
+    else:
+        low, high = min(pages), max(pages)
+    for name, code in DTYPES.items():
+        bits = struct.calcsize(code) * 8
+        if code.islower():
+            fits = -(1 << (bits - 1)) <= low and high < (1 << (bits - 1))
+        else:
+            fits = 0 <= low and high < (1 << bits)
+        if fits:
+            return name
+    raise ValueError("Page numbers do not fit in 64 bits")
+
+class BinaryTraceWriter:
+    # Appends page IDs to a new binary trace; the reference count is patched
+    # into the header on close. Accepts lists, arrays and NumPy arrays.
+    def __init__(self, path, dtype="int64", page_size=4096):
+        if dtype not in DTYPES:
+            raise ValueError(f"Unknown dtype: {dtype}")
+        self.code = DTYPES[dtype]
+        self.page_size = page_size
+        self.length = 0
+        self.file = open(path, "wb")
+        self._write_header()
+
+    def _write_header(self):
+        self.file.write(BINARY_HEADER.pack(BINARY_MAGIC, BINARY_VERSION, self.code.encode(),
+                                           self.length, self.page_size))
+
+    def write(self, pages):
+        if hasattr(pages, "astype"):
+            # NumPy arrays convert to the little-endian layout in one step
+            data = pages.astype(f"<{self.code}", copy=False).tobytes()
+        else:
+            block = array(self.code, pages)
+            if sys.byteorder != "little":
+                block.byteswap()
+            data = block.tobytes()
+        self.file.write(data)
+        self.length += len(pages)
+
+    def close(self):
+        if self.file.closed:
+            return
+        self.file.seek(0)
+        self._write_header()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def write_binary_trace(path, pages, dtype=None, page_size=4096):
+    # pages may be a list, array or any trace object; it is written chunk by
+    # chunk.
+    if dtype is None:
+        dtype = smallest_dtype(pages) if not hasattr(pages, "chunks") else "int64"
+    with BinaryTraceWriter(path, dtype, page_size) as writer:
+        for chunk in iter_chunks(pages):
+            writer.write(chunk)
+    return writer.length
+
+class BinaryTrace:
+    # Memory-maps a binary trace; self.pages is a zero-copy memoryview over
+    # the page IDs, so opening is instant regardless of trace size.
+    def __init__(self, path, chunk_size=DEFAULT_CHUNK_SIZE):
+        self.path = path
+        self.chunk_size = chunk_size
+        with open(path, "rb") as f:
+            header = f.read(BINARY_HEADER.size)
+            if len(header) < BINARY_HEADER.size:
+                raise ValueError(f"{path} is not a binary trace file")
+            magic, version, code, length, page_size = BINARY_HEADER.unpack(header)
+            if magic != BINARY_MAGIC:
+                raise ValueError(f"{path} is not a binary trace file")
+            if version != BINARY_VERSION:
+                raise ValueError(f"Unsupported trace version: {version}")
+            dtypes = {c.encode(): name for name, c in DTYPES.items()}
+            if code not in dtypes:
+                raise ValueError(f"{path} has an unknown page type: {code!r}")
+            self.typecode = code.decode()
+            self.dtype = dtypes[code]
+            self.page_size = page_size
+            # Checked against the file size before mapping, so a corrupt
+            # count is reported rather than read past
+            end = BINARY_HEADER.size + length * struct.calcsize(self.typecode)
+            if os.fstat(f.fileno()).st_size < end:
+                raise ValueError(f"{path} is truncated: its header promises {length:,} "
+                                 f"references")
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if sys.byteorder == "little":
+            self.pages = memoryview(self._map)[BINARY_HEADER.size:end].cast(self.typecode)
+        else:
+            self.pages = array(self.typecode, self._map[BINARY_HEADER.size:end])
+            self.pages.byteswap()
+
+    def __len__(self):
+        return len(self.pages)
+
+    def __getitem__(self, index):
+        return self.pages[index]
+
+    def __iter__(self):
+        return iter(self.pages)
+
+    def chunks(self):
+        for start in range(0, len(self.pages), self.chunk_size):
+            yield self.pages[start:start + self.chunk_size]
+
+    def to_numpy(self):
+        import numpy as np
+        return np.frombuffer(self.pages, dtype=self.typecode)
+
+    def close(self):
+        if isinstance(self.pages, memoryview):
+            self.pages.release()
+        try:
+            self._map.close()
+        except BufferError:
+            # Chunks are still referenced, say by the traceback of a failed
+            # or cancelled run; the mapping closes once they are collected
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def open_trace(path, chunk_size=DEFAULT_CHUNK_SIZE):
+    # Picks the reader from the file contents rather than its extension
+    with open(path, "rb") as f:
+        is_binary = f.read(len(BINARY_MAGIC)) == BINARY_MAGIC
+    if is_binary:
+        return BinaryTrace(path, chunk_size)
+    return TextTrace(path, chunk_size)
@@ -0,0 +1,93 @@
+import importlib
+import queue
+import threading
+import time
+
+class Cancelled(Exception):
+    pass
+
+class BackgroundTask:
+    # Runs work(report) on a daemon thread so the Tk main loop stays
+    # responsive. The engines call report(done, total) as they go; it raises
+    # Cancelled once cancel() has been requested, which unwinds the
+    # simulation. Messages travel back through a queue that the Tk thread
+    # polls with after(), since Tk must only be touched from its own thread.
+    def __init__(self, root, work, on_done, on_error, on_progress=None,
+                 on_cancelled=None, poll_ms=50):
+        self.root = root
+        self.work = work
+        self.on_done = on_done
+        self.on_error = on_error
+        self.on_progress = on_progress
+        self.on_cancelled = on_cancelled
+        self.poll_ms = poll_ms
+        self.messages = queue.Queue()
+        self.cancel_event = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self.thread.start()
+        self.root.after(self.poll_ms, self._poll)
+        return self
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def report(self, done, total=None):
+        if self.cancel_event.is_set():
+            raise Cancelled()
+        self.messages.put(("progress", (done, total)))
+
+    def _run(self):
+        try:
+            result = self.work(self.report)
+        except Cancelled:
+            self.messages.put(("cancelled", None))
+        except Exception as e:
+            self.messages.put(("error", e))
+        else:
+            self.messages.put(("done", result))
+
+    def _poll(self):
+        latest = None
+        while True:
+            try:
+                kind, payload = self.messages.get_nowait()
+            except queue.Empty:
+                break
+            if kind == "progress":
+                latest = payload
+                continue
+            if kind == "done":
+                self.on_done(payload)
+            elif kind == "error":
+                self.on_error(payload)
+            elif self.on_cancelled:
+                self.on_cancelled()
+            return
+        # Only the newest progress update matters for redrawing
+        if latest is not None and self.on_progress:
+            self.on_progress(*latest)
+        self.root.after(self.poll_ms, self._poll)
+
+def prewarm(modules):
+    # Imports modules on a daemon thread, so that the first chart or parse
+    # does not stall the UI on them. A module the Tk thread imports while
+    # this is under way simply waits for it to finish. Import errors are
+    # left for the Tk thread to hit and report where the module is used.
+    def run():
+        for name in modules:
+            try:
+                importlib.import_module(name)
+            except ImportError:
+                pass
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    return thread
+
+def time_to_window(root, started):
+    # Seconds from the perf_counter() reading started until root is mapped
+    # and its widgets drawn; runs the Tk event loop until then
+    root.wait_visibility(root)
+    root.update_idletasks()
+    return time.perf_counter() - started
@@ -0,0 +1,146 @@
+import numpy as np
+from traces import DEFAULT_CHUNK_SIZE, BinaryTraceWriter, smallest_dtype
+
+# Synthetic reference strings for common access patterns, generated with
+# NumPy a chunk at a time. Every pattern takes the positions of the chunk
+# being generated (for position-dependent shapes such as loops and phases)
+# and a seeded Generator, so a (pattern, parameters, seed) triple always
+# produces the same trace.
+
+# References generated per NumPy call
+GENERATE_CHUNK_SIZE = 1 << 22
+
+def uniform(positions, rng, pages=1000):
+    return rng.integers(0, pages, size=len(positions))
+
+def zipf(positions, rng, pages=1000, skew=1.0):
+    # Page p (0-based) is drawn with probability proportional to 1 / (p + 1) ** skew
+    weights = 1.0 / np.arange(1, pages + 1) ** skew
+    cdf = np.cumsum(weights)
+    cdf /= cdf[-1]
+    return np.searchsorted(cdf, rng.random(len(positions)), side="right")
+
+def sequential(positions, rng, start=0):
+    # A scan that never revisits a page
+    return start + positions
+
+def loop(positions, rng, pages=100, start=0):
+    return start + positions % pages
+
+def working_set(positions, rng, pages=100, phase_length=10_000, shift=None):
+    # Uniform references over a working set of `pages` pages that moves by
+    # `shift` pages (default: a whole new set) every phase_length references
+    shift = pages if shift is None else shift
+    phase = positions // phase_length
+    return phase * shift + rng.integers(0, pages, size=len(positions))
+
+PATTERNS = {"uniform": uniform, "zipf": zipf, "sequential": sequential,
+            "loop": loop, "working_set": working_set}
+
+# Smallest and largest page each pattern can produce in length references,
+# from its parameters alone (defaults as above)
+def uniform_bounds(length, pages=1000):
+    return 0, pages - 1
+
+def zipf_bounds(length, pages=1000, skew=1.0):
+    return 0, pages - 1
+
+def sequential_bounds(length, start=0):
+    return start, start + length - 1
+
+def loop_bounds(length, pages=100, start=0):
+    return start, start + min(pages, length) - 1
+
+def working_set_bounds(length, pages=100, phase_length=10_000, shift=None):
+    shift = pages if shift is None else shift
+    last_base = (length - 1) // phase_length * shift
+    return min(0, last_base), max(0, last_base) + pages - 1
+
+BOUNDS = {"uniform": uniform_bounds, "zipf": zipf_bounds, "sequential": sequential_bounds,
+          "loop": loop_bounds, "working_set": working_set_bounds}
+
+class Workload:
+    # A synthetic reference string that can be streamed like a trace object
+    # (see traces.py) or materialised with to_numpy(). Use pattern="mixture"
+    # with components=[(weight, pattern, params), ...] to combine patterns.
+    def __init__(self, pattern, length, seed=0, **params):
+        if pattern != "mixture" and pattern not in PATTERNS:
+            raise ValueError(f"Unknown workload pattern: {pattern}")
+        if pattern == "mixture":
+            for _, name, _ in params.get("components", ()):
+                if name not in PATTERNS:
+                    raise ValueError(f"Unknown workload pattern: {name}")
+        self.pattern = pattern
+        self.length = length
+        self.seed = seed
+        self.params = params
+
+    def __len__(self):
+        return self.length
+
+    def arrays(self):
+        # Always generated in GENERATE_CHUNK_SIZE blocks, so that the random
+        # stream, and with it the trace, does not depend on how it is consumed
+        rng = np.random.default_rng(self.seed)
+        # Mixture components each count their own positions across chunks
+        offsets = {}
+        for start in range(0, self.length, GENERATE_CHUNK_SIZE):
+            stop = min(start + GENERATE_CHUNK_SIZE, self.length)
+            positions = np.arange(start, stop, dtype=np.int64)
+            if self.pattern == "mixture":
+                yield self._mixture_chunk(positions, rng, offsets)
+            else:
+                yield np.asarray(PATTERNS[self.pattern](positions, rng, **self.params),
+                                 dtype=np.int64)
+
+    def _mixture_chunk(self, positions, rng, offsets):
+        components = self.params["components"]
+        weights = np.array([weight for weight, _, _ in components], dtype=float)
+        choice = rng.choice(len(components), size=len(positions), p=weights / weights.sum())
+        out = np.empty(len(positions), dtype=np.int64)
+        for index, (_, pattern, params) in enumerate(components):
+            where = np.flatnonzero(choice == index)
+            if len(where):
+                base = offsets.get(index, 0)
+                local = np.arange(base, base + len(where), dtype=np.int64)
+                out[where] = PATTERNS[pattern](local, rng, **params)
+                offsets[index] = base + len(where)
+        return out
+
+    def chunks(self):
+        # Plain-int chunks, as the simulation engines expect
+        for block in self.arrays():
+            for start in range(0, len(block), DEFAULT_CHUNK_SIZE):
+                yield block[start:start + DEFAULT_CHUNK_SIZE].tolist()
+
+    def __iter__(self):
+        for chunk in self.chunks():
+            yield from chunk
+
+    def to_numpy(self):
+        if self.length == 0:
+            return np.empty(0, dtype=np.int64)
+        return np.concatenate(list(self.arrays()))
+
+def generate(pattern, length, seed=0, **params):
+    return Workload(pattern, length, seed, **params).to_numpy()
+
+def write_workload(path, workload, dtype="int64", page_size=4096):
+    # Streams a Workload straight into the binary trace format
+    with BinaryTraceWriter(path, dtype, page_size) as writer:
+        for block in workload.arrays():
+            writer.write(block)
+    return writer.length
+
+def fitting_dtype(workload):
+    # Smallest binary trace dtype for a workload, from bounds on its pages
+    # rather than a generation pass. A mixture component may take any number
+    # of the references, up to all of them.
+    if not workload.length:
+        return smallest_dtype([])
+    if workload.pattern == "mixture":
+        components = [(pattern, params) for _, pattern, params in workload.params["components"]]
+    else:
+        components = [(workload.pattern, workload.params)]
+    bounds = [BOUNDS[pattern](workload.length, **params) for pattern, params in components]
+    return smallest_dtype([min(low for low, _ in bounds), max(high for _, high in bounds)])